@@ -49,8 +49,27 @@ if __name__ == '__main__':
         - Coleta de relatórios
         """
         
+        # Opções do servidor HTTP (padrões em cigs_core/config.py):
+        #   --dev              servidor de desenvolvimento do Flask
+        #   --producao         pool de threads com keep-alive e timeouts (padrão)
+        #   --threads N        threads do pool de produção
+        #   --pesadas N        máximo de rotas pesadas simultâneas (ex: /check_db)
+        modo = None
+        threads = None
+        pesadas = None
+        args = sys.argv[1:]
+        for i, arg in enumerate(args):
+            if arg == '--dev':
+                modo = "DEV"
+            elif arg == '--producao':
+                modo = "PRODUCAO"
+            elif arg == '--threads' and i + 1 < len(args) and args[i + 1].isdigit():
+                threads = int(args[i + 1])
+            elif arg == '--pesadas' and i + 1 < len(args) and args[i + 1].isdigit():
+                pesadas = int(args[i + 1])
+
         # Inicia o servidor web/API na porta configurada (geralmente 5000 ou 8080)
-        iniciar_servidor()
+        iniciar_servidor(modo=modo, threads=threads, threads_pesadas=pesadas)
 
 # Fluxo de Execução:
 # -----------------
@@ -0,0 +1,274 @@
+# Importa módulos padrão para arquivos, JSON, processos, tempo e concorrência
+import os
+import json
+import time
+import uuid
+import threading
+import subprocess
+from datetime import datetime
+
+# Importa configurações da agenda interna
+from .config import ARQUIVO_AGENDA, AGENDADOR_TOLERANCIA_MIN, AGENDADOR_RETENCAO
+
+# Importa o log do agente
+from .utils import log_debug
+
+# Estados de uma missão na agenda interna
+AGENDADA = "AGENDADA"
+EXECUTANDO = "EXECUTANDO"
+CONCLUIDA = "CONCLUIDA"
+FALHA = "FALHA"
+CANCELADA = "CANCELADA"
+PERDIDA = "PERDIDA"
+INTERROMPIDA = "INTERROMPIDA"
+ESTADOS_FINAIS = (CONCLUIDA, FALHA, CANCELADA, PERDIDA, INTERROMPIDA)
+
+# Formato da data/hora da missão enviado pela central (o mesmo do schtasks /sd /st)
+FORMATO_DATA_HORA = "%d/%m/%Y %H:%M"
+
+# Espera máxima (s) entre conferências: cobre ajuste de relógio e máquina que hibernou
+ESPERA_MAXIMA = 60
+
+# Agenda em memória (id -> entrada); o Condition acorda o disparador quando a agenda muda
+_agenda = None
+_lock = threading.Lock()
+_aviso = threading.Condition(_lock)
+_thread = None
+
+
+def _agora():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _carregar():
+    try:
+        with open(ARQUIVO_AGENDA, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except:
+        return {}
+
+
+def _salvar():
+    try:
+        pasta = os.path.dirname(ARQUIVO_AGENDA)
+        if pasta and not os.path.exists(pasta):
+            os.makedirs(pasta)
+        with open(ARQUIVO_AGENDA + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump(_agenda, f, ensure_ascii=False)
+        os.replace(ARQUIVO_AGENDA + ".tmp", ARQUIVO_AGENDA)
+    except Exception as e:
+        log_debug(f"Aviso: falha ao gravar a agenda interna: {e}")
+
+
+def _obter_agenda():
+    global _agenda
+    if _agenda is None:
+        _agenda = _carregar()
+    return _agenda
+
+
+def _aplicar_retencao():
+    # Mantém apenas as AGENDADOR_RETENCAO entradas finalizadas mais recentes
+    finalizadas = sorted((e for e in _agenda.values() if e["estado"] in ESTADOS_FINAIS), key=lambda e: e["id"])
+    for entrada in finalizadas[:-AGENDADOR_RETENCAO] if AGENDADOR_RETENCAO > 0 else finalizadas:
+        _agenda.pop(entrada["id"], None)
+
+
+def _atualizar(entrada_id, **campos):
+    with _lock:
+        entrada = _obter_agenda().get(entrada_id)
+        if not entrada:
+            return
+        entrada.update(campos)
+        entrada["atualizado_em"] = _agora()
+        if entrada["estado"] in ESTADOS_FINAIS:
+            _aplicar_retencao()
+        _salvar()
+
+
+def instante_missao(data_hora):
+    """
+    Converte a data/hora da missão ('DD/MM/AAAA HH:MM') em timestamp.
+    Sem data (valor sem espaço): hoje às 03:00, como no agendamento pelo schtasks.
+    ValueError se o formato for inválido.
+    """
+    if not data_hora or " " not in data_hora:
+        data_hora = f"{datetime.now().strftime('%d/%m/%Y')} 03:00"
+    return datetime.strptime(data_hora, FORMATO_DATA_HORA).timestamp()
+
+
+def _executar_launcher(bat_path):
+    """Roda o launcher da missão e espera o fim. Returns: código de retorno."""
+    if os.name == 'nt':
+        comando = ["cmd", "/c", bat_path]
+        flags = subprocess.CREATE_NO_WINDOW
+    else:
+        comando = ["sh", bat_path]
+        flags = 0
+    return subprocess.run(comando, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                          creationflags=flags).returncode
+
+
+def _rodar(entrada):
+    log_debug(f"Agenda interna: disparando {entrada['nome']} ({entrada['bat']})", entrada["sistema"])
+    try:
+        retorno = _executar_launcher(entrada["bat"])
+        ok = retorno == 0
+        detalhe = "Launcher concluído" if ok else f"Launcher retornou {retorno}"
+    except Exception as e:
+        retorno, ok, detalhe = None, False, f"Falha ao iniciar o launcher: {e}"
+    _atualizar(entrada["id"], estado=CONCLUIDA if ok else FALHA, retorno=retorno, detalhe=detalhe,
+               finalizado_em=_agora())
+    log_debug(f"Agenda interna: {entrada['nome']} {'concluída' if ok else 'falhou'} - {detalhe}", entrada["sistema"])
+
+
+def _coletar_vencidas(agora):
+    """
+    Entradas cujo horário chegou (chamada com o lock). Atraso dentro da tolerância
+    dispara (agente estava parado ou ocupado); acima dela a missão vira PERDIDA.
+    """
+    vencidas = []
+    tolerancia = AGENDADOR_TOLERANCIA_MIN * 60
+    alterou = False
+    for entrada in _obter_agenda().values():
+        if entrada["estado"] != AGENDADA or entrada["executar_em"] > agora:
+            continue
+        atraso = agora - entrada["executar_em"]
+        alterou = True
+        if atraso > tolerancia:
+            entrada.update(estado=PERDIDA, finalizado_em=_agora(), atualizado_em=_agora(),
+                           detalhe=f"Horário perdido há {int(atraso // 60)} min (tolerância {AGENDADOR_TOLERANCIA_MIN} min)")
+            log_debug(f"Agenda interna: {entrada['nome']} PERDIDA ({entrada['detalhe']})", entrada["sistema"])
+            continue
+        entrada.update(estado=EXECUTANDO, disparado_em=_agora(), atualizado_em=_agora(), atraso_s=int(atraso),
+                       detalhe="Executando launcher" if atraso < ESPERA_MAXIMA else
+                       f"Disparo atrasado em {int(atraso // 60)} min")
+        vencidas.append(dict(entrada))
+    if alterou:
+        _aplicar_retencao()
+        _salvar()
+    return vencidas
+
+
+def _loop_agendador():
+    while True:
+        with _aviso:
+            agora = time.time()
+            vencidas = _coletar_vencidas(agora)
+            if not vencidas:
+                pendentes = [e["executar_em"] for e in _agenda.values() if e["estado"] == AGENDADA]
+                espera = min(min(pendentes) - agora, ESPERA_MAXIMA) if pendentes else ESPERA_MAXIMA
+                _aviso.wait(max(espera, 0.05))
+                continue
+        for entrada in vencidas:
+            # Cada launcher em sua thread: uma missão longa não atrasa a próxima
+            threading.Thread(target=_rodar, args=(entrada,), name=f"CIGS_Agenda_{entrada['sistema']}",
+                             daemon=True).start()
+
+
+def _garantir_thread():
+    global _thread
+    with _lock:
+        if _thread is None or not _thread.is_alive():
+            _thread = threading.Thread(target=_loop_agendador, name="CIGS_Agenda", daemon=True)
+            _thread.start()
+
+
+def iniciar_agendador():
+    """
+    Recarrega a agenda do disco e inicia o disparador. Missões que estavam
+    executando quando o agente parou viram INTERROMPIDA (não são repetidas);
+    as que perderam o horário seguem a regra de tolerância no primeiro ciclo.
+    """
+    with _aviso:
+        alterou = False
+        for entrada in _obter_agenda().values():
+            if entrada["estado"] == EXECUTANDO:
+                entrada.update(estado=INTERROMPIDA, finalizado_em=_agora(), atualizado_em=_agora(),
+                               detalhe="Agente reiniciado durante a execução do launcher")
+                alterou = True
+        if alterou:
+            _salvar()
+        _aviso.notify_all()
+    _garantir_thread()
+
+
+def agendar_missao(nome, sistema, bat_path, executar_em, usuario=None):
+    """
+    Registra a missão na agenda interna. Uma missão ainda não disparada com o
+    mesmo nome é substituída (como o /f do schtasks).
+    O launcher roda com a conta do serviço do agente (usuario só fica registrado).
+
+    Returns:
+        tuple: (ok, mensagem)
+    """
+    entrada_id = f"{datetime.now().strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:6]}"
+    quando = datetime.fromtimestamp(executar_em).strftime(FORMATO_DATA_HORA)
+    with _aviso:
+        agenda = _obter_agenda()
+        for entrada in agenda.values():
+            if entrada["nome"] == nome and entrada["estado"] == AGENDADA:
+                entrada.update(estado=CANCELADA, finalizado_em=_agora(), atualizado_em=_agora(),
+                               detalhe="Substituída por novo agendamento")
+        agenda[entrada_id] = {
+            "id": entrada_id,
+            "nome": nome,
+            "sistema": sistema.upper(),
+            "bat": bat_path,
+            "executar_em": executar_em,
+            "data_hora": quando,
+            "usuario": usuario or None,
+            "estado": AGENDADA,
+            "detalhe": f"Agendada para {quando}",
+            "criado_em": _agora(),
+            "disparado_em": None,
+            "finalizado_em": None,
+            "atualizado_em": _agora(),
+        }
+        _aplicar_retencao()
+        _salvar()
+        _aviso.notify_all()
+    _garantir_thread()
+    log_debug(f"Agenda interna: {nome} agendada para {quando}", sistema)
+    return True, "Agendado"
+
+
+def cancelar_agendadas(sistema=None, nome=None):
+    """
+    Cancela as missões ainda não disparadas (todas, só as do sistema ou só a de nome informado).
+    Operação em memória: nenhum processo externo é criado.
+
+    Returns:
+        list: entradas canceladas
+    """
+    canceladas = []
+    with _aviso:
+        for entrada in _obter_agenda().values():
+            if entrada["estado"] != AGENDADA or (sistema and entrada["sistema"] != sistema.upper()):
+                continue
+            if nome and entrada["nome"] != nome:
+                continue
+            entrada.update(estado=CANCELADA, finalizado_em=_agora(), atualizado_em=_agora(),
+                           detalhe="Cancelada pela central")
+            canceladas.append(dict(entrada))
+        if canceladas:
+            _aplicar_retencao()
+            _salvar()
+            _aviso.notify_all()
+    for entrada in canceladas:
+        log_debug(f"Agenda interna: {entrada['nome']} cancelada", entrada["sistema"])
+    return canceladas
+
+
+def ultima_entrada(nome):
+    """Entrada mais recente da agenda com o nome informado (ou None)."""
+    with _lock:
+        entradas = [e for e in _obter_agenda().values() if e["nome"] == nome]
+        return dict(max(entradas, key=lambda e: e["id"])) if entradas else None
+
+
+def listar_agenda(pendentes=False):
+    """Entradas da agenda, próximas primeiro (pendentes=True: só as AGENDADA)."""
+    with _lock:
+        entradas = [dict(e) for e in _obter_agenda().values() if not pendentes or e["estado"] == AGENDADA]
+    return sorted(entradas, key=lambda e: (e["estado"] != AGENDADA, e["executar_em"]))
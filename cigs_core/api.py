@@ -1,18 +1,48 @@
 # Importa a classe Flask para criar o servidor web, jsonify para respostas JSON e request para acessar dados enviados ao servidor
-from flask import Flask, jsonify, request
+from flask import Flask, jsonify, request, g, Response
 
-# Importa módulo para manipular arquivos e obter informações de disco
-import shutil
-
-# Importa psutil para obter informações de uso de memória RAM
-import psutil
+# Importa time para medir a latência das requisições e datetime para o período do /cigs/logs/lote
+import time
+from datetime import datetime
 
 # Importa constantes e funções de configuração do módulo interno config
-from .config import PORTA, VERSAO_AGENTE, get_caminho_atualizador
+from .config import PORTA, VERSAO_AGENTE, MAPA_RAIZ, SERVIDOR_MODO, SERVIDOR_THREADS, RECURSOS_INTERVALO, get_caminho_atualizador
+from .config import STATUS_CACHE_SEGUNDOS, LOGS_TRECHO_MAX_BYTES, LOGS_LOTE_MAX_DIAS
 
 # Importa utilidades internas, como logs, permissões e funções auxiliares
 from .utils import log_debug, ajustar_permissoes, get_self_hash, contar_clientes
 
+# Importa o manifesto de build (fingerprint calculado uma única vez)
+from .manifest import carregar_manifesto
+
+# Importa o servidor de produção e o isolamento das rotas pesadas
+from .servidor import rota_pesada, servir_producao, configurar_vagas_pesadas
+
+# Importa o modelo de jobs assíncronos
+from .jobs import criar_job, obter_job, listar_jobs, tamanho_fila, carregar_jobs, FILA_MISSOES, FILA_PREPARO
+
+# Importa o pré-preparo de pacotes (download antecipado em segundo plano)
+from .preparo import enfileirar_preparo, estado_preparo, retomar_preparos
+
+# Importa a agenda interna de missões (alternativa ao schtasks)
+from .agendador import iniciar_agendador, listar_agenda
+
+# Importa o registro das tarefas/launchers criados pelo agente
+from .registro_tarefas import listar_tarefas
+
+# Importa as métricas no formato do Prometheus e a fila do escritor de log
+from .metricas import incrementar, observar, texto_prometheus
+from .logger import estatisticas_log
+
+# Importa o canal persistente com o hub da central (opcional, CANAL_HUB)
+from .canal import iniciar_canal, estado_canal
+
+# Importa a leitura remota dos logs (trecho por offset e lote compactado)
+from .leitura_logs import ARQUIVOS_LOG, ler_trecho, gerar_lote_gzip
+
+# Importa a amostragem de recursos em segundo plano (CPU, RAM, volumes e I/O)
+from .recursos import iniciar_amostragem, ultima_amostra, resumo_recursos, historico, VOLUME_SISTEMA
+
 # Importa função para verificar banco de dados
 from .database import executar_check_banco
 
@@ -24,51 +54,174 @@ from .tasks import limpar_logs_cloudup
 # Cria a aplicação Flask
 app = Flask(__name__)
 
+# Início do agente (uptime do /cigs/ping)
+_inicio_agente = time.time()
+
+# Status básico por sistema: sistema -> (instante, {clientes, ref})
+_cache_status = {}
+
+# ==========================================
+# INSTRUMENTAÇÃO DAS ROTAS (/cigs/metrics)
+# ==========================================
+def _registrar_requisicao(codigo):
+    # Rota pelo padrão registrado (ex: /cigs/jobs/<job_id>): poucas séries, não uma por ID
+    rota = request.url_rule.rule if request.url_rule else "desconhecida"
+    incrementar("cigs_http_requisicoes_total", rota=rota, metodo=request.method, codigo=codigo)
+    observar("cigs_http_duracao_segundos", time.perf_counter() - g.inicio_requisicao, rota=rota)
+    g.requisicao_medida = True
+
+@app.before_request
+def _inicio_requisicao():
+    g.inicio_requisicao = time.perf_counter()
+
+@app.after_request
+def _fim_requisicao(resposta):
+    _registrar_requisicao(resposta.status_code)
+    return resposta
+
+@app.teardown_request
+def _falha_requisicao(erro):
+    # Exceção não tratada: o after_request não roda, conta como 500
+    if erro is not None and "inicio_requisicao" in g and not g.get("requisicao_medida"):
+        _registrar_requisicao(500)
+
+def ler_recursos():
+    """
+    Retorna (GB livres no volume do sistema, % de RAM em uso) da última amostra
+    da thread de recursos; nada é lido do SO na requisição. Zero sem amostra.
+    """
+    amostra = ultima_amostra()
+    if not amostra:
+        return 0, 0
+    return amostra["volumes"].get(VOLUME_SISTEMA, 0), amostra["ram"] or 0
+
+def _clientes_em_cache(sis):
+    """
+    (clientes, referência) do config.ini do sistema, guardados por
+    STATUS_CACHE_SEGUNDOS: rajadas de /status não fazem nem o stat do arquivo.
+    """
+    agora = time.monotonic()
+    entrada = _cache_status.get(sis)
+    if entrada and agora - entrada[0] < STATUS_CACHE_SEGUNDOS:
+        return entrada[1]
+    valor = contar_clientes(sis)
+    _cache_status[sis] = (agora, valor)
+    return valor
+
+def _responder_com_etag(dados):
+    # ETag do corpo: a central manda If-None-Match e recebe 304 (sem corpo) se nada mudou
+    resposta = jsonify(dados)
+    resposta.add_etag()
+    return resposta.make_conditional(request)
+
+# Liveness: só memória (versão, uptime e fila de jobs), sem disco e sem log
+@app.route('/cigs/ping', methods=['GET'])
+def ping():
+    return jsonify({
+        "status": "ONLINE",
+        "version": VERSAO_AGENTE,
+        "uptime": int(time.time() - _inicio_agente),
+        "jobs_fila": tamanho_fila(),
+        "canal": estado_canal()["conectado"]
+    })
+
+def resumo_status_canal():
+    """Status básico de todos os sistemas enviado pelo canal ao hub sempre que mudar."""
+    sistemas = {}
+    for sis in MAPA_RAIZ:
+        qtd, ref = _clientes_em_cache(sis)
+        sistemas[sis] = {"clientes": qtd, "ref": ref, "preparo": estado_preparo(sis)}
+    return {"version": VERSAO_AGENTE, "hash": get_self_hash(), "sistemas": sistemas}
+
 # Define a rota /cigs/status para requisições GET
 @app.route('/cigs/status', methods=['GET'])
 def status():
     # Lê o parâmetro 'sistema' da URL; padrão é 'AC'
     sis = request.args.get('sistema', 'AC')
 
-    # DEBUG NO LOG: Vamos ver quem está pedindo o quê
-    # Isso vai aparecer no CIGS_debug.log do servidor
-    log_debug(f"API /status chamada. Sistema solicitado: '{sis}'")
-    
     # Verifica se deve retornar dados completos (uso de disco e RAM)
     # 'full=1' ativa modo detalhado
     full = request.args.get('full', '0') == '1'
     
-    # Obtém quantidade de clientes e referência do sistema informado
-    qtd, ref = contar_clientes(sis)
+    # Quantidade de clientes e referência do sistema informado (cache curto)
+    qtd, ref = _clientes_em_cache(sis)
 
-    # Variáveis default para dados de disco e memória
-    d = 0; m = 0
-    
-    # Se o modo detalhado foi ativado
-    if full:
-        try:
-            # Obtém espaço livre no disco C: convertido para GB
-            d = round(shutil.disk_usage("C:\\").free / (1024**3), 2)
-        except:
-            pass
-        try:
-            # Obtém percentual de uso da memória RAM
-            m = psutil.virtual_memory().percent
-        except:
-            pass
+    # Dados de disco e memória apenas no modo detalhado
+    d, m = ler_recursos() if full else (0, 0)
         
     # Retorna resposta JSON com informações do agente
-    return jsonify({
+    return _responder_com_etag({
         "status": "ONLINE",
         "version": VERSAO_AGENTE,
         "hash": get_self_hash(),
         "clientes": qtd,
         "ref": ref,
         "sistema_lido": sis,
+        "preparo": estado_preparo(sis),
+        "disk": d,
+        "ram": m,
+        "recursos": resumo_recursos() if full else None
+    })
+
+# Rota de status em lote: todos os sistemas do MAPA_RAIZ em uma única chamada
+@app.route('/cigs/status_all', methods=['GET'])
+def status_all():
+    full = request.args.get('full', '0') == '1'
+
+    sistemas = {}
+    for sis in MAPA_RAIZ:
+        qtd, ref = _clientes_em_cache(sis)
+        sistemas[sis] = {"clientes": qtd, "ref": ref, "preparo": estado_preparo(sis)}
+
+    d, m = ler_recursos() if full else (0, 0)
+
+    return _responder_com_etag({
+        "status": "ONLINE",
+        "version": VERSAO_AGENTE,
+        "hash": get_self_hash(),
+        "sistemas": sistemas,
         "disk": d,
-        "ram": m
+        "ram": m,
+        "recursos": resumo_recursos() if full else None
     })
 
+# Métricas no formato texto do Prometheus (scrape): requisições, downloads, extração,
+# cópia, isql, fila do log, fila de jobs e a última amostra de recursos
+@app.route('/cigs/metrics', methods=['GET'])
+def metrics():
+    log = estatisticas_log()
+    amostra = ultima_amostra() or {}
+    medidores = [
+        ("cigs_log_fila", "gauge", "Linhas aguardando gravação no CIGS_debug.log", [({}, log["fila"])]),
+        ("cigs_log_descartadas_total", "counter", "Linhas de log descartadas com a fila cheia", [({}, log["descartadas"])]),
+        ("cigs_jobs_fila", "gauge", "Jobs aguardando execução por fila",
+         [({"fila": fila}, tamanho_fila(fila)) for fila in (FILA_MISSOES, FILA_PREPARO)]),
+        ("cigs_canal_conectado", "gauge", "1 se o canal persistente com o hub está conectado",
+         [({}, 1 if estado_canal()["conectado"] else 0)]),
+        ("cigs_cpu_percentual", "gauge", "CPU na última amostra do agente", [({}, amostra.get("cpu"))]),
+        ("cigs_ram_percentual", "gauge", "RAM em uso na última amostra do agente", [({}, amostra.get("ram"))]),
+        ("cigs_volume_livre_gb", "gauge", "Espaço livre por volume na última amostra",
+         [({"volume": volume}, livre) for volume, livre in (amostra.get("volumes") or {}).items()]),
+    ]
+    return Response(texto_prometheus(medidores), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+# Série de amostras de recursos do buffer circular (para os gráficos da central)
+# 'desde=<ts>' devolve só as amostras mais novas que a última que a central já tem
+@app.route('/cigs/metrics/history', methods=['GET'])
+def metrics_history():
+    try:
+        desde = float(request.args['desde']) if request.args.get('desde') else None
+    except ValueError:
+        return jsonify({"erro": "desde deve ser um timestamp"}), 400
+    return jsonify({"intervalo": RECURSOS_INTERVALO, "amostras": historico(desde)})
+
+# Rota que expõe o manifesto de build completo (hash SHA-256 por arquivo)
+# 'revalidar=1' confere tamanho/mtime no disco e re-hasheia apenas o que mudou
+@app.route('/cigs/manifest', methods=['GET'])
+def manifest():
+    revalidar = request.args.get('revalidar', '0') == '1'
+    return jsonify(carregar_manifesto(revalidar=revalidar))
+
 # Define rota /cigs/executar para requisições POST
 @app.route('/cigs/executar', methods=['POST'])
 def executar():
@@ -89,29 +242,91 @@ def executar():
     # Argumentos adicionais para o script
     argumentos = d.get('params', '')
 
-    # Agenda a tarefa usando função universal
-    s, m = agendar_tarefa_universal(
-        d.get('url'),
-        d.get('arquivo'),
-        d.get('data_hora'),
-        d.get('user'),
-        d.get('pass'),
-        start_in,
-        sist,
-        d.get('modo'),
-        script_nome=script_alvo,   # Nome do script a executar
-        script_args=argumentos     # Argumentos passados ao script
-    )
-    
-    # Se modo COMPLETO (que envolve download), realiza sanitização imediata da pasta
-    if d.get('modo') == "COMPLETO" and start_in:
-        sanitizar_extracao(start_in)
+    def missao(progresso):
+        # Agenda a tarefa usando função universal
+        s, m = agendar_tarefa_universal(
+            d.get('url'),
+            d.get('arquivo'),
+            d.get('data_hora'),
+            d.get('user'),
+            d.get('pass'),
+            start_in,
+            sist,
+            d.get('modo'),
+            script_nome=script_alvo,   # Nome do script a executar
+            script_args=argumentos,    # Argumentos passados ao script
+            progresso=progresso,
+            sha256=d.get('sha256'),    # Verificação opcional do pacote baixado
+            tamanho=d.get('tamanho'),
+            delta_url=d.get('delta_url'),        # Pacote delta opcional (fallback: pacote completo)
+            delta_sha256=d.get('delta_sha256'),
+            politica=d.get('politica')           # Override da política de banda/prioridade do agente
+        )
+
+        # Se modo COMPLETO (que envolve download), realiza sanitização imediata da pasta
+        if d.get('modo') == "COMPLETO" and start_in:
+            sanitizar_extracao(start_in)
+        return s, m
+
+    # O trabalho pesado (download, extração, cópia, schtasks) roda no worker de jobs;
+    # a central recebe o ID na hora e acompanha por /cigs/jobs/<id>
+    job_id = criar_job("MISSAO", sist, missao, {
+        "arquivo": d.get('arquivo'),
+        "data_hora": d.get('data_hora'),
+        "modo": d.get('modo'),
+        "script": script_alvo,
+        "params": argumentos,
+        "start_in": start_in,
+        "politica": d.get('politica')
+    })
+
+    return jsonify({"resultado": "ACEITO", "job_id": job_id, "detalhe": f"Job {job_id} na fila"})
+
+# Pré-preparo: a central envia o pacote antes da missão com o prazo "preparar até";
+# o agente baixa e verifica em segundo plano e o disparo seguinte usa o pacote pronto
+@app.route('/cigs/preparar', methods=['POST'])
+def preparar():
+    d = request.json
+    sist = d.get('sistema', 'AC')
+    if not d.get('url') or not d.get('arquivo'):
+        return jsonify({"resultado": "ERRO", "detalhe": "url e arquivo são obrigatórios"}), 400
+    try:
+        job_id = enfileirar_preparo(d['url'], d['arquivo'], sist, preparar_ate=d.get('preparar_ate'),
+                                    sha256=d.get('sha256'), tamanho=d.get('tamanho'), politica=d.get('politica'))
+    except ValueError:
+        return jsonify({"resultado": "ERRO", "detalhe": "preparar_ate deve estar no formato DD/MM/AAAA HH:MM"}), 400
+    return jsonify({"resultado": "ACEITO", "job_id": job_id, "detalhe": f"Pré-preparo {job_id} na fila"})
+
+# Consulta de um job assíncrono (estado, etapa, progresso e detalhe)
+@app.route('/cigs/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    job = obter_job(job_id)
+    if not job:
+        return jsonify({"erro": "Job não encontrado"}), 404
+    return jsonify(job)
+
+# Lista os jobs mais recentes
+@app.route('/cigs/jobs', methods=['GET'])
+def jobs_lista():
+    limite = request.args.get('limite', '50')
+    return jsonify({"fila": tamanho_fila(), "jobs": listar_jobs(int(limite) if limite.isdigit() else 50)})
 
-    # Retorna o resultado da execução para a central
-    return jsonify({"resultado": "SUCESSO" if s else "ERRO", "detalhe": m})
+# Tarefas e launchers criados pelo agente (consulta ao registro, sem schtasks /query)
+# Filtros opcionais: 'sistema' e 'job'
+@app.route('/cigs/tasks', methods=['GET'])
+def tarefas():
+    return jsonify({"tarefas": listar_tarefas(sistema=request.args.get('sistema'), job_id=request.args.get('job'))})
+
+# Agenda interna do agente (AGENDADOR_MODO = "INTERNO"): missões agendadas e histórico
+# 'pendentes=1' lista só as que ainda não foram disparadas
+@app.route('/cigs/agenda', methods=['GET'])
+def agenda():
+    pendentes = request.args.get('pendentes', '0') == '1'
+    return jsonify({"agenda": listar_agenda(pendentes=pendentes)})
 
 # Rota responsável por checar o banco de dados
 @app.route('/cigs/check_db', methods=['POST'])
+@rota_pesada
 def check_db():
     # Executa verificação do banco para o sistema informado
     return jsonify(executar_check_banco(request.json.get('sistema', 'AC')))
@@ -123,11 +338,50 @@ def relatorio():
     data = request.args.get('data') # YYYYMMDD
     return jsonify(analisar_relatorio_deploy(sis, data))
 
+# Trecho do log a partir de um offset (visualizador ao vivo da central)
+# arquivo=debug|execucao, offset=<bytes> (vazio = cauda), max=<bytes>, sistema=<TAG>, assinatura=<da chamada anterior>
+@app.route('/cigs/logs', methods=['GET'])
+def logs():
+    arquivo = request.args.get('arquivo', 'debug')
+    if arquivo not in ARQUIVOS_LOG:
+        return jsonify({"erro": f"arquivo deve ser um de {sorted(ARQUIVOS_LOG)}"}), 400
+    try:
+        offset = int(request.args['offset']) if request.args.get('offset') else None
+        max_bytes = int(request.args.get('max', LOGS_TRECHO_MAX_BYTES))
+    except ValueError:
+        return jsonify({"erro": "offset e max devem ser inteiros"}), 400
+    if offset is not None and offset < 0:
+        return jsonify({"erro": "offset não pode ser negativo"}), 400
+    return jsonify(ler_trecho(arquivo, offset, max_bytes, sistema=request.args.get('sistema'),
+                              assinatura=request.args.get('assinatura')))
+
+# Download compactado (gzip) das linhas de um período: de=AAAA-MM-DD&ate=AAAA-MM-DD
+# 'arquivos=debug,execucao' escolhe os logs e 'sistema' filtra a TAG do CIGS_debug.log
+@app.route('/cigs/logs/lote', methods=['GET'])
+def logs_lote():
+    try:
+        de = datetime.strptime(request.args.get('de', ''), "%Y-%m-%d").date()
+        ate = datetime.strptime(request.args.get('ate') or request.args.get('de', ''), "%Y-%m-%d").date()
+    except ValueError:
+        return jsonify({"erro": "de/ate devem estar no formato AAAA-MM-DD"}), 400
+    if ate < de or (ate - de).days >= LOGS_LOTE_MAX_DIAS:
+        return jsonify({"erro": f"Período inválido (máximo {LOGS_LOTE_MAX_DIAS} dias)"}), 400
+    arquivos = [a for a in request.args.get('arquivos', 'debug,execucao').split(',') if a]
+    if not arquivos or any(a not in ARQUIVOS_LOG for a in arquivos):
+        return jsonify({"erro": f"arquivos deve conter só {sorted(ARQUIVOS_LOG)}"}), 400
+    nome = f"CIGS_logs_{de.isoformat()}_{ate.isoformat()}.log.gz"
+    return Response(gerar_lote_gzip(de.isoformat(), ate.isoformat(), arquivos, request.args.get('sistema')),
+                    mimetype="application/gzip",
+                    headers={"Content-Disposition": f'attachment; filename="{nome}"'})
+
 # Rota para abortar uma tarefa em execução
+# Corpo opcional {"sistema": "AC"} ou {"job_id": "..."}: sem filtro cancela todas as tarefas registradas
 @app.route('/cigs/abortar', methods=['POST'])
 def abortar():
-    # Cancela tarefa ativa
-    res = cancelar_missao()
+    d = request.get_json(silent=True) or {}
+
+    # Cancela as tarefas registradas pelo agente
+    res = cancelar_missao(sistema=d.get('sistema'), job_id=d.get('job_id'))
 
     # Retorna para a central que a missão foi abortada
     return jsonify({"resultado": "ABORTADO", "detalhe": res})
@@ -145,12 +399,42 @@ def api_limpar_logs():
     return jsonify({"resultado": "SUCESSO" if suc else "ERRO", "detalhe": msg})
 
 # Função que inicia o servidor Flask
-def iniciar_servidor():
+def iniciar_servidor(modo=None, threads=None, threads_pesadas=None):
+    """
+    modo: "PRODUCAO" (pool de threads, keep-alive e timeouts) ou "DEV" (app.run do Flask).
+    threads / threads_pesadas: sobrescrevem SERVIDOR_THREADS / SERVIDOR_THREADS_PESADAS.
+    """
+    modo = (modo or SERVIDOR_MODO).upper()
+
     # Registra uma mensagem de log indicando inicialização
-    log_debug(f">>> CIGS AGENTE {VERSAO_AGENTE} INICIANDO NA PORTA {PORTA} <<<")
+    log_debug(f">>> CIGS AGENTE {VERSAO_AGENTE} INICIANDO NA PORTA {PORTA} (MODO {modo}) <<<")
 
     # Ajusta permissões do ambiente antes de iniciar o servidor
     ajustar_permissoes()
 
-    # Roda o servidor Flask acessível em qualquer IP local
-    app.run(host='0.0.0.0', port=PORTA)
+    # Calcula (ou reaproveita do cache em disco) o manifesto de build
+    carregar_manifesto(revalidar=True)
+
+    # Recupera o histórico de jobs das execuções anteriores
+    carregar_jobs()
+
+    # CPU, RAM, volumes e I/O amostrados em segundo plano (o /status só lê o buffer)
+    iniciar_amostragem()
+
+    # Pré-preparos interrompidos continuam (o download retoma do checkpoint)
+    retomar_preparos()
+
+    # Agenda interna: recarrega as missões e aplica a tolerância às que perderam o horário
+    iniciar_agendador()
+
+    # Canal persistente com o hub da central (só com CANAL_HUB configurado)
+    iniciar_canal(app, resumo_status_canal, inicio=_inicio_agente)
+
+    if threads_pesadas:
+        configurar_vagas_pesadas(threads_pesadas)
+
+    if modo == "DEV":
+        # Servidor de desenvolvimento do Flask acessível em qualquer IP local
+        app.run(host='0.0.0.0', port=PORTA)
+    else:
+        servir_producao(app, '0.0.0.0', PORTA, threads or SERVIDOR_THREADS)
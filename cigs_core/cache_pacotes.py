@@ -0,0 +1,197 @@
+# Importa módulos padrão para arquivos, JSON, tempo e concorrência
+import os
+import json
+import time
+import shutil
+import threading
+
+# Importa configurações do cache (pasta e limite de disco)
+from .config import PASTA_CACHE, CACHE_LIMITE_BYTES
+
+# Importa funções do motor de download (chave sem assinatura, hash e identidade remota)
+from .download import url_sem_assinatura, sha256_arquivo, consultar_etag
+
+# Importa o log do agente
+from .utils import log_debug
+
+# Índice do cache: pacotes por hash de conteúdo e URL (sem assinatura) -> hash
+ARQUIVO_INDICE_CACHE = os.path.join(PASTA_CACHE, "indice.json")
+
+_indice = None
+_lock = threading.Lock()
+
+
+def _carregar():
+    try:
+        with open(ARQUIVO_INDICE_CACHE, 'r', encoding='utf-8') as f:
+            dados = json.load(f)
+        if "pacotes" in dados and "urls" in dados:
+            return dados
+    except:
+        pass
+    return {"pacotes": {}, "urls": {}}
+
+
+def _salvar():
+    try:
+        if not os.path.exists(PASTA_CACHE):
+            os.makedirs(PASTA_CACHE)
+        with open(ARQUIVO_INDICE_CACHE + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump(_indice, f)
+        os.replace(ARQUIVO_INDICE_CACHE + ".tmp", ARQUIVO_INDICE_CACHE)
+    except Exception as e:
+        log_debug(f"Aviso: falha ao gravar índice do cache: {e}")
+
+
+def _obter_indice():
+    global _indice
+    if _indice is None:
+        _indice = _carregar()
+    return _indice
+
+
+def _remover(sha):
+    """Tira o pacote do índice e do disco (chamar com _lock)."""
+    pacote = _indice["pacotes"].pop(sha, None)
+    for url, valor in list(_indice["urls"].items()):
+        if valor == sha:
+            del _indice["urls"][url]
+    if pacote:
+        try:
+            os.remove(os.path.join(PASTA_CACHE, pacote["arquivo"]))
+        except OSError:
+            pass
+
+
+def _valido(sha):
+    """Confere se o arquivo do pacote ainda existe com o tamanho registrado."""
+    pacote = _indice["pacotes"].get(sha)
+    if not pacote:
+        return None
+    caminho = os.path.join(PASTA_CACHE, pacote["arquivo"])
+    try:
+        if os.path.getsize(caminho) == pacote["tamanho"]:
+            return caminho
+    except OSError:
+        pass
+    _remover(sha)
+    return None
+
+
+def _liberar_espaco(manter):
+    """Remove os pacotes usados há mais tempo até o cache caber no limite."""
+    pacotes = _indice["pacotes"]
+    total = sum(p["tamanho"] for p in pacotes.values())
+    agora = time.time()
+    for sha, pacote in sorted(pacotes.items(), key=lambda item: item[1]["ultimo_uso"]):
+        if total <= CACHE_LIMITE_BYTES:
+            break
+        # Pacote pré-preparado para uma missão futura não sai antes do prazo
+        if sha == manter or pacote.get("fixado_ate", 0) > agora:
+            continue
+        total -= pacote["tamanho"]
+        log_debug(f"Cache: removendo {pacote['nome']} ({pacote['tamanho']} bytes, menos usado)")
+        _remover(sha)
+
+
+def buscar_pacote(url, sha256=None, tamanho=None):
+    """
+    Procura o pacote no cache antes de ir para a rede.
+    Com o SHA-256 da ordem a resposta é local; achado só pela URL, confirma
+    com a sonda (Range 0-0) que o ETag do servidor ainda é o mesmo.
+
+    Returns:
+        str | None: caminho do pacote no cache
+    """
+    chave = url_sem_assinatura(url)
+    with _lock:
+        _obter_indice()
+        if sha256:
+            sha = sha256.lower()
+        else:
+            sha = _indice["urls"].get(chave)
+        caminho = _valido(sha) if sha else None
+        if not caminho:
+            return None
+        pacote = _indice["pacotes"][sha]
+        if tamanho and int(tamanho) != pacote["tamanho"]:
+            return None
+        etag_cache = pacote.get("etag")
+
+    if not sha256 and etag_cache:
+        etag = consultar_etag(url)
+        # Sem resposta do servidor (link expirado, rede fora) vale o que está no cache
+        if etag and etag != etag_cache:
+            log_debug(f"Cache: {pacote['nome']} mudou no servidor (ETag), baixando de novo")
+            return None
+
+    with _lock:
+        if sha not in _indice["pacotes"]:
+            return None
+        _indice["pacotes"][sha]["ultimo_uso"] = time.time()
+        _indice["urls"][chave] = sha
+        _salvar()
+    return caminho
+
+
+def fixar_pacote(caminho, fixar_ate):
+    """Protege da limpeza, até o timestamp fixar_ate, um pacote que já está no cache."""
+    arquivo = os.path.basename(caminho)
+    with _lock:
+        _obter_indice()
+        for pacote in _indice["pacotes"].values():
+            if pacote["arquivo"] == arquivo:
+                pacote["fixado_ate"] = max(pacote.get("fixado_ate", 0), fixar_ate)
+                _salvar()
+                return True
+    return False
+
+
+def guardar_pacote(url, caminho, nome, sha256=None, etag=None, fixar_ate=None):
+    """
+    Move o pacote recém-baixado para o cache (nome = hash do conteúdo) e
+    aplica o limite de disco. Se não couber, o arquivo fica onde estava.
+    fixar_ate: timestamp até quando a limpeza do cache não remove o pacote.
+
+    Returns:
+        tuple: (caminho final do pacote, True se ficou no cache, SHA-256 do conteúdo)
+    """
+    sha = sha256.lower() if sha256 else None
+    try:
+        sha = sha or sha256_arquivo(caminho)
+        tamanho = os.path.getsize(caminho)
+        if tamanho > CACHE_LIMITE_BYTES:
+            return caminho, False, sha
+        arquivo = sha + os.path.splitext(nome)[1].lower()
+        destino = os.path.join(PASTA_CACHE, arquivo)
+
+        with _lock:
+            _obter_indice()
+            if not os.path.exists(PASTA_CACHE):
+                os.makedirs(PASTA_CACHE)
+            if os.path.exists(destino):
+                # Mesmo conteúdo já em cache (outra URL): descarta a cópia nova
+                os.remove(caminho)
+            else:
+                shutil.move(caminho, destino)
+            fixado = max(fixar_ate or 0, _indice["pacotes"].get(sha, {}).get("fixado_ate", 0))
+            _indice["pacotes"][sha] = {"arquivo": arquivo, "nome": nome, "tamanho": tamanho,
+                                       "etag": etag, "ultimo_uso": time.time(), "fixado_ate": fixado}
+            _indice["urls"][url_sem_assinatura(url)] = sha
+            _liberar_espaco(sha)
+            _salvar()
+        return destino, True, sha
+    except Exception as e:
+        log_debug(f"Aviso: pacote não foi para o cache: {e}")
+        return caminho, False, sha
+
+
+def identidade_pacote(caminho):
+    """SHA-256 e ETag registrados de um pacote do cache (None se não está no índice)."""
+    arquivo = os.path.basename(caminho)
+    with _lock:
+        _obter_indice()
+        for sha, pacote in _indice["pacotes"].items():
+            if pacote["arquivo"] == arquivo:
+                return {"sha256": sha, "etag": pacote.get("etag")}
+    return None
@@ -0,0 +1,250 @@
+# Importa módulos padrão para sockets, JSON, fila, tempo e concorrência
+import json
+import time
+import queue
+import socket
+import threading
+
+# Importa configurações do canal (endereço do hub, segredo, heartbeat e reconexão)
+from .config import (PORTA, VERSAO_AGENTE, CANAL_HUB, CANAL_TOKEN, CANAL_HEARTBEAT, CANAL_RECONEXAO_MAX,
+                     CANAL_FILA_EVENTOS)
+
+# Importa o log do agente
+from .utils import log_debug
+
+# Importa a fila de jobs (heartbeat e eventos de fim de job) e a última amostra de recursos
+from .jobs import tamanho_fila, ao_finalizar_job
+from .recursos import ultima_amostra, VOLUME_SISTEMA
+
+# ==========================================
+# CANAL PERSISTENTE AGENTE -> CENTRAL (HUB)
+# ==========================================
+# Com CANAL_HUB configurado o agente abre UMA conexão TCP de saída com o hub
+# da central e a mantém aberta. Mensagens em JSON, uma por linha:
+#   agente -> hub: ola, heartbeat, status (quando muda), job (fim de job), resposta
+#   hub -> agente: pong (a cada heartbeat), comando {id, metodo, rota, params, corpo}
+# Os comandos passam pelas rotas da própria API (app Flask em processo), com as
+# mesmas validações e limites das chamadas HTTP. A porta 5580 continua atendendo.
+
+# Eventos aguardando envio (guardados enquanto o canal está fora)
+_eventos = queue.Queue(maxsize=CANAL_FILA_EVENTOS)
+_estado = {"conectado": False, "hub": None, "desde": None, "conexoes": 0, "comandos": 0, "descartados": 0}
+_thread = None
+_sessao = None
+_parar = threading.Event()
+_lock = threading.Lock()
+
+
+def estado_canal():
+    """Situação do canal (conectado, hub, desde, conexões, comandos recebidos, eventos descartados)."""
+    with _lock:
+        return dict(_estado)
+
+
+def notificar(tipo, **dados):
+    """Enfileira um evento para o hub. Nunca bloqueia: com a fila cheia o evento mais antigo sai."""
+    if _thread is None:
+        return
+    mensagem = {"tipo": tipo, "ts": round(time.time(), 1), **dados}
+    while True:
+        try:
+            _eventos.put_nowait(mensagem)
+            return
+        except queue.Full:
+            try:
+                _eventos.get_nowait()
+                with _lock:
+                    _estado["descartados"] += 1
+            except queue.Empty:
+                pass
+
+
+def _job_finalizado(job):
+    notificar("job", job=job)
+
+
+class _Sessao:
+    """Uma conexão com o hub: escrita serializada por lock, leitura em thread própria."""
+
+    def __init__(self, sock, app):
+        self.sock = sock
+        self.app = app
+        self.arquivo = sock.makefile('rb')
+        self.ativa = True
+        self.rtt_ms = None
+        self._lock_envio = threading.Lock()
+
+    def enviar(self, mensagem):
+        dados = (json.dumps(mensagem, ensure_ascii=False) + "\n").encode('utf-8')
+        with self._lock_envio:
+            self.sock.sendall(dados)
+
+    def ler(self):
+        # O hub responde todo heartbeat: sem nada em 3 intervalos o timeout do socket encerra a sessão
+        try:
+            for linha in self.arquivo:
+                mensagem = json.loads(linha)
+                tipo = mensagem.get("tipo")
+                if tipo == "pong" and mensagem.get("enviado") is not None:
+                    self.rtt_ms = round((time.monotonic() - mensagem["enviado"]) * 1000, 1)
+                elif tipo == "comando":
+                    threading.Thread(target=self._executar, args=(mensagem,), name="CIGS_Canal_Comando",
+                                     daemon=True).start()
+        except (OSError, ValueError):
+            pass
+        finally:
+            self.ativa = False
+
+    def _executar(self, comando):
+        with _lock:
+            _estado["comandos"] += 1
+        resposta = {"tipo": "resposta", "id": comando.get("id")}
+        rota = comando.get("rota") or ""
+        if not rota.startswith("/cigs/"):
+            resposta.update(codigo=404, erro=f"Rota inválida: {rota}")
+        else:
+            try:
+                r = self.app.test_client().open(rota, method=(comando.get("metodo") or "GET").upper(),
+                                                query_string=comando.get("params") or {}, json=comando.get("corpo"))
+                resposta["codigo"] = r.status_code
+                if r.is_json:
+                    resposta["corpo"] = r.get_json()
+                elif r.mimetype.startswith("text/"):
+                    resposta["texto"] = r.get_data(as_text=True)
+                else:
+                    resposta["erro"] = f"Resposta {r.mimetype} não trafega pelo canal (use HTTP)"
+            except Exception as e:
+                resposta.update(codigo=500, erro=f"{type(e).__name__}: {e}")
+        try:
+            self.enviar(resposta)
+        except OSError:
+            pass
+
+    def fechar(self):
+        self.ativa = False
+        try:
+            # shutdown acorda a thread de leitura (o makefile mantém o socket aberto no close)
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        try:
+            self.arquivo.close()
+            self.sock.close()
+        except OSError:
+            pass
+
+
+def _batimento(sessao, inicio):
+    amostra = ultima_amostra() or {}
+    return {"tipo": "heartbeat", "enviado": time.monotonic(), "uptime": int(time.time() - inicio),
+            "jobs_fila": tamanho_fila(), "cpu": amostra.get("cpu"), "ram": amostra.get("ram"),
+            "disk": (amostra.get("volumes") or {}).get(VOLUME_SISTEMA), "rtt_ms": sessao.rtt_ms}
+
+
+def _conversar(sessao, resumo_status, inicio):
+    sessao.enviar({"tipo": "ola", "agente": socket.gethostname(), "versao": VERSAO_AGENTE, "porta_api": PORTA,
+                   "heartbeat": CANAL_HEARTBEAT, "token": CANAL_TOKEN})
+    threading.Thread(target=sessao.ler, name="CIGS_Canal_Leitura", daemon=True).start()
+
+    status_anterior = None
+    proximo_batimento = 0
+    while sessao.ativa and not _parar.is_set():
+        agora = time.monotonic()
+        if agora >= proximo_batimento:
+            sessao.enviar(_batimento(sessao, inicio))
+            proximo_batimento = agora + CANAL_HEARTBEAT
+
+        # Status conferido a cada segundo (cache curto no agente): mudança vai na hora
+        status = resumo_status()
+        if status != status_anterior:
+            sessao.enviar({"tipo": "status", **status})
+            status_anterior = status
+
+        try:
+            evento = _eventos.get(timeout=min(1.0, max(proximo_batimento - time.monotonic(), 0.05)))
+        except queue.Empty:
+            continue
+        try:
+            sessao.enviar(evento)
+        except OSError:
+            # Volta para a fila e vai na próxima conexão
+            try:
+                _eventos.put_nowait(evento)
+            except queue.Full:
+                pass
+            raise
+
+
+def _loop_canal(app, resumo_status, inicio, hub):
+    global _sessao
+    host, _, porta = hub.rpartition(":")
+    espera = 1
+    falhou = False
+    while not _parar.is_set():
+        try:
+            sock = socket.create_connection((host, int(porta)), timeout=10)
+            sock.settimeout(CANAL_HEARTBEAT * 3)
+        except OSError as e:
+            if not falhou:
+                log_debug(f"Canal: hub {hub} inacessível ({e}); tentando de novo (a central segue com polling)")
+                falhou = True
+            _parar.wait(espera)
+            espera = min(espera * 2, CANAL_RECONEXAO_MAX)
+            continue
+
+        sessao = _Sessao(sock, app)
+        with _lock:
+            _sessao = sessao
+            _estado.update(conectado=True, hub=hub, desde=time.strftime("%Y-%m-%d %H:%M:%S"))
+            _estado["conexoes"] += 1
+        log_debug(f"Canal: conectado ao hub {hub}")
+        espera, falhou = 1, False
+        try:
+            _conversar(sessao, resumo_status, inicio)
+        except (OSError, ValueError) as e:
+            log_debug(f"Canal: conexão com o hub {hub} perdida ({e})")
+        finally:
+            sessao.fechar()
+            with _lock:
+                _sessao = None
+                _estado["conectado"] = False
+        _parar.wait(espera)
+
+
+def iniciar_canal(app, resumo_status, inicio=None, hub=None):
+    """
+    Abre o canal persistente com o hub (CANAL_HUB ou hub="host:porta").
+    resumo_status(): dict com o status básico; enviado ao hub sempre que mudar.
+    Sem hub configurado não faz nada (a central continua no polling).
+
+    Returns:
+        bool: True se o canal foi (ou já estava) iniciado
+    """
+    global _thread
+    hub = hub or CANAL_HUB
+    if not hub:
+        return False
+    with _lock:
+        if _thread is not None and _thread.is_alive():
+            return True
+        _parar.clear()
+        ao_finalizar_job(_job_finalizado)
+        _thread = threading.Thread(target=_loop_canal, args=(app, resumo_status, inicio or time.time(), hub),
+                                   name="CIGS_Canal", daemon=True)
+        _thread.start()
+    log_debug(f"Canal com a central habilitado: {hub} (heartbeat {CANAL_HEARTBEAT}s)")
+    return True
+
+
+def parar_canal(timeout=5):
+    """Fecha o canal e encerra a thread (desligamento do serviço e testes)."""
+    global _thread
+    _parar.set()
+    with _lock:
+        sessao, thread = _sessao, _thread
+    if sessao:
+        sessao.fechar()
+    if thread:
+        thread.join(timeout)
+    with _lock:
+        _thread = None
@@ -4,6 +4,22 @@ import os
 # Define a porta onde o agente CIGS irá rodar
 PORTA = 5580
 
+# ================================
+#      Servidor HTTP do Agente
+# ================================
+
+# Modo de serviço HTTP: "PRODUCAO" (pool de threads, keep-alive e timeouts) ou "DEV" (servidor de desenvolvimento do Flask)
+SERVIDOR_MODO = "PRODUCAO"
+
+# Quantidade de threads que atendem requisições no modo PRODUCAO
+SERVIDOR_THREADS = 16
+
+# Máximo de requisições pesadas simultâneas (ex: /check_db); o restante das threads fica livre para /status
+SERVIDOR_THREADS_PESADAS = 4
+
+# Timeout (s) de leitura do socket: conexões keep-alive ociosas ou clientes lentos são encerrados
+SERVIDOR_TIMEOUT_CONEXAO = 15
+
 # Define a versão atual do agente, usada para identificação e diagnóstico
 VERSAO_AGENTE = "v3.1 (Multi-System Fix)"
 
@@ -17,12 +33,186 @@ PASTA_BASE = r'C:\CIGS'
 # Diretório onde serão armazenados downloads realizados pelo agente
 PASTA_DOWNLOAD = os.path.join(PASTA_BASE, "Downloads")
 
+# ================================
+#      Download de Pacotes
+# ================================
+
+# Tamanho de cada bloco lido da rede/gravado em disco
+DOWNLOAD_CHUNK = 256 * 1024
+
+# Quantidade de conexões paralelas (segmentos) para arquivos grandes com suporte a Range
+DOWNLOAD_SEGMENTOS = 4
+
+# Tamanho mínimo do arquivo para usar download segmentado
+DOWNLOAD_SEGMENTAR_MIN = 64 * 1024 * 1024
+
+# Tentativas por segmento antes de desistir (cada tentativa retoma de onde parou)
+DOWNLOAD_TENTATIVAS = 5
+
+# Timeout (s) de conexão/leitura de cada requisição de download
+DOWNLOAD_TIMEOUT = 60
+
+# Cache local de pacotes (chave: URL sem assinatura e hash do conteúdo); re-disparos não baixam de novo
+PASTA_CACHE = os.path.join(PASTA_BASE, "Cache")
+
+# Espaço máximo em disco do cache; acima disso os pacotes usados há mais tempo são removidos
+CACHE_LIMITE_BYTES = 5 * 1024 * 1024 * 1024
+
+# ================================
+#      Política de Uso de Recursos
+# ================================
+
+# Limite de download (KB/s) por faixa de horário "HH:MM-HH:MM" (pode virar a meia-noite); vale a primeira faixa que contém a hora atual
+POLITICA_DOWNLOAD_HORARIOS = [
+    ("07:00-19:00", 2048),  # Horário comercial: 2 MB/s para não disputar o link do cliente
+]
+
+# Limite de download (KB/s) fora das faixas acima; 0 = sem limite
+POLITICA_DOWNLOAD_PADRAO_KBS = 0
+
+# Extração, cópia e verificação dos pacotes com prioridade baixa de CPU e disco
+POLITICA_INSTALACAO_BAIXA_PRIORIDADE = True
+
+# Operações pesadas simultâneas no agente (missão com download/instalação, pré-preparo, check_db)
+POLITICA_PESADAS_MAX = 2
+
+# ================================
+#      Pré-preparo de Pacotes
+# ================================
+
+# Pacotes enviados antes da missão (prazo "preparar até"): download em segundo plano
+PASTA_PREPARO = os.path.join(PASTA_DOWNLOAD, "Preparo")
+
+# Estado do pré-preparo por sistema (consultado no /status e retomado quando o agente reinicia)
+ARQUIVO_PREPARO = os.path.join(PASTA_BASE, "preparo.json")
+
+# Conexões do download em segundo plano (1 = não disputa o link com a operação)
+PREPARO_SEGMENTOS = 1
+
+# Horas após o prazo em que o pacote preparado fica protegido da limpeza do cache
+PREPARO_FIXAR_HORAS = 72
+
+# ================================
+#      Instalação de Pacotes
+# ================================
+
+# Pastas Atualizadores\<SISTEMA>* copiadas ao mesmo tempo (limita a disputa de disco)
+INSTALACAO_PARALELO = 3
+
+# Threads de hash na montagem do manifesto do pacote e na verificação dos alvos
+VERIFICACAO_PARALELO = 4
+
+# Manifesto (arquivo, tamanho, SHA-256) do último pacote instalado por sistema
+PASTA_MANIFESTOS = os.path.join(PASTA_BASE, "Manifestos")
+
+# Estado de cada pasta alvo (tamanho, mtime e hash por arquivo): a próxima instalação copia só o que mudou
+PASTA_ESTADO_ALVOS = os.path.join(PASTA_BASE, "Estado_Alvos")
+
+# Diretório onde ficam os jobs assíncronos (/cigs/executar), um JSON por job
+PASTA_JOBS = os.path.join(PASTA_BASE, "Jobs")
+
+# Quantidade de jobs finalizados mantidos no disco
+JOBS_RETENCAO = 200
+
+# Agendamento das missões: "SCHTASKS" (Agendador do Windows) ou "INTERNO" (agenda do próprio agente, sem processos externos)
+AGENDADOR_MODO = "SCHTASKS"
+
+# Agenda interna (missões agendadas, disparadas e canceladas), sobrevive ao reinício do agente
+ARQUIVO_AGENDA = os.path.join(PASTA_BASE, "agenda.json")
+
+# Minutos de atraso tolerados para disparar uma missão que perdeu o horário (agente parado); acima disso vira PERDIDA
+AGENDADOR_TOLERANCIA_MIN = 120
+
+# Quantidade de entradas finalizadas (executadas, canceladas, perdidas) mantidas na agenda
+AGENDADOR_RETENCAO = 100
+
+# Registro das tarefas e launchers criados pelo agente (o abortar e o /cigs/tasks consultam só este registro)
+ARQUIVO_REGISTRO_TAREFAS = os.path.join(PASTA_BASE, "tarefas.json")
+
 # Caminho completo do arquivo de log de debug
 ARQUIVO_LOG_DEBUG = os.path.join(PASTA_BASE, "CIGS_debug.log")
 
+# Rotação do log de debug: "TAMANHO" (CIGS_debug.log.1, .2 ...) ou "DIARIA" (CIGS_debug.log.AAAA-MM-DD)
+LOG_ROTACAO = "TAMANHO"
+
+# Tamanho máximo do log antes de rotacionar (modo TAMANHO)
+LOG_MAX_BYTES = 10 * 1024 * 1024
+
+# Quantidade de arquivos rotacionados mantidos
+LOG_RETENCAO = 5
+
+# O escritor em segundo plano grava em lote a cada N linhas ou N segundos
+LOG_FLUSH_LINHAS = 200
+LOG_FLUSH_SEGUNDOS = 1.0
+
+# Limite de linhas pendentes na fila (acima disso as linhas são descartadas, nunca bloqueia)
+LOG_FILA_MAX = 10000
+
+# Saída dos launchers das missões (gravada pelo .bat via redirecionamento)
+ARQUIVO_LOG_EXECUCAO = os.path.join(PASTA_BASE, "execucao.log")
+
+# Máximo de bytes devolvidos por chamada do /cigs/logs (a central pede o resto a partir do novo offset)
+LOGS_TRECHO_MAX_BYTES = 256 * 1024
+
+# Maior período (dias) aceito no download compactado do /cigs/logs/lote
+LOGS_LOTE_MAX_DIAS = 31
+
+# Nível de compressão gzip do /cigs/logs/lote (1 = mais rápido, 9 = menor)
+LOGS_GZIP_NIVEL = 6
+
+# Índice incremental do /cigs/relatorio (offset já processado + contadores por sistema/data)
+ARQUIVO_INDICE_RELATORIO = os.path.join(PASTA_BASE, "CIGS_relatorio_idx.json")
+
+# Permissão aplicada pelo icacls na pasta base (herdada por pastas e arquivos criados depois)
+PERMISSOES_REGRA = "Todos:(OI)(CI)F"
+
+# Registro de quando/onde a permissão foi aplicada; as missões só reaplicam em pastas novas ou se houver divergência
+ARQUIVO_ESTADO_PERMISSOES = os.path.join(PASTA_BASE, "permissoes.json")
+
 # Caminho do executável UnRAR usado para extrair arquivos .rar
 UNRAR_PATH = os.path.join(PASTA_BASE, "UnRAR.exe")
 
+# Cache em disco do manifesto de build do agente (hash SHA-256 por arquivo)
+ARQUIVO_MANIFESTO = os.path.join(PASTA_BASE, "CIGS_manifest.json")
+
+# Extensões consideradas parte do build quando o agente roda fora de uma pasta .dist
+EXTENSOES_BUILD = (".exe", ".dll", ".pyd")
+
+# ================================
+#      Amostragem de Recursos
+# ================================
+
+# Intervalo (s) entre amostras de CPU, RAM, espaço livre dos volumes e I/O de disco (thread em segundo plano)
+RECURSOS_INTERVALO = 5
+
+# Amostras mantidas em memória para o /cigs/metrics/history (720 x 5 s = 1 hora)
+RECURSOS_HISTORICO = 720
+
+# Janelas (s) das médias devolvidas junto com a última amostra no /status
+RECURSOS_JANELAS_MEDIA = (60, 300)
+
+# Validade (s) do status básico em cache (clientes/referência do config.ini); o /cigs/ping nunca lê disco
+STATUS_CACHE_SEGUNDOS = 5
+
+# ================================
+#   Canal Persistente com a Central
+# ================================
+
+# Hub da central ("host:porta", ex: "10.0.0.5:5582"); vazio = canal desligado e a central faz polling
+CANAL_HUB = ""
+
+# Segredo compartilhado com o hub (enviado na apresentação; vazio = sem autenticação)
+CANAL_TOKEN = ""
+
+# Intervalo (s) dos heartbeats; sem resposta do hub em 3 intervalos a conexão é refeita
+CANAL_HEARTBEAT = 15
+
+# Espera máxima (s) entre tentativas de reconexão (dobra a cada falha até este limite)
+CANAL_RECONEXAO_MAX = 60
+
+# Eventos guardados enquanto o canal está fora (os mais antigos são descartados)
+CANAL_FILA_EVENTOS = 500
+
 # ======================================
 #   Detecção Automática do Firebird
 # ======================================
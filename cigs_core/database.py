@@ -4,9 +4,18 @@ import os
 # Importa subprocess, usado para executar comandos externos (como o isql)
 import subprocess
 
+# Importa time para medir a duração do isql
+import time
+
 # Importa variáveis definidas no config
 from .config import MAPA_RAIZ, PASTA_BASE, ISQL_PATH
 
+# Importa o cache do config.ini (DatabaseName já parseado)
+from .ini_cache import ler_config_sistema
+
+# Importa o histograma de duração do isql
+from .metricas import observar
+
 # Script SQL que será executado no Firebird para avaliar integridade básica do banco
 SCRIPT_SQL_CHECK = """
 SET NAMES WIN1252;
@@ -28,32 +37,8 @@ def executar_check_banco(sistema):
     if not path_base:
         return {"status": "ERRO", "log": "Sistema desconhecido"}
     
-    # Caminho do arquivo do banco (a ser detectado)
-    banco_path = ""
-
-    try:
-        # Primeiro tenta localizar o arquivo config.ini dentro da raiz do sistema
-        ini = os.path.join(path_base, "config.ini")
-
-        # Caso o config.ini não esteja na raiz, tenta em "Config/config.ini"
-        if not os.path.exists(ini):
-            ini = os.path.join(path_base, "Config", "config.ini")
-
-        # Se o arquivo de configuração foi encontrado
-        if os.path.exists(ini):
-            # Abre o arquivo INI com encoding latin-1
-            with open(ini, 'r', encoding='latin-1') as f:
-                # Percorre cada linha em busca da linha que contém o caminho do banco
-                for l in f:
-                    if "DatabaseName=" in l:
-                        # Pega parte depois do sinal de igual
-                        parts = l.split("=")[1].strip().split(":")
-                        # Caso tenha formato "servidor:caminho", usa a última parte
-                        banco_path = parts[-1] if len(parts) > 1 else parts[0]
-                        break
-    except:
-        # Ignora falhas opcionais na leitura do arquivo
-        pass
+    # Caminho do banco lido do config.ini (parse em cache, refeito só quando o arquivo muda)
+    banco_path = ler_config_sistema(sistema)["database_name"]
 
     # Se o banco não foi encontrado via config.ini,
     # tenta o caminho padrão: ...\DADOS\AC.FDB , por exemplo
@@ -79,16 +64,22 @@ def executar_check_banco(sistema):
         cmd = f'{cmd_isql} -user SYSDBA -password masterkey -i "{arquivo_sql}" "{banco_path}"'
 
         # Executa o comando com timeout de 60s e captura toda a saída
-        res = subprocess.run(
-            cmd,
-            shell=True,
-            capture_output=True,
-            text=True,
-            timeout=60
-        )
+        inicio = time.monotonic()
+        try:
+            res = subprocess.run(
+                cmd,
+                shell=True,
+                capture_output=True,
+                text=True,
+                timeout=60
+            )
+        except subprocess.TimeoutExpired:
+            observar("cigs_isql_duracao_segundos", time.monotonic() - inicio, sistema=sistema.upper(), status="TIMEOUT")
+            raise
         
         # Se a saída contiver "OK" e não contiver "PROBLEMAS", considera status OK
         status = "OK" if "OK" in res.stdout and "PROBLEMAS" not in res.stdout else "ALERTA"
+        observar("cigs_isql_duracao_segundos", time.monotonic() - inicio, sistema=sistema.upper(), status=status)
 
         # Retorna o status e todo o log retornado pelo isql
         return {"status": status, "log": res.stdout}
@@ -0,0 +1,237 @@
+# Importa módulos padrão para arquivos, JSON, zip, hashing e estruturas binárias
+import os
+import sys
+import json
+import shutil
+import struct
+import hashlib
+import zipfile
+
+# Hash de arquivo em blocos (mesmo usado no download e na instalação)
+from .download import sha256_arquivo
+
+# Importa o log do agente
+from .utils import log_debug
+
+# ==========================================
+# FORMATO DO PACOTE DELTA (.cigsdelta)
+# ==========================================
+# Zip com:
+#   delta.json          base (impressão digital do manifesto da versão base),
+#                       manifesto completo da versão nova, removidos e operações
+#   arquivos/<rel>      arquivo novo/alterado inteiro
+#   patches/<rel>       patch por blocos contra o arquivo da base
+#
+# Patch por blocos: cabeçalho CIGSPATCH1 + tamanho do bloco e depois operações
+#   b"C" + offset(8) + tamanho(4)  -> copia trecho do arquivo da base
+#   b"L" + tamanho(4) + dados      -> dados literais
+FORMATO_DELTA = 1
+CABECALHO_PATCH = b"CIGSPATCH1"
+BLOCO_PATCH = 64 * 1024
+
+# Patch só compensa se ficar menor que esta fração do arquivo inteiro
+PROPORCAO_MAX_PATCH = 0.7
+
+
+def _rel_padrao(rel):
+    # Caminhos do pacote sempre com "/" (o pacote pode ser gerado em outro SO)
+    return rel.replace("\\", "/")
+
+
+def impressao_manifesto(manifesto):
+    """Identidade de uma versão: SHA-256 das linhas 'caminho:sha256' ordenadas."""
+    linhas = sorted(f"{_rel_padrao(rel)}:{sha}\n" for rel, _, sha in manifesto)
+    return hashlib.sha256("".join(linhas).encode("utf-8")).hexdigest()
+
+
+def _manifesto_pasta(pasta):
+    manifesto = []
+    for raiz, _, arquivos in os.walk(pasta):
+        for nome in arquivos:
+            caminho = os.path.join(raiz, nome)
+            rel = _rel_padrao(os.path.relpath(caminho, pasta))
+            manifesto.append((rel, os.path.getsize(caminho), sha256_arquivo(caminho)))
+    return manifesto
+
+
+# ==========================================
+# GERAÇÃO (build / central)
+# ==========================================
+def gerar_patch(caminho_base, caminho_novo, bloco=BLOCO_PATCH):
+    """
+    Patch por blocos alinhados: cada bloco do arquivo novo que existe em
+    qualquer posição alinhada da base vira uma cópia; o resto vai literal.
+    """
+    blocos_base = {}
+    with open(caminho_base, 'rb') as f:
+        offset = 0
+        for dados in iter(lambda: f.read(bloco), b''):
+            blocos_base.setdefault(hashlib.sha1(dados).digest(), (offset, len(dados)))
+            offset += len(dados)
+
+    saida = [CABECALHO_PATCH, struct.pack("<I", bloco)]
+    copia = None  # (offset, tamanho) acumulado de cópias contíguas
+    with open(caminho_novo, 'rb') as f:
+        for dados in iter(lambda: f.read(bloco), b''):
+            achado = blocos_base.get(hashlib.sha1(dados).digest())
+            if achado and achado[1] == len(dados):
+                if copia and copia[0] + copia[1] == achado[0]:
+                    copia = (copia[0], copia[1] + len(dados))
+                    continue
+                if copia:
+                    saida.append(b"C" + struct.pack("<QI", *copia))
+                copia = achado
+                continue
+            if copia:
+                saida.append(b"C" + struct.pack("<QI", *copia))
+                copia = None
+            saida.append(b"L" + struct.pack("<I", len(dados)) + dados)
+    if copia:
+        saida.append(b"C" + struct.pack("<QI", *copia))
+    return b"".join(saida)
+
+
+def aplicar_patch(caminho_base, patch, destino):
+    """Reconstrói o arquivo novo a partir do arquivo da base e do patch."""
+    if not patch.startswith(CABECALHO_PATCH):
+        raise ValueError("Patch inválido")
+    pos = len(CABECALHO_PATCH) + 4
+    with open(caminho_base, 'rb') as base, open(destino, 'wb') as saida:
+        while pos < len(patch):
+            op = patch[pos:pos + 1]
+            if op == b"C":
+                offset, tamanho = struct.unpack_from("<QI", patch, pos + 1)
+                pos += 13
+                base.seek(offset)
+                dados = base.read(tamanho)
+                if len(dados) != tamanho:
+                    raise ValueError("Patch aponta para fora do arquivo base")
+                saida.write(dados)
+            elif op == b"L":
+                (tamanho,) = struct.unpack_from("<I", patch, pos + 1)
+                pos += 5
+                saida.write(patch[pos:pos + tamanho])
+                pos += tamanho
+            else:
+                raise ValueError("Operação de patch desconhecida")
+
+
+def gerar_delta(pasta_base, pasta_nova, destino):
+    """
+    Gera o pacote delta entre duas versões extraídas do pacote.
+
+    Returns:
+        dict: resumo (impressões digitais, arquivos alterados, bytes do delta)
+    """
+    base = {rel: (tam, sha) for rel, tam, sha in _manifesto_pasta(pasta_base)}
+    nova = _manifesto_pasta(pasta_nova)
+    operacoes = {}
+
+    with zipfile.ZipFile(destino, 'w', zipfile.ZIP_DEFLATED) as z:
+        for rel, tamanho, sha in nova:
+            anterior = base.get(rel)
+            if anterior and anterior[1] == sha:
+                continue
+            caminho_novo = os.path.join(pasta_nova, rel)
+            if anterior:
+                patch = gerar_patch(os.path.join(pasta_base, rel), caminho_novo)
+                if len(patch) < tamanho * PROPORCAO_MAX_PATCH:
+                    z.writestr(f"patches/{rel}", patch)
+                    operacoes[rel] = {"tipo": "PATCH", "base_sha256": anterior[1]}
+                    continue
+            z.write(caminho_novo, f"arquivos/{rel}")
+            operacoes[rel] = {"tipo": "ARQUIVO"}
+
+        nomes_novos = {rel for rel, _, _ in nova}
+        info = {
+            "formato": FORMATO_DELTA,
+            "base": impressao_manifesto([(r, t, s) for r, (t, s) in base.items()]),
+            "alvo": impressao_manifesto(nova),
+            "manifesto": nova,
+            "removidos": sorted(rel for rel in base if rel not in nomes_novos),
+            "operacoes": operacoes,
+        }
+        z.writestr("delta.json", json.dumps(info))
+
+    return {"base": info["base"], "alvo": info["alvo"], "alterados": len(operacoes),
+            "removidos": len(info["removidos"]), "bytes": os.path.getsize(destino)}
+
+
+# ==========================================
+# APLICAÇÃO (agente)
+# ==========================================
+def _ligar_ou_copiar(origem, destino):
+    # Hardlink no mesmo volume (sem gravar dados); se não der, copia
+    try:
+        os.link(origem, destino)
+    except OSError:
+        shutil.copy2(origem, destino)
+
+
+def _caminho_interno(raiz, rel):
+    # Caminho vindo do delta.json: nunca absoluto, com unidade ou "..", e sempre dentro da raiz
+    partes = _rel_padrao(rel).split("/")
+    if any(p in ("", ".", "..") or ":" in p for p in partes):
+        raise ValueError(f"Caminho inválido no delta: {rel}")
+    caminho = os.path.join(raiz, *partes)
+    if not os.path.realpath(caminho).startswith(os.path.realpath(raiz) + os.sep):
+        raise ValueError(f"Caminho inválido no delta: {rel}")
+    return caminho
+
+
+def reconstruir_por_delta(caminho_delta, manifesto_base, pasta_base, destino, sistema="GERAL"):
+    """
+    Monta em 'destino' a versão nova do pacote a partir da versão instalada
+    (pasta_base + manifesto_base, gravado na última instalação) e do delta.
+    Arquivos da base usados na reconstrução são conferidos pelo hash antes.
+    Caminhos fora de 'destino' (absolutos ou com "..") recusam o delta inteiro.
+
+    Returns:
+        tuple: (ok, mensagem, manifesto_novo) - o manifesto_novo deve conferir
+        com o pacote montado (a instalação verifica por hash)
+    """
+    try:
+        with zipfile.ZipFile(caminho_delta) as z:
+            info = json.loads(z.read("delta.json"))
+            if info.get("formato") != FORMATO_DELTA:
+                return False, "Formato de delta não suportado", None
+            if impressao_manifesto(manifesto_base) != info["base"]:
+                return False, "Versão instalada diferente da base do delta", None
+
+            hashes_base = {_rel_padrao(rel): sha for rel, _, sha in manifesto_base}
+            operacoes = info["operacoes"]
+
+            # Confere todos os caminhos antes de gravar qualquer arquivo
+            saidas = {rel: _caminho_interno(destino, rel) for rel, _, _ in info["manifesto"]}
+
+            def arquivo_base(rel):
+                caminho = _caminho_interno(pasta_base, rel)
+                if sha256_arquivo(caminho) != hashes_base.get(rel):
+                    raise ValueError(f"Arquivo da base alterado: {rel}")
+                return caminho
+
+            for rel, _, _ in info["manifesto"]:
+                saida = saidas[rel]
+                os.makedirs(os.path.dirname(saida), exist_ok=True)
+                op = operacoes.get(rel)
+                if op is None:
+                    _ligar_ou_copiar(arquivo_base(rel), saida)
+                elif op["tipo"] == "PATCH":
+                    aplicar_patch(arquivo_base(rel), z.read(f"patches/{rel}"), saida)
+                else:
+                    with z.open(f"arquivos/{rel}") as origem, open(saida, 'wb') as f:
+                        shutil.copyfileobj(origem, f, 1024 * 1024)
+
+        manifesto = [(os.path.join(*rel.split("/")), tam, sha) for rel, tam, sha in info["manifesto"]]
+        log_debug(f"Delta aplicado: {len(operacoes)} alterados, {len(info['removidos'])} removidos", sistema)
+        return True, "Pacote reconstruído pelo delta", manifesto
+    except (OSError, KeyError, ValueError, zipfile.BadZipFile) as e:
+        return False, f"Delta inválido: {e}", None
+
+
+if __name__ == "__main__":
+    # Uso no build: python -m cigs_core.delta <pasta_base> <pasta_nova> <saida.cigsdelta>
+    if len(sys.argv) != 4:
+        print("Uso: python -m cigs_core.delta <pasta_base> <pasta_nova> <saida.cigsdelta>")
+        sys.exit(1)
+    print(json.dumps(gerar_delta(sys.argv[1], sys.argv[2], sys.argv[3]), indent=2))
@@ -0,0 +1,348 @@
+# Importa módulos padrão para arquivos, JSON, hashing, tempo e threads
+import os
+import json
+import time
+import hashlib
+import threading
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
+
+# Biblioteca HTTP usada pelo agente
+import requests
+
+# Importa configurações do motor de download
+from .config import (DOWNLOAD_CHUNK, DOWNLOAD_SEGMENTOS, DOWNLOAD_SEGMENTAR_MIN,
+                     DOWNLOAD_TENTATIVAS, DOWNLOAD_TIMEOUT)
+
+# Importa o log do agente
+from .utils import log_debug
+
+# Limite de banda (faixas de horário do agente ou limite da ordem)
+from .politica import limitador_download
+
+# Métricas de bytes, duração e vazão dos downloads
+from .metricas import medir_download
+
+# Parâmetros de assinatura de links temporários (S3 presigned e similares)
+PARAMETROS_ASSINATURA = ("x-amz-", "signature", "expires", "awsaccesskeyid", "expiration", "policy", "key-pair-id")
+
+
+class ErroDownload(Exception):
+    """Falha definitiva de download (não adianta tentar de novo)."""
+
+
+class _RangeRecusado(Exception):
+    """Servidor respondeu 416 à retomada: o checkpoint não vale mais."""
+
+
+def url_sem_assinatura(url):
+    """
+    Remove da URL os parâmetros de assinatura/expiração. Dois links presigned
+    do mesmo objeto resultam na mesma chave (usada para retomar e para cache).
+    """
+    try:
+        partes = urlparse(url)
+        query = [(k, v) for k, v in parse_qsl(partes.query, keep_blank_values=True)
+                 if not k.lower().startswith(PARAMETROS_ASSINATURA)]
+        return urlunparse(partes._replace(query=urlencode(query), fragment=""))
+    except Exception:
+        return url
+
+
+def sha256_arquivo(caminho, chunk=1024 * 1024):
+    h = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(chunk), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def _sondar(sessao, url):
+    """
+    Descobre tamanho, suporte a Range e identidade (ETag) do arquivo.
+    Usa GET com Range 0-0 porque links presigned do S3 não aceitam HEAD.
+    """
+    r = sessao.get(url, headers={"Range": "bytes=0-0"}, stream=True, timeout=DOWNLOAD_TIMEOUT)
+    try:
+        if r.status_code == 206:
+            total = r.headers.get("Content-Range", "").split("/")[-1]
+            return (int(total) if total.isdigit() else None), True, r.headers.get("ETag") or r.headers.get("Last-Modified")
+        if r.status_code == 200:
+            tamanho = r.headers.get("Content-Length", "")
+            return (int(tamanho) if tamanho.isdigit() else None), False, r.headers.get("ETag") or r.headers.get("Last-Modified")
+        raise ErroDownload(f"HTTP Download {r.status_code}")
+    finally:
+        r.close()
+
+
+def consultar_etag(url):
+    """ETag/Last-Modified atual do arquivo no servidor (None se não responder)."""
+    try:
+        with requests.Session() as sessao:
+            return _sondar(sessao, url)[2]
+    except Exception:
+        return None
+
+
+class _Transferencia:
+    """Estado compartilhado entre os segmentos de um download."""
+
+    def __init__(self, caminho_part, total, progresso, limitador=None):
+        self.caminho_part = caminho_part
+        self.limitador = limitador
+        self.caminho_estado = caminho_part + ".json"
+        self.total = total
+        self.progresso = progresso
+        self.lock = threading.Lock()
+        self.baixados_sessao = 0
+        self.tentativas = 0
+        self.ultimo_aviso = 0.0
+        self.segmentos = []
+        self.identidade = {}
+
+    def baixados(self):
+        return sum(s[2] for s in self.segmentos)
+
+    def salvar_estado(self):
+        # Checkpoint para retomar os segmentos após queda ou reinício do agente
+        try:
+            with open(self.caminho_estado + ".tmp", 'w', encoding='utf-8') as f:
+                json.dump({**self.identidade, "total": self.total, "segmentos": self.segmentos}, f)
+            os.replace(self.caminho_estado + ".tmp", self.caminho_estado)
+        except OSError:
+            pass
+
+    def somar(self, seg, n):
+        with self.lock:
+            seg[2] += n
+            self.baixados_sessao += n
+            agora = time.monotonic()
+            if agora - self.ultimo_aviso >= 1.0:
+                self.ultimo_aviso = agora
+                self.salvar_estado()
+                if self.progresso:
+                    try:
+                        self.progresso(self.baixados(), self.total)
+                    except Exception:
+                        pass
+
+
+def _baixar_faixa(sessao, url, tr, seg, chunk, segmentado, cancelar=None):
+    """
+    Baixa um segmento [inicio, fim] (fim=None: até o final) gravando na posição
+    correta do arquivo .part. Em queda de conexão, retoma do último byte gravado.
+    cancelar: Event compartilhado; quando outro segmento falha, este para entre blocos.
+    """
+    inicio, fim = seg[0], seg[1]
+    tentativas = 0
+    while True:
+        if cancelar is not None and cancelar.is_set():
+            raise ErroDownload("Download cancelado")
+        pos = inicio + seg[2]
+        if fim is not None and pos > fim:
+            return
+        headers = {}
+        if pos > 0 or segmentado:
+            headers["Range"] = f"bytes={pos}-{'' if fim is None else fim}"
+        try:
+            with sessao.get(url, headers=headers, stream=True, timeout=DOWNLOAD_TIMEOUT) as r:
+                if r.status_code == 200 and pos > 0:
+                    # Servidor ignorou o Range: só dá para recomeçar do zero (download simples)
+                    if segmentado:
+                        raise ErroDownload("Servidor não respeitou o Range no download segmentado")
+                    with tr.lock:
+                        seg[2] = 0
+                    pos = 0
+                elif r.status_code == 416 and pos > 0:
+                    raise _RangeRecusado()
+                elif r.status_code not in (200, 206):
+                    if 400 <= r.status_code < 500 and r.status_code not in (408, 429):
+                        # Link expirado (403), inexistente (404)... não adianta insistir
+                        raise ErroDownload(f"HTTP Download {r.status_code}")
+                    raise requests.HTTPError(f"HTTP {r.status_code}")
+
+                with open(tr.caminho_part, 'r+b', buffering=0) as f:
+                    f.seek(pos)
+                    if pos == 0 and not segmentado:
+                        f.truncate()
+                    for bloco in r.iter_content(chunk):
+                        if cancelar is not None and cancelar.is_set():
+                            raise ErroDownload("Download cancelado")
+                        f.write(bloco)
+                        tr.somar(seg, len(bloco))
+                        if tr.limitador:
+                            tr.limitador.consumir(len(bloco))
+
+            if fim is None or inicio + seg[2] > fim:
+                return
+            # Resposta terminou antes do fim do segmento: tenta de novo a partir daqui
+            raise requests.ConnectionError("Resposta incompleta")
+
+        except (ErroDownload, _RangeRecusado):
+            raise
+        except (requests.RequestException, OSError) as e:
+            tentativas += 1
+            with tr.lock:
+                tr.tentativas += 1
+            if tentativas > DOWNLOAD_TENTATIVAS:
+                raise ErroDownload(f"Falha após {DOWNLOAD_TENTATIVAS} tentativas: {e}")
+            time.sleep(min(30, 2 ** tentativas))
+
+
+def _transferir(sessao, url, tr, segmentar, chunk):
+    """Executa os segmentos pendentes (em paralelo no modo segmentado)."""
+    if not segmentar:
+        _baixar_faixa(sessao, url, tr, tr.segmentos[0], chunk, False)
+        return
+
+    erros = []
+    cancelar = threading.Event()
+
+    def rodar(seg):
+        try:
+            _baixar_faixa(sessao, url, tr, seg, chunk, True, cancelar)
+        except Exception as e:
+            erros.append(e)
+            # Um segmento falhou de vez: os outros param no próximo bloco
+            cancelar.set()
+
+    threads = [threading.Thread(target=rodar, args=(seg,), daemon=True) for seg in tr.segmentos]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    if erros:
+        primeiro = erros[0]
+        if isinstance(primeiro, (ErroDownload, _RangeRecusado)):
+            raise primeiro
+        raise ErroDownload(str(primeiro))
+
+
+def _novo_download(tr, total, segmentar, segmentos):
+    """Divide em segmentos e recria o .part (pré-alocado no modo segmentado)."""
+    if segmentar:
+        passo = total // segmentos
+        tr.segmentos = [[i * passo, (total - 1) if i == segmentos - 1 else (i + 1) * passo - 1, 0]
+                        for i in range(segmentos)]
+    else:
+        tr.segmentos = [[0, None, 0]]
+    with open(tr.caminho_part, 'wb') as f:
+        if segmentar:
+            f.truncate(total)
+
+
+@medir_download
+def baixar_arquivo(url, destino, sha256=None, tamanho=None, segmentos=DOWNLOAD_SEGMENTOS,
+                   chunk=DOWNLOAD_CHUNK, progresso=None, sistema="GERAL", politica=None):
+    """
+    Baixa url para destino com retomada (HTTP Range a partir do .part),
+    segmentação paralela para arquivos grandes e verificação opcional de
+    tamanho e SHA-256.
+
+    progresso(baixados, total): chamado no máximo uma vez por segundo.
+    politica: override da ordem ({"download_kbs": ...}); sem ele vale o limite
+    por faixa de horário do agente (compartilhado entre os downloads).
+
+    Returns:
+        tuple: (ok, mensagem, estatisticas)
+    """
+    caminho_part = destino + ".part"
+    inicio_relogio = time.monotonic()
+    estat = {"bytes": 0, "retomado_de": 0, "segmentos": 1, "tentativas": 0, "segundos": 0, "mb_s": 0}
+
+    try:
+        with requests.Session() as sessao:
+            total, aceita_range, etag = _sondar(sessao, url)
+            if tamanho and total and int(tamanho) != total:
+                return False, f"Tamanho divergente: esperado {tamanho}, servidor {total}", estat
+
+            tr = _Transferencia(caminho_part, total, progresso, limitador_download(politica))
+            tr.identidade = {"url": url_sem_assinatura(url), "etag": etag}
+            estat["etag"] = etag
+
+            # Checkpoint anterior só vale para o mesmo arquivo (mesma URL base, ETag e tamanho)
+            anterior = None
+            if os.path.exists(caminho_part) and os.path.exists(tr.caminho_estado):
+                try:
+                    with open(tr.caminho_estado, 'r', encoding='utf-8') as f:
+                        anterior = json.load(f)
+                except Exception:
+                    anterior = None
+                if not anterior or anterior.get("url") != tr.identidade["url"] or \
+                        anterior.get("etag") != etag or anterior.get("total") != total:
+                    anterior = None
+
+            segmentar = aceita_range and total and total >= DOWNLOAD_SEGMENTAR_MIN and segmentos > 1
+            retomar = bool(anterior and aceita_range)
+
+            if retomar:
+                tr.segmentos = anterior["segmentos"]
+                segmentar = len(tr.segmentos) > 1
+                if not segmentar:
+                    # Download simples: tudo o que já está no .part é válido
+                    tr.segmentos[0][2] = min(os.path.getsize(caminho_part), total or float("inf"))
+            else:
+                _novo_download(tr, total, segmentar, segmentos)
+
+            estat["retomado_de"] = tr.baixados()
+            estat["segmentos"] = len(tr.segmentos)
+            tr.salvar_estado()
+
+            if retomar and total and tr.baixados() >= total:
+                # .part já completo (agente caiu antes de renomear): vai direto para a verificação
+                log_debug("Download já completo no .part, verificando", sistema)
+            else:
+                if estat["retomado_de"]:
+                    log_debug(f"Retomando download a partir de {estat['retomado_de']} bytes", sistema)
+                try:
+                    _transferir(sessao, url, tr, segmentar, chunk)
+                except _RangeRecusado:
+                    # 416 na retomada: descarta o checkpoint e recomeça do zero
+                    log_debug("Servidor recusou a retomada (HTTP 416), reiniciando download", sistema)
+                    segmentar = aceita_range and total and total >= DOWNLOAD_SEGMENTAR_MIN and segmentos > 1
+                    _novo_download(tr, total, segmentar, segmentos)
+                    estat["retomado_de"] = 0
+                    estat["segmentos"] = len(tr.segmentos)
+                    tr.salvar_estado()
+                    try:
+                        _transferir(sessao, url, tr, segmentar, chunk)
+                    except _RangeRecusado:
+                        raise ErroDownload("HTTP Download 416")
+
+            tr.salvar_estado()
+            estat["bytes"] = tr.baixados_sessao
+            estat["tentativas"] = tr.tentativas
+
+    except ErroDownload as e:
+        return False, str(e), estat
+    except Exception as e:
+        return False, f"Erro Download: {e}", estat
+
+    # ---- Verificação antes de liberar o arquivo para extração ----
+    tamanho_final = os.path.getsize(caminho_part)
+    esperado = int(tamanho) if tamanho else total
+    if esperado and tamanho_final != esperado:
+        return False, f"Download incompleto: {tamanho_final} de {esperado} bytes", estat
+
+    if sha256:
+        obtido = sha256_arquivo(caminho_part)
+        if obtido.lower() != sha256.lower():
+            # Conteúdo corrompido: descarta para a próxima tentativa começar limpa
+            for p in (caminho_part, caminho_part + ".json"):
+                try:
+                    os.remove(p)
+                except OSError:
+                    pass
+            return False, f"SHA-256 divergente (obtido {obtido[:12]}...)", estat
+        estat["sha256"] = obtido
+
+    os.replace(caminho_part, destino)
+    try:
+        os.remove(caminho_part + ".json")
+    except OSError:
+        pass
+
+    estat["segundos"] = round(time.monotonic() - inicio_relogio, 2)
+    if estat["segundos"] > 0:
+        estat["mb_s"] = round(estat["bytes"] / (1024 * 1024) / estat["segundos"], 2)
+    estat["tamanho"] = tamanho_final
+    return True, "Download concluído", estat
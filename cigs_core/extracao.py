@@ -0,0 +1,239 @@
+# Importa módulos padrão para arquivos, processos, hashing, tempo e formatos de pacote
+import os
+import time
+import hashlib
+import tarfile
+import zipfile
+import subprocess
+
+# Biblioteca HTTP usada pelo agente
+import requests
+
+# Importa configurações (UnRAR e parâmetros de download)
+from .config import UNRAR_PATH, DOWNLOAD_CHUNK, DOWNLOAD_TIMEOUT
+
+# Importa o log do agente e o modo de prioridade da thread
+from .utils import log_debug, em_prioridade_baixa
+
+# Limite de banda (faixas de horário do agente ou limite da ordem)
+from .politica import limitador_download
+
+# Métricas de download e duração da extração
+from .metricas import medir_download, observar
+
+# Formatos opcionais: só ficam disponíveis se a biblioteca estiver no build
+try:
+    import zstandard
+    HAS_ZSTD = True
+except ImportError:
+    HAS_ZSTD = False
+
+try:
+    import py7zr
+    HAS_7Z = True
+except ImportError:
+    HAS_7Z = False
+
+# Formatos de tar que podem ser extraídos enquanto o download acontece
+FORMATOS_STREAM = ("TAR", "TAR_GZ", "TAR_ZST")
+
+
+def formato_pacote(nome):
+    """Formato do pacote pela extensão (desconhecido = RAR, como sempre foi)."""
+    nome = nome.lower()
+    if nome.endswith(".zip"):
+        return "ZIP"
+    if nome.endswith((".tar.gz", ".tgz")):
+        return "TAR_GZ"
+    if nome.endswith((".tar.zst", ".tzst")):
+        return "TAR_ZST"
+    if nome.endswith(".tar"):
+        return "TAR"
+    if nome.endswith(".7z"):
+        return "7Z"
+    return "RAR"
+
+
+def _extrair_tar(tar, destino):
+    # Filtro "data" bloqueia caminhos absolutos, "..", links para fora e arquivos especiais
+    try:
+        tar.extractall(destino, filter="data")
+    except TypeError:
+        # Python sem suporte a filtros: confere os caminhos manualmente
+        base = os.path.realpath(destino)
+        for membro in tar:
+            alvo = os.path.realpath(os.path.join(destino, membro.name))
+            if not alvo.startswith(base + os.sep) or membro.issym() or membro.islnk():
+                raise ValueError(f"Caminho inválido no pacote: {membro.name}")
+            tar.extract(membro, destino)
+
+
+def extrair_pacote(caminho, destino, formato=None, progresso=None):
+    """
+    Extrai o pacote para a pasta destino.
+    ZIP, TAR (gz/zst) e 7z são extraídos no próprio processo; RAR continua no UnRAR.
+    progresso(feitos, total): por arquivo extraído (ZIP).
+
+    Returns:
+        tuple: (ok, mensagem)
+    """
+    formato = formato or formato_pacote(caminho)
+    inicio = time.monotonic()
+    ok, msg = _extrair(caminho, destino, formato, progresso)
+    observar("cigs_extracao_duracao_segundos", time.monotonic() - inicio, formato=formato,
+             resultado="ok" if ok else "erro")
+    return ok, msg
+
+
+def _extrair(caminho, destino, formato, progresso):
+    try:
+        if formato == "RAR":
+            # Extração em prioridade baixa: o UnRAR também roda abaixo do normal
+            flags = subprocess.BELOW_NORMAL_PRIORITY_CLASS if os.name == 'nt' and em_prioridade_baixa() else 0
+            res = subprocess.run([UNRAR_PATH, "x", "-y", caminho, destino + os.sep],
+                                 stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, creationflags=flags)
+            # UnRAR: 0 = OK, 1 = aviso não fatal
+            if res.returncode > 1:
+                return False, f"UnRAR retornou {res.returncode}"
+        elif formato == "ZIP":
+            with zipfile.ZipFile(caminho) as z:
+                membros = z.infolist()
+                for n, membro in enumerate(membros, 1):
+                    z.extract(membro, destino)
+                    if progresso:
+                        progresso(n, len(membros))
+        elif formato == "TAR_ZST":
+            if not HAS_ZSTD:
+                return False, "Formato .tar.zst indisponível (zstandard ausente no build)"
+            with open(caminho, 'rb') as f:
+                with zstandard.ZstdDecompressor().stream_reader(f) as leitor:
+                    with tarfile.open(fileobj=leitor, mode="r|") as tar:
+                        _extrair_tar(tar, destino)
+        elif formato in ("TAR", "TAR_GZ"):
+            with tarfile.open(caminho, "r:gz" if formato == "TAR_GZ" else "r:") as tar:
+                _extrair_tar(tar, destino)
+        elif formato == "7Z":
+            if not HAS_7Z:
+                return False, "Formato .7z indisponível (py7zr ausente no build)"
+            with py7zr.SevenZipFile(caminho, 'r') as z:
+                z.extractall(destino)
+        else:
+            return False, f"Formato não suportado: {formato}"
+        return True, "Extraído"
+    except Exception as e:
+        return False, f"Erro Extracao: {e}"
+
+
+class _LeitorEspelhado:
+    """
+    Arquivo somente leitura sobre a resposta HTTP: entrega os bytes ao extrator
+    e, ao mesmo tempo, grava o pacote no disco (para o cache) e calcula o SHA-256.
+    """
+
+    def __init__(self, resposta, arquivo, progresso=None, total=None, limitador=None):
+        self._limitador = limitador
+        self._blocos = resposta.iter_content(DOWNLOAD_CHUNK)
+        self._buffer = bytearray()
+        self._arquivo = arquivo
+        self._progresso = progresso
+        self._ultimo_aviso = 0.0
+        self.total = total
+        self.lidos = 0
+        self.hash = hashlib.sha256()
+
+    def _puxar(self):
+        try:
+            bloco = next(self._blocos)
+        except StopIteration:
+            return False
+        self._arquivo.write(bloco)
+        self.hash.update(bloco)
+        self.lidos += len(bloco)
+        self._buffer += bloco
+        if self._limitador:
+            self._limitador.consumir(len(bloco))
+        agora = time.monotonic()
+        if self._progresso and agora - self._ultimo_aviso >= 1.0:
+            self._ultimo_aviso = agora
+            self._progresso(self.lidos, self.total)
+        return True
+
+    def read(self, n=-1):
+        while (n is None or n < 0 or len(self._buffer) < n) and self._puxar():
+            pass
+        if n is None or n < 0:
+            n = len(self._buffer)
+        dados = bytes(self._buffer[:n])
+        del self._buffer[:n]
+        return dados
+
+    def readable(self):
+        return True
+
+    def drenar(self):
+        # O extrator pode parar antes do fim (padding do tar): o arquivo em disco precisa de tudo
+        while self._puxar():
+            self._buffer.clear()
+
+
+@medir_download
+def baixar_e_extrair(url, destino_pacote, pasta_extracao, formato, sha256=None, tamanho=None,
+                     progresso=None, sistema="GERAL", politica=None):
+    """
+    Baixa um pacote TAR/TAR_GZ/TAR_ZST extraindo enquanto os bytes chegam
+    (rede e disco em paralelo). O pacote também é gravado em destino_pacote.
+    Sem retomada: em qualquer falha a missão volta para baixar_arquivo + extrair_pacote.
+
+    Returns:
+        tuple: (ok, mensagem, estatisticas)
+    """
+    inicio = time.monotonic()
+    estat = {"bytes": 0, "segundos": 0, "mb_s": 0, "streaming": True}
+    caminho_part = destino_pacote + ".part"
+    if formato == "TAR_ZST" and not HAS_ZSTD:
+        return False, "zstandard ausente no build", estat
+
+    try:
+        with requests.get(url, stream=True, timeout=DOWNLOAD_TIMEOUT) as r:
+            if r.status_code != 200:
+                return False, f"HTTP Download {r.status_code}", estat
+            total = r.headers.get("Content-Length", "")
+            total = int(total) if total.isdigit() else None
+            if tamanho and total and int(tamanho) != total:
+                return False, f"Tamanho divergente: esperado {tamanho}, servidor {total}", estat
+            estat["etag"] = r.headers.get("ETag") or r.headers.get("Last-Modified")
+
+            with open(caminho_part, 'wb') as f:
+                leitor = _LeitorEspelhado(r, f, progresso, total, limitador_download(politica))
+                if formato == "TAR_ZST":
+                    fluxo = zstandard.ZstdDecompressor().stream_reader(leitor)
+                    modo = "r|"
+                else:
+                    fluxo = leitor
+                    modo = "r|gz" if formato == "TAR_GZ" else "r|"
+                with tarfile.open(fileobj=fluxo, mode=modo) as tar:
+                    _extrair_tar(tar, pasta_extracao)
+                leitor.drenar()
+
+        estat["bytes"] = leitor.lidos
+        esperado = int(tamanho) if tamanho else total
+        if esperado and leitor.lidos != esperado:
+            raise ValueError(f"Download incompleto: {leitor.lidos} de {esperado} bytes")
+        obtido = leitor.hash.hexdigest()
+        if sha256 and obtido.lower() != sha256.lower():
+            raise ValueError(f"SHA-256 divergente (obtido {obtido[:12]}...)")
+        estat["sha256"] = obtido
+        estat["tamanho"] = leitor.lidos
+
+        os.replace(caminho_part, destino_pacote)
+        estat["segundos"] = round(time.monotonic() - inicio, 2)
+        if estat["segundos"] > 0:
+            estat["mb_s"] = round(estat["bytes"] / (1024 * 1024) / estat["segundos"], 2)
+        return True, "Download e extração concluídos", estat
+    except Exception as e:
+        try:
+            os.remove(caminho_part)
+        except OSError:
+            pass
+        log_debug(f"Extração durante o download falhou ({e})", sistema)
+        return False, str(e), estat
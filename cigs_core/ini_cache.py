@@ -0,0 +1,117 @@
+# Importa módulos padrão para caminhos e controle de concorrência
+import os
+import threading
+
+# Importa o mapa de raízes dos sistemas
+from .config import MAPA_RAIZ
+
+# Importa o log do agente
+from .utils import log_debug
+
+# Cache por sistema: {"AC": {"chave": (caminho, mtime, tamanho), "dados": {...}}}
+_cache = {}
+_lock = threading.Lock()
+
+
+def localizar_config_ini(sistema):
+    """
+    Retorna o caminho do config.ini do sistema (padrão novo ou estrutura legado),
+    ou None se nenhum existir.
+    """
+    raiz = MAPA_RAIZ.get(sistema.upper())
+    if not raiz:
+        return None
+    for p in (os.path.join(raiz, "config.ini"), os.path.join(raiz, "Config", "config.ini")):
+        if os.path.exists(p):
+            return p
+    return None
+
+
+def _parsear_config_ini(ini_path):
+    """
+    Lê o config.ini uma única vez e extrai tudo o que o agente consulta:
+      - clientes: nomes das linhas "Customer=" ativas (não comentadas com ";")
+      - comentados: quantidade de linhas "Customer=" comentadas
+      - database_name: caminho do banco da primeira linha "DatabaseName="
+    """
+    clientes = []
+    comentados = 0
+    database_name = ""
+
+    # Encoding latin-1 (compatível com arquivos antigos)
+    with open(ini_path, 'r', encoding='latin-1') as f:
+        for line in f:
+            linha_limpa = line.strip()
+
+            if "Customer=" in line:
+                if linha_limpa.startswith(";"):
+                    comentados += 1
+                else:
+                    try:
+                        clientes.append(line.split("Customer=")[1].split(",")[0].strip())
+                    except:
+                        clientes.append("Erro leitura")
+
+            elif not database_name and "DatabaseName=" in line:
+                # Caso tenha formato "servidor:caminho", usa a última parte
+                parts = line.split("=")[1].strip().split(":")
+                database_name = parts[-1] if len(parts) > 1 else parts[0]
+
+    return {
+        "caminho": ini_path,
+        "clientes": clientes,
+        "ref": clientes[0] if clientes else "N/A",
+        "comentados": comentados,
+        "database_name": database_name,
+        "erro": None
+    }
+
+
+def _copia(dados):
+    # Cada chamador recebe a própria cópia: alterar o resultado não estraga o cache
+    return {**dados, "clientes": list(dados["clientes"])}
+
+
+def ler_config_sistema(sistema):
+    """
+    Retorna os dados parseados do config.ini do sistema (uma cópia do cache).
+    O resultado fica em cache e só é re-parseado quando caminho, mtime ou
+    tamanho do arquivo mudam. Em falha, 'erro' vem preenchido.
+    """
+    sistema = sistema.upper().strip()
+
+    if not MAPA_RAIZ.get(sistema):
+        return {"caminho": None, "clientes": [], "ref": "Path N/A", "comentados": 0, "database_name": "", "erro": "Path N/A"}
+
+    ini_path = localizar_config_ini(sistema)
+    if not ini_path:
+        return {"caminho": None, "clientes": [], "ref": "Sem config.ini", "comentados": 0, "database_name": "", "erro": "Sem config.ini"}
+
+    try:
+        st = os.stat(ini_path)
+        chave = (ini_path, st.st_mtime_ns, st.st_size)
+
+        with _lock:
+            entrada = _cache.get(sistema)
+            if entrada and entrada["chave"] == chave:
+                return _copia(entrada["dados"])
+
+        dados = _parsear_config_ini(ini_path)
+        log_debug(f"config.ini parseado: {ini_path} ({len(dados['clientes'])} clientes ativos)", sistema)
+
+        with _lock:
+            _cache[sistema] = {"chave": chave, "dados": dados}
+        return _copia(dados)
+
+    except Exception as e:
+        log_debug(f"ERRO ao ler arquivo: {str(e)}", sistema)
+        return {"caminho": ini_path, "clientes": [], "ref": f"Erro: {str(e)}", "comentados": 0, "database_name": "", "erro": f"Erro: {str(e)}"}
+
+
+def invalidar_config_sistema(sistema=None):
+    """Descarta o cache de um sistema (ou de todos), forçando nova leitura."""
+    with _lock:
+        if sistema:
+            _cache.pop(sistema.upper(), None)
+        else:
+            _cache.clear()
@@ -0,0 +1,293 @@
+# Importa módulos padrão para arquivos, JSON, cópia, permissões, tempo e concorrência
+import os
+import json
+import stat
+import hashlib
+import time
+import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Importa configurações de paralelismo da instalação e pasta dos manifestos
+from .config import INSTALACAO_PARALELO, VERIFICACAO_PARALELO, PASTA_MANIFESTOS, PASTA_ESTADO_ALVOS
+
+# Hash de arquivo em blocos (mesmo usado na verificação do download)
+from .download import sha256_arquivo
+
+# Importa o log do agente e o inicializador que repassa a prioridade às threads dos pools
+from .utils import log_debug, inicializador_pool
+
+# Métricas de duração e volume da cópia para as pastas alvo
+from .metricas import observar, incrementar
+
+
+def listar_arquivos(origem):
+    """
+    Percorre a pasta extraída uma única vez.
+
+    Returns:
+        list: [(caminho_relativo, tamanho)] reutilizada na cópia e na verificação
+    """
+    arquivos = []
+    pendentes = [""]
+    while pendentes:
+        relativo = pendentes.pop()
+        with os.scandir(os.path.join(origem, relativo)) as itens:
+            for item in itens:
+                caminho = os.path.join(relativo, item.name)
+                if item.is_dir(follow_symlinks=False):
+                    pendentes.append(caminho)
+                elif item.is_file():
+                    arquivos.append((caminho, item.stat().st_size))
+    return arquivos
+
+
+def _copiar_arquivo(origem, destino):
+    try:
+        shutil.copy2(origem, destino)
+    except PermissionError:
+        # Arquivo somente leitura no destino (o robocopy sobrescrevia mesmo assim)
+        os.chmod(destino, stat.S_IWRITE)
+        shutil.copy2(origem, destino)
+
+
+def _mover_arquivo(origem, destino):
+    try:
+        os.replace(origem, destino)
+    except PermissionError:
+        os.chmod(destino, stat.S_IWRITE)
+        os.replace(origem, destino)
+    except OSError:
+        # Outro volume: rename não funciona, copia
+        _copiar_arquivo(origem, destino)
+
+
+def _arquivo_estado(alvo):
+    chave = hashlib.sha1(os.path.normcase(os.path.abspath(alvo)).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(PASTA_ESTADO_ALVOS, f"{chave}.json")
+
+
+def carregar_estado_alvo(alvo):
+    """
+    Estado do alvo na última instalação: {caminho_relativo: [tamanho, mtime_ns, sha256]}.
+    Se tamanho e mtime do arquivo no destino não mudaram, o hash registrado vale.
+    """
+    try:
+        with open(_arquivo_estado(alvo), 'r', encoding='utf-8') as f:
+            dados = json.load(f)
+        return dados.get("arquivos", {})
+    except:
+        return {}
+
+
+def salvar_estado_alvo(alvo, estado):
+    try:
+        if not os.path.exists(PASTA_ESTADO_ALVOS):
+            os.makedirs(PASTA_ESTADO_ALVOS)
+        caminho = _arquivo_estado(alvo)
+        with open(caminho + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump({"alvo": alvo, "arquivos": estado}, f)
+        os.replace(caminho + ".tmp", caminho)
+    except Exception as e:
+        log_debug(f"Aviso: falha ao gravar estado do alvo {alvo}: {e}")
+
+
+def _instalar_alvo(origem, manifesto, alvo, mover=False):
+    """
+    Grava no alvo só os arquivos novos ou alterados e mede a vazão.
+    Igual = mesmo tamanho e mesmo hash; o hash do destino vem do estado do alvo
+    quando tamanho/mtime não mudaram, senão é calculado uma vez.
+    """
+    inicio = time.monotonic()
+    gravados = 0
+    total_bytes = 0
+    ignorados = 0
+    bytes_ignorados = 0
+    hashes_calculados = 0
+    iguais = []
+    falhas = []
+    operacao = _mover_arquivo if mover else _copiar_arquivo
+    estado = carregar_estado_alvo(alvo)
+
+    for pasta in sorted({os.path.dirname(rel) for rel, _, _ in manifesto}):
+        os.makedirs(os.path.join(alvo, pasta), exist_ok=True)
+
+    for rel, tamanho, sha in manifesto:
+        destino = os.path.join(alvo, rel)
+        try:
+            st = os.stat(destino)
+        except OSError:
+            st = None
+
+        if st and st.st_size == tamanho:
+            anterior = estado.get(rel)
+            if anterior and anterior[0] == st.st_size and anterior[1] == st.st_mtime_ns:
+                sha_destino = anterior[2]
+            else:
+                try:
+                    sha_destino = sha256_arquivo(destino)
+                    hashes_calculados += 1
+                except OSError:
+                    sha_destino = None
+            if sha_destino == sha:
+                estado[rel] = [st.st_size, st.st_mtime_ns, sha]
+                iguais.append(rel)
+                ignorados += 1
+                bytes_ignorados += tamanho
+                continue
+
+        try:
+            operacao(os.path.join(origem, rel), destino)
+            st = os.stat(destino)
+            estado[rel] = [st.st_size, st.st_mtime_ns, sha]
+            gravados += 1
+            total_bytes += tamanho
+        except OSError as e:
+            estado.pop(rel, None)
+            falhas.append(f"{rel}: {e}")
+
+    salvar_estado_alvo(alvo, estado)
+
+    segundos = max(time.monotonic() - inicio, 0.001)
+    return {
+        "alvo": alvo,
+        "modo": "MOVER" if mover else "COPIA",
+        "arquivos": gravados,
+        "bytes": total_bytes,
+        "ignorados": ignorados,
+        "bytes_ignorados": bytes_ignorados,
+        "hashes_calculados": hashes_calculados,
+        "segundos": round(segundos, 2),
+        "mb_s": round(total_bytes / (1024 * 1024) / segundos, 2),
+        "arquivos_s": round(gravados / segundos, 1),
+        "falhas": falhas[:50],
+        # Arquivos já conferidos por hash (a verificação não precisa ler de novo)
+        "iguais": iguais,
+    }
+
+
+def instalar_em_alvos(origem, manifesto, alvos, progresso=None, sistema="GERAL"):
+    """
+    Distribui o pacote extraído para todas as pastas alvo, gravando apenas os
+    arquivos novos ou alterados em cada uma.
+    Os alvos extras recebem cópias em paralelo (até INSTALACAO_PARALELO ao mesmo
+    tempo); por último os arquivos são MOVIDOS para o primeiro alvo, o que evita
+    uma cópia completa do pacote (mesmo volume: só renomeia).
+
+    progresso(concluidos, total, resultado): chamado a cada alvo finalizado.
+
+    Returns:
+        list: estatísticas por alvo (arquivos, bytes, ignorados, MB/s, arquivos/s, falhas, iguais)
+    """
+    principal, extras = alvos[0], alvos[1:]
+    resultados = []
+
+    def concluir(resultado):
+        resultados.append(resultado)
+        observar("cigs_copia_duracao_segundos", resultado["segundos"], modo=resultado["modo"])
+        incrementar("cigs_copia_bytes_total", resultado["bytes"], modo=resultado["modo"])
+        log_debug(f"Alvo {resultado['alvo']}: {resultado['arquivos']} arquivos gravados, "
+                  f"{resultado['ignorados']} iguais ({resultado['bytes_ignorados'] // (1024 * 1024)} MB não copiados), "
+                  f"{resultado['mb_s']} MB/s, {resultado['arquivos_s']} arq/s ({resultado['modo']})", sistema)
+        if progresso:
+            progresso(len(resultados), len(alvos), resultado)
+
+    if extras:
+        with ThreadPoolExecutor(max_workers=max(1, min(INSTALACAO_PARALELO, len(extras))),
+                                thread_name_prefix="CIGS_Install", initializer=inicializador_pool()) as executor:
+            futuros = [executor.submit(_instalar_alvo, origem, manifesto, alvo) for alvo in extras]
+            for futuro in as_completed(futuros):
+                concluir(futuro.result())
+
+    concluir(_instalar_alvo(origem, manifesto, principal, mover=True))
+    return resultados
+
+
+def montar_manifesto_pacote(origem, arquivos):
+    """
+    Calcula o hash SHA-256 de cada arquivo extraído (em paralelo).
+
+    Returns:
+        list: [(caminho_relativo, tamanho, sha256)]
+    """
+    with ThreadPoolExecutor(max_workers=VERIFICACAO_PARALELO, thread_name_prefix="CIGS_Hash",
+                            initializer=inicializador_pool()) as executor:
+        hashes = executor.map(lambda item: sha256_arquivo(os.path.join(origem, item[0])), arquivos)
+        return [(rel, tamanho, sha) for (rel, tamanho), sha in zip(arquivos, hashes)]
+
+
+def salvar_manifesto_pacote(sistema, nome_pacote, manifesto):
+    """Grava o manifesto do último pacote instalado em C:\\CIGS\\Manifestos\\<SISTEMA>.json."""
+    try:
+        if not os.path.exists(PASTA_MANIFESTOS):
+            os.makedirs(PASTA_MANIFESTOS)
+        caminho = os.path.join(PASTA_MANIFESTOS, f"{sistema.upper()}.json")
+        with open(caminho + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump({"pacote": nome_pacote, "arquivos": manifesto}, f)
+        os.replace(caminho + ".tmp", caminho)
+    except Exception as e:
+        log_debug(f"Aviso: falha ao gravar manifesto do pacote: {e}", sistema)
+
+
+def carregar_manifesto_pacote(sistema):
+    """Manifesto do último pacote instalado no sistema ({"pacote", "arquivos"}) ou None."""
+    try:
+        with open(os.path.join(PASTA_MANIFESTOS, f"{sistema.upper()}.json"), 'r', encoding='utf-8') as f:
+            dados = json.load(f)
+        dados["arquivos"] = [tuple(item) for item in dados["arquivos"]]
+        return dados
+    except:
+        return None
+
+
+def verificar_alvo(alvo, manifesto, ja_conferidos=None, limite_lista=50):
+    """
+    Confere o alvo contra o manifesto do pacote. Primeiro pelo tamanho (sem ler
+    o arquivo); só os que batem no tamanho têm o hash calculado, em paralelo.
+    ja_conferidos: arquivos cujo hash a instalação acabou de comparar (não relê).
+    Arquivos extras no destino não atrapalham.
+
+    Returns:
+        dict: alvo, ok, ausentes, corrompidos (listas limitadas e totais) e segundos
+    """
+    inicio = time.monotonic()
+    ja_conferidos = set(ja_conferidos or ())
+    ausentes, corrompidos, conferir = [], [], []
+    for rel, tamanho, sha in manifesto:
+        try:
+            if os.path.getsize(os.path.join(alvo, rel)) != tamanho:
+                corrompidos.append(rel)
+            elif rel not in ja_conferidos:
+                conferir.append((rel, sha))
+        except OSError:
+            ausentes.append(rel)
+
+    def hash_confere(item):
+        rel, sha = item
+        try:
+            return sha256_arquivo(os.path.join(alvo, rel)) == sha
+        except OSError:
+            return False
+
+    with ThreadPoolExecutor(max_workers=VERIFICACAO_PARALELO, thread_name_prefix="CIGS_Hash",
+                            initializer=inicializador_pool()) as executor:
+        for (rel, _), confere in zip(conferir, executor.map(hash_confere, conferir)):
+            if not confere:
+                corrompidos.append(rel)
+
+    if corrompidos:
+        # Não deixa o estado do alvo "garantir" um arquivo que não confere
+        estado = carregar_estado_alvo(alvo)
+        for rel in corrompidos:
+            estado.pop(rel, None)
+        salvar_estado_alvo(alvo, estado)
+
+    return {
+        "alvo": alvo,
+        "ok": not ausentes and not corrompidos,
+        "arquivos": len(manifesto),
+        "total_ausentes": len(ausentes),
+        "total_corrompidos": len(corrompidos),
+        "ausentes": ausentes[:limite_lista],
+        "corrompidos": corrompidos[:limite_lista],
+        "segundos": round(time.monotonic() - inicio, 2),
+    }
@@ -0,0 +1,218 @@
+# Importa módulos padrão para arquivos, JSON, fila e threads
+import os
+import json
+import uuid
+import queue
+import itertools
+import threading
+from datetime import datetime
+
+# Importa configurações dos jobs (pasta e retenção)
+from .config import PASTA_JOBS, JOBS_RETENCAO
+
+# Importa o log do agente
+from .utils import log_debug, baixar_prioridade_thread
+
+# Estados possíveis de um job
+FILA = "FILA"
+EXECUTANDO = "EXECUTANDO"
+SUCESSO = "SUCESSO"
+ERRO = "ERRO"
+INTERROMPIDO = "INTERROMPIDO"
+ESTADOS_FINAIS = (SUCESSO, ERRO, INTERROMPIDO)
+
+# Filas de execução, cada uma com um único worker:
+#   MISSOES: missões disparadas, uma por vez (compartilham Temp_Install)
+#   PREPARO: pré-preparo de pacotes em segundo plano, prazo mais próximo primeiro
+FILA_MISSOES = "MISSOES"
+FILA_PREPARO = "PREPARO"
+
+# Jobs em memória (id -> dict) e filas de execução ((ordem, sequência, id, função))
+_jobs = {}
+_filas = {FILA_MISSOES: queue.PriorityQueue(), FILA_PREPARO: queue.PriorityQueue()}
+_sequencia = itertools.count()
+_lock = threading.Lock()
+_workers = {}
+
+# Job em execução na thread do worker (consultado por quem precisa registrar a origem)
+_contexto = threading.local()
+
+# Funções chamadas com o job finalizado (ex: evento enviado pelo canal com a central)
+_ouvintes_fim = []
+
+
+def _agora():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _salvar(job):
+    """Grava o estado do job em C:\\CIGS\\Jobs\\<id>.json (escrita atômica)."""
+    try:
+        if not os.path.exists(PASTA_JOBS):
+            os.makedirs(PASTA_JOBS)
+        caminho = os.path.join(PASTA_JOBS, f"{job['id']}.json")
+        with open(caminho + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump(job, f, ensure_ascii=False)
+        os.replace(caminho + ".tmp", caminho)
+    except Exception as e:
+        log_debug(f"Aviso: falha ao gravar job {job.get('id')}: {e}")
+
+
+def _aplicar_retencao():
+    # Mantém apenas os JOBS_RETENCAO jobs finalizados mais recentes
+    finalizados = sorted((j for j in _jobs.values() if j["estado"] in ESTADOS_FINAIS), key=lambda j: j["id"])
+    for job in finalizados[:-JOBS_RETENCAO] if JOBS_RETENCAO > 0 else finalizados:
+        _jobs.pop(job["id"], None)
+        try:
+            os.remove(os.path.join(PASTA_JOBS, f"{job['id']}.json"))
+        except OSError:
+            pass
+
+
+def carregar_jobs():
+    """
+    Recarrega do disco os jobs das execuções anteriores do agente.
+    Jobs que estavam na fila ou executando quando o agente parou não podem
+    ser retomados (a ordem não é persistida com a senha) e viram INTERROMPIDO.
+    """
+    if not os.path.exists(PASTA_JOBS):
+        return
+    with _lock:
+        for nome in os.listdir(PASTA_JOBS):
+            if not nome.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(PASTA_JOBS, nome), 'r', encoding='utf-8') as f:
+                    job = json.load(f)
+            except:
+                continue
+            if job.get("estado") not in ESTADOS_FINAIS:
+                job["estado"] = INTERROMPIDO
+                job["detalhe"] = "Agente reiniciado antes da conclusão"
+                job["finalizado_em"] = _agora()
+                _salvar(job)
+            _jobs[job["id"]] = job
+        _aplicar_retencao()
+
+
+def atualizar_job(job_id, **campos):
+    """Atualiza campos do job (etapa, progresso, detalhe, extras...) e persiste."""
+    with _lock:
+        job = _jobs.get(job_id)
+        if not job:
+            return
+        job.update(campos)
+        job["atualizado_em"] = _agora()
+        _salvar(job)
+
+
+def _loop_worker(fila):
+    if fila == FILA_PREPARO:
+        # Pré-preparo não disputa CPU/disco com a operação do servidor
+        baixar_prioridade_thread()
+    while True:
+        _, _, job_id, funcao = _filas[fila].get()
+        _contexto.job_id = job_id
+        atualizar_job(job_id, estado=EXECUTANDO, iniciado_em=_agora())
+
+        def progresso(etapa, pct=None, detalhe=None, **extras):
+            campos = {"etapa": etapa}
+            if pct is not None:
+                campos["progresso"] = pct
+            if detalhe is not None:
+                campos["detalhe"] = detalhe
+            campos.update(extras)
+            atualizar_job(job_id, **campos)
+
+        try:
+            ok, msg = funcao(progresso)
+        except Exception as e:
+            ok, msg = False, f"Erro inesperado: {e}"
+        atualizar_job(job_id, estado=SUCESSO if ok else ERRO, progresso=100, detalhe=msg, finalizado_em=_agora())
+
+        # TAG GERAL: a própria missão já logou o resultado com a TAG do sistema e
+        # o /cigs/relatorio não pode contar a mesma falha duas vezes
+        _contexto.job_id = None
+        job = obter_job(job_id) or {}
+        log_debug(f"Job {job_id} ({job.get('sistema', '-')}) finalizado: {'SUCESSO' if ok else 'ERRO'} - {msg}")
+        for ouvinte in list(_ouvintes_fim):
+            try:
+                ouvinte(job)
+            except Exception as e:
+                log_debug(f"Aviso: falha ao notificar o fim do job {job_id}: {e}")
+        with _lock:
+            _aplicar_retencao()
+
+
+def _garantir_worker(fila):
+    with _lock:
+        if fila not in _workers:
+            # Um worker por fila: as missões compartilham Temp_Install e não podem rodar em paralelo
+            nome = "CIGS_Jobs" if fila == FILA_MISSOES else f"CIGS_Jobs_{fila.capitalize()}"
+            _workers[fila] = threading.Thread(target=_loop_worker, args=(fila,), name=nome, daemon=True)
+            _workers[fila].start()
+
+
+def criar_job(tipo, sistema, funcao, parametros=None, fila=FILA_MISSOES, ordem=0):
+    """
+    Enfileira um job e retorna seu ID imediatamente.
+    funcao(progresso) deve retornar (ok, mensagem); progresso(etapa, pct, detalhe)
+    atualiza o estado consultável em /cigs/jobs/<id>.
+    parametros: dados públicos da ordem (NUNCA incluir senha).
+    fila / ordem: fila de execução e prioridade dentro dela (menor primeiro;
+    empate = ordem de chegada).
+    """
+    job_id = f"{datetime.now().strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:6]}"
+    job = {
+        "id": job_id,
+        "tipo": tipo,
+        "sistema": sistema,
+        "fila": fila,
+        "estado": FILA,
+        "etapa": "FILA",
+        "progresso": 0,
+        "detalhe": "Aguardando execução",
+        "parametros": parametros or {},
+        "criado_em": _agora(),
+        "iniciado_em": None,
+        "finalizado_em": None,
+        "atualizado_em": _agora(),
+    }
+    with _lock:
+        _jobs[job_id] = job
+        _salvar(job)
+    _garantir_worker(fila)
+    _filas[fila].put((ordem, next(_sequencia), job_id, funcao))
+    log_debug(f"Job {job_id} ({tipo}) enfileirado", sistema)
+    return job_id
+
+
+def ao_finalizar_job(funcao):
+    """Registra funcao(job) para ser chamada quando qualquer job terminar."""
+    if funcao not in _ouvintes_fim:
+        _ouvintes_fim.append(funcao)
+
+
+def job_atual():
+    """ID do job que a thread atual está executando (None fora dos workers)."""
+    return getattr(_contexto, "job_id", None)
+
+
+def obter_job(job_id):
+    with _lock:
+        job = _jobs.get(job_id)
+        return dict(job) if job else None
+
+
+def listar_jobs(limite=50):
+    """Jobs mais recentes primeiro."""
+    with _lock:
+        recentes = sorted(_jobs.values(), key=lambda j: j["id"], reverse=True)[:limite]
+        return [dict(j) for j in recentes]
+
+
+def tamanho_fila(fila=None):
+    """Jobs aguardando na fila informada (None = todas)."""
+    if fila:
+        return _filas[fila].qsize()
+    return sum(f.qsize() for f in _filas.values())
@@ -0,0 +1,193 @@
+# Importa módulos padrão para arquivos, datas, expressões regulares e compressão
+import os
+import re
+import glob
+import zlib
+from datetime import datetime
+
+# Importa caminhos dos logs e limites das leituras
+from .config import ARQUIVO_LOG_DEBUG, ARQUIVO_LOG_EXECUCAO, LOGS_TRECHO_MAX_BYTES, LOGS_GZIP_NIVEL
+
+# Importa o flush do escritor (linhas ainda na fila) e a assinatura usada para detectar rotação
+from .utils import flush_log
+from .relatorio import assinatura_arquivo
+
+# ==========================================
+# LEITURA REMOTA DOS LOGS (/cigs/logs)
+# ==========================================
+# A central acompanha o log por offset: cada chamada devolve só os bytes novos
+# desde o offset anterior. A assinatura (início do arquivo) denuncia rotação ou
+# recriação, e aí a leitura recomeça do zero.
+
+# Nome aceito na API -> caminho do arquivo
+ARQUIVOS_LOG = {"debug": ARQUIVO_LOG_DEBUG, "execucao": ARQUIVO_LOG_EXECUCAO}
+
+# Cabeçalho gravado pelo launcher: "[%date% %time%]" (pt-BR "dd/mm/aaaa"; en-US "Ddd mm/dd/aaaa")
+_DATA_EXECUCAO = re.compile(r"^\[([A-Za-z]{3} )?(\d{2})/(\d{2})/(\d{4})")
+
+# Tamanho dos blocos entregues ao compressor no download em lote
+_BLOCO_LOTE = 64 * 1024
+
+
+def _decodificar(dados):
+    # O execucao.log recebe a saída do cmd na página de código OEM
+    try:
+        return dados.decode('utf-8')
+    except UnicodeDecodeError:
+        return dados.decode('cp850', errors='replace')
+
+
+def _tag_debug(linha):
+    # "[AAAA-MM-DD HH:MM:SS] [SISTEMA] msg" -> SISTEMA (None em linhas de continuação)
+    if not linha.startswith("[") or linha[20:23] != "] [":
+        return None
+    fim = linha.find("]", 23)
+    return linha[23:fim] if fim != -1 else None
+
+
+def _data_debug(linha):
+    return linha[1:11] if _tag_debug(linha) is not None else None
+
+
+def _data_execucao(linha):
+    m = _DATA_EXECUCAO.match(linha)
+    if not m:
+        return None
+    semana, a, b, ano = m.groups()
+    # Com o dia da semana na frente o Windows está em inglês (mês primeiro)
+    mes, dia = (a, b) if semana else (b, a)
+    return f"{ano}-{mes}-{dia}"
+
+
+def _filtrar_sistema(linhas, sistema):
+    # Linhas sem cabeçalho (continuação) seguem a decisão da linha anterior
+    sistema = sistema.upper()
+    saida = []
+    passa = True
+    for linha in linhas:
+        tag = _tag_debug(linha)
+        if tag is not None:
+            passa = tag.upper() == sistema
+        if passa:
+            saida.append(linha)
+    return saida
+
+
+def ler_trecho(arquivo, offset=None, max_bytes=LOGS_TRECHO_MAX_BYTES, sistema=None, assinatura=None):
+    """
+    Lê o log a partir do offset, até max_bytes (limitado a LOGS_TRECHO_MAX_BYTES),
+    parando na última linha completa.
+    offset None: últimos max_bytes do arquivo (abertura do visualizador).
+    assinatura: a devolvida na chamada anterior; se mudou, o arquivo foi
+    rotacionado e a leitura recomeça do zero (reiniciado=True).
+    sistema: só linhas com a TAG do sistema (apenas no CIGS_debug.log).
+
+    Returns:
+        dict: linhas, offset (próxima leitura), inicio, tamanho, assinatura, reiniciado, mais
+    """
+    caminho = ARQUIVOS_LOG[arquivo]
+    if arquivo == "debug":
+        flush_log()
+    max_bytes = max(1, min(max_bytes, LOGS_TRECHO_MAX_BYTES))
+
+    try:
+        tamanho = os.path.getsize(caminho)
+    except OSError:
+        return {"arquivo": arquivo, "linhas": [], "offset": 0, "inicio": 0, "tamanho": 0,
+                "assinatura": "", "reiniciado": False, "mais": False, "existe": False}
+
+    atual = assinatura_arquivo(caminho)
+    reiniciado = offset is not None and (offset > tamanho or bool(assinatura and assinatura != atual))
+    if reiniciado:
+        offset = 0
+
+    with open(caminho, 'rb') as f:
+        if offset is None:
+            # Cauda: descarta a primeira linha, que provavelmente começou antes do trecho
+            offset = max(0, tamanho - max_bytes)
+            if offset:
+                f.seek(offset - 1)
+                offset += len(f.readline()) - 1
+        f.seek(offset)
+        dados = f.read(min(max_bytes, tamanho - offset))
+
+    fim = dados.rfind(b"\n")
+    if fim != -1:
+        dados = dados[:fim + 1]
+    elif len(dados) < max_bytes:
+        # Linha ainda sendo escrita: fica para a próxima chamada
+        dados = b""
+
+    linhas = _decodificar(dados).splitlines()
+    if sistema and arquivo == "debug":
+        linhas = _filtrar_sistema(linhas, sistema)
+
+    novo_offset = offset + len(dados)
+    return {"arquivo": arquivo, "linhas": linhas, "offset": novo_offset, "inicio": offset, "tamanho": tamanho,
+            "assinatura": atual, "reiniciado": reiniciado, "mais": novo_offset < tamanho and bool(dados),
+            "existe": True}
+
+
+def _arquivos_periodo(arquivo, de):
+    # Do mais antigo para o mais novo; arquivos sem escrita desde o início do período ficam de fora
+    caminho = ARQUIVOS_LOG[arquivo]
+    candidatos = [caminho]
+    if arquivo == "debug":
+        candidatos = glob.glob(caminho + ".*") + candidatos
+    existentes = []
+    for p in candidatos:
+        try:
+            mtime = os.path.getmtime(p)
+        except OSError:
+            continue
+        if datetime.fromtimestamp(mtime).strftime("%Y-%m-%d") >= de:
+            existentes.append((mtime, p == caminho, p))
+    # Empate de mtime: o arquivo atual é sempre o mais novo
+    return [p for _, _, p in sorted(existentes)]
+
+
+def _linhas_periodo(caminho, extrair_data, de, ate, sistema):
+    # Linhas sem data (continuação, saída do script) seguem a última linha datada
+    passa = False
+    with open(caminho, 'rb') as f:
+        for bruta in f:
+            linha = _decodificar(bruta).rstrip("\r\n")
+            data = extrair_data(linha)
+            if data is not None:
+                passa = de <= data <= ate
+                if passa and sistema and extrair_data is _data_debug:
+                    passa = _tag_debug(linha).upper() == sistema.upper()
+            if passa:
+                yield linha
+
+
+def gerar_lote_gzip(de, ate, arquivos=("debug", "execucao"), sistema=None):
+    """
+    Gera (em blocos, sem montar tudo em memória) o gzip das linhas de
+    de..ate (AAAA-MM-DD, inclusive) dos logs pedidos, incluindo os
+    CIGS_debug.log rotacionados. Cada arquivo começa com um cabeçalho "=====".
+    sistema filtra pela TAG só no CIGS_debug.log.
+    """
+    compressor = zlib.compressobj(LOGS_GZIP_NIVEL, zlib.DEFLATED, 31)
+    if "debug" in arquivos:
+        flush_log()
+    buffer = []
+    tamanho = 0
+    for arquivo in arquivos:
+        extrair_data = _data_debug if arquivo == "debug" else _data_execucao
+        for caminho in _arquivos_periodo(arquivo, de):
+            try:
+                linhas = _linhas_periodo(caminho, extrair_data, de, ate, sistema)
+                buffer.append(f"===== {os.path.basename(caminho)} =====\n")
+                for linha in linhas:
+                    buffer.append(linha + "\n")
+                    tamanho += len(linha) + 1
+                    if tamanho >= _BLOCO_LOTE:
+                        saida = compressor.compress("".join(buffer).encode('utf-8'))
+                        buffer, tamanho = [], 0
+                        if saida:
+                            yield saida
+            except OSError:
+                # Arquivo rotacionado/apagado no meio da leitura: segue com os demais
+                continue
+    yield compressor.compress("".join(buffer).encode('utf-8')) + compressor.flush()
@@ -0,0 +1,182 @@
+# Importa módulos padrão para arquivos, fila, threads e datas
+import os
+import sys
+import glob
+import time
+import queue
+import atexit
+import threading
+from datetime import datetime
+
+# Importa configurações do log (caminho, rotação, retenção e lote)
+from .config import (PASTA_BASE, ARQUIVO_LOG_DEBUG, LOG_ROTACAO, LOG_MAX_BYTES, LOG_RETENCAO,
+                     LOG_FLUSH_LINHAS, LOG_FLUSH_SEGUNDOS, LOG_FILA_MAX)
+
+
+class EscritorLog(threading.Thread):
+    """
+    Escritor de log em segundo plano.
+    Quem loga só enfileira a linha; esta thread mantém o arquivo aberto,
+    grava em lote (por quantidade de linhas ou tempo) e faz a rotação.
+    """
+
+    def __init__(self, caminho=ARQUIVO_LOG_DEBUG):
+        super().__init__(name="CIGS_Logger", daemon=True)
+        self.caminho = caminho
+        self.fila = queue.Queue(maxsize=LOG_FILA_MAX)
+        self.descartadas = 0
+        self.rotacoes = 0
+        self._arquivo = None
+        self._tamanho = 0
+        self._data_abertura = None
+
+    # ---------------------------------
+    # Lado do chamador (nunca bloqueia)
+    # ---------------------------------
+    def enfileirar(self, texto):
+        try:
+            self.fila.put_nowait(texto)
+        except queue.Full:
+            self.descartadas += 1
+
+    def flush(self, timeout=2.0):
+        """Aguarda até que tudo o que foi enfileirado antes desta chamada esteja no disco."""
+        evento = threading.Event()
+        try:
+            self.fila.put(evento, timeout=timeout)
+        except queue.Full:
+            return False
+        return evento.wait(timeout)
+
+    # ---------------------------------
+    # Lado da thread escritora
+    # ---------------------------------
+    def run(self):
+        buffer = []
+        ultimo_flush = time.monotonic()
+        while True:
+            espera = max(0.0, LOG_FLUSH_SEGUNDOS - (time.monotonic() - ultimo_flush))
+            try:
+                item = self.fila.get(timeout=espera if buffer else None)
+            except queue.Empty:
+                item = None
+
+            if isinstance(item, threading.Event):
+                self._gravar(buffer)
+                buffer = []
+                ultimo_flush = time.monotonic()
+                item.set()
+                continue
+
+            if item is not None:
+                buffer.append(item)
+
+            if buffer and (len(buffer) >= LOG_FLUSH_LINHAS or time.monotonic() - ultimo_flush >= LOG_FLUSH_SEGUNDOS):
+                self._gravar(buffer)
+                buffer = []
+                ultimo_flush = time.monotonic()
+
+    def _abrir(self):
+        if not os.path.exists(PASTA_BASE):
+            os.makedirs(PASTA_BASE)
+        self._arquivo = open(self.caminho, "a", encoding="utf-8")
+        self._tamanho = self._arquivo.tell()
+        # Data de referência do arquivo (para rotação diária): mtime se já existia
+        try:
+            self._data_abertura = datetime.fromtimestamp(os.path.getmtime(self.caminho)).date() if self._tamanho else datetime.now().date()
+        except OSError:
+            self._data_abertura = datetime.now().date()
+
+    def _precisa_rotacionar(self):
+        if LOG_ROTACAO == "DIARIA":
+            return self._data_abertura != datetime.now().date()
+        return self._tamanho >= LOG_MAX_BYTES
+
+    def _rotacionar(self):
+        self._arquivo.close()
+        self._arquivo = None
+        try:
+            if LOG_ROTACAO == "DIARIA":
+                destino = f"{self.caminho}.{self._data_abertura.strftime('%Y-%m-%d')}"
+                if os.path.exists(destino):
+                    destino = f"{destino}_{datetime.now().strftime('%H%M%S')}"
+                os.replace(self.caminho, destino)
+                # Retenção: mantém apenas os N arquivos diários mais recentes
+                antigos = sorted(glob.glob(self.caminho + ".????-??-??*"))
+                for velho in antigos[:-LOG_RETENCAO] if LOG_RETENCAO > 0 else antigos:
+                    os.remove(velho)
+            else:
+                # CIGS_debug.log.(N-1) -> .N ... CIGS_debug.log -> .1
+                for i in range(LOG_RETENCAO - 1, 0, -1):
+                    if os.path.exists(f"{self.caminho}.{i}"):
+                        os.replace(f"{self.caminho}.{i}", f"{self.caminho}.{i + 1}")
+                if LOG_RETENCAO > 0:
+                    os.replace(self.caminho, f"{self.caminho}.1")
+                else:
+                    os.remove(self.caminho)
+            self.rotacoes += 1
+        except OSError:
+            # Arquivo preso por outro processo (Windows): tenta de novo na próxima gravação
+            pass
+
+    def _gravar(self, linhas):
+        if not linhas:
+            return
+        try:
+            # Eco no console (apenas quando existe um console)
+            if sys.stdout:
+                for texto in linhas:
+                    print(texto)
+        except:
+            pass
+        try:
+            if self._arquivo is None:
+                self._abrir()
+            elif self._precisa_rotacionar():
+                self._rotacionar()
+                self._abrir()
+            bloco = "\n".join(linhas) + "\n"
+            self._arquivo.write(bloco)
+            self._arquivo.flush()
+            self._tamanho += len(bloco.encode("utf-8"))
+        except:
+            # Falha de disco não pode derrubar o agente; reabre na próxima tentativa
+            try:
+                if self._arquivo:
+                    self._arquivo.close()
+            except:
+                pass
+            self._arquivo = None
+
+
+# Instância única do escritor, iniciada na primeira linha de log
+_escritor = None
+_lock = threading.Lock()
+
+
+def obter_escritor():
+    global _escritor
+    if _escritor is None:
+        with _lock:
+            if _escritor is None:
+                _escritor = EscritorLog()
+                _escritor.start()
+    return _escritor
+
+
+def estatisticas_log():
+    """Linhas na fila do escritor, descartadas (fila cheia) e rotações desde o início."""
+    if _escritor is None:
+        return {"fila": 0, "descartadas": 0, "rotacoes": 0}
+    return {"fila": _escritor.fila.qsize(), "descartadas": _escritor.descartadas, "rotacoes": _escritor.rotacoes}
+
+
+def flush_log(timeout=2.0):
+    """Força a gravação das linhas pendentes (ex: antes de ler o arquivo de log)."""
+    if _escritor is None:
+        return True
+    return _escritor.flush(timeout)
+
+
+# Garante que as últimas linhas cheguem ao disco quando o processo encerrar
+atexit.register(flush_log)
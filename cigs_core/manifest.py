@@ -0,0 +1,169 @@
+# Importa módulos padrão para caminhos, hashing, JSON e controle de concorrência
+import os
+import sys
+import json
+import hashlib
+import threading
+from datetime import datetime
+
+# Importa configurações do agente (versão, pastas e cache em disco do manifesto)
+from .config import VERSAO_AGENTE, PASTA_BASE, PASTA_DOWNLOAD, ARQUIVO_MANIFESTO, EXTENSOES_BUILD
+
+# Importa o log do agente
+from .utils import log_debug
+
+# Pastas de dados do agente que nunca fazem parte do build
+PASTAS_IGNORADAS = {
+    os.path.normcase(PASTA_DOWNLOAD),
+    os.path.normcase(os.path.join(PASTA_BASE, "Temp_Install")),
+}
+
+# Manifesto em memória (calculado uma única vez na inicialização)
+_manifesto = None
+_lock = threading.Lock()
+
+
+def _listar_arquivos_build():
+    """
+    Retorna (pasta_base, [caminhos]) com os arquivos que compõem o build do agente.
+      - EXE dentro de uma pasta CIGS_Agent.dist: todos os arquivos da pasta
+      - EXE solto (ex: C:\\CIGS): executáveis e bibliotecas (.exe/.dll/.pyd)
+      - Modo script: arquivo principal + módulos .py do cigs_core
+    """
+    if getattr(sys, 'frozen', False):
+        base = os.path.dirname(os.path.abspath(sys.executable))
+        filtrar = not base.lower().endswith(".dist")
+        arquivos = []
+        for raiz, dirs, files in os.walk(base):
+            # Não desce em Downloads / Temp_Install
+            dirs[:] = [d for d in dirs if os.path.normcase(os.path.join(raiz, d)) not in PASTAS_IGNORADAS]
+            for nome in files:
+                if filtrar and not nome.lower().endswith(EXTENSOES_BUILD):
+                    continue
+                arquivos.append(os.path.join(raiz, nome))
+        return base, arquivos
+
+    # Modo desenvolvedor: script principal + pacote cigs_core
+    pasta_pacote = os.path.dirname(os.path.abspath(__file__))
+    base = os.path.dirname(pasta_pacote)
+    arquivos = []
+    principal = getattr(sys.modules.get('__main__'), '__file__', None)
+    if principal and os.path.exists(principal):
+        arquivos.append(os.path.abspath(principal))
+    for nome in os.listdir(pasta_pacote):
+        if nome.endswith(".py"):
+            arquivos.append(os.path.join(pasta_pacote, nome))
+    return base, arquivos
+
+
+def _sha256_arquivo(caminho):
+    # Lê o arquivo em blocos de 1 MB para não carregar tudo na memória
+    h = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _ler_cache_disco():
+    try:
+        with open(ARQUIVO_MANIFESTO, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except:
+        return None
+
+
+def _gravar_cache_disco(manifesto):
+    try:
+        if not os.path.exists(PASTA_BASE):
+            os.makedirs(PASTA_BASE)
+        temp = ARQUIVO_MANIFESTO + ".tmp"
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump(manifesto, f, indent=1)
+        os.replace(temp, ARQUIVO_MANIFESTO)
+    except Exception as e:
+        log_debug(f"Aviso: nao foi possivel gravar cache do manifesto: {e}")
+
+
+def _montar_manifesto(anterior=None):
+    """
+    Monta o manifesto de build. Arquivos cujo tamanho e mtime batem com o
+    manifesto anterior (memória ou disco) reaproveitam o hash já calculado.
+    """
+    base, caminhos = _listar_arquivos_build()
+
+    # Índice do manifesto anterior, válido apenas se for da mesma pasta base
+    conhecidos = {}
+    if anterior and anterior.get("base") == base:
+        conhecidos = {a["arquivo"]: a for a in anterior.get("arquivos", [])}
+
+    arquivos = []
+    recalculados = 0
+    for caminho in sorted(caminhos):
+        try:
+            st = os.stat(caminho)
+        except OSError:
+            continue
+        rel = os.path.relpath(caminho, base).replace("\\", "/")
+        antigo = conhecidos.get(rel)
+        if antigo and antigo.get("tamanho") == st.st_size and antigo.get("mtime") == st.st_mtime_ns:
+            sha = antigo["sha256"]
+        else:
+            try:
+                sha = _sha256_arquivo(caminho)
+            except OSError:
+                continue
+            recalculados += 1
+        arquivos.append({"arquivo": rel, "tamanho": st.st_size, "mtime": st.st_mtime_ns, "sha256": sha})
+
+    # Fingerprint = SHA-256 da lista ordenada "arquivo:sha256"
+    h = hashlib.sha256()
+    for a in arquivos:
+        h.update(f"{a['arquivo']}:{a['sha256']}\n".encode('utf-8'))
+
+    # Data do build = arquivo mais recente do conjunto
+    build = max((a["mtime"] for a in arquivos), default=0)
+
+    manifesto = {
+        "versao": VERSAO_AGENTE,
+        "fingerprint": h.hexdigest() if arquivos else "dev_mode",
+        "build": datetime.fromtimestamp(build / 1e9).strftime("%Y-%m-%d %H:%M:%S") if build else None,
+        "base": base,
+        "arquivos": arquivos,
+    }
+    return manifesto, recalculados
+
+
+def carregar_manifesto(revalidar=False):
+    """
+    Garante o manifesto em memória e o retorna.
+    Na primeira chamada usa o cache em disco como base; com revalidar=True
+    confere tamanho/mtime dos arquivos e re-hasheia apenas os alterados.
+    """
+    global _manifesto
+    with _lock:
+        if _manifesto is not None and not revalidar:
+            return _manifesto
+
+        anterior = _manifesto if _manifesto is not None else _ler_cache_disco()
+        try:
+            novo, recalculados = _montar_manifesto(anterior)
+        except Exception as e:
+            log_debug(f"Erro Manifesto: {e}")
+            if _manifesto is None:
+                _manifesto = {"versao": VERSAO_AGENTE, "fingerprint": "erro_hash", "build": None, "base": None, "arquivos": []}
+            return _manifesto
+
+        # Só regrava o disco quando algo mudou
+        if recalculados or anterior is None or anterior.get("fingerprint") != novo["fingerprint"] \
+                or anterior.get("versao") != novo["versao"]:
+            log_debug(f"Manifesto de build atualizado: {len(novo['arquivos'])} arquivos ({recalculados} re-hasheados)")
+            _gravar_cache_disco(novo)
+
+        _manifesto = novo
+        return _manifesto
+
+
+def obter_fingerprint():
+    """Retorna o fingerprint do build em cache (sem I/O após a primeira chamada)."""
+    return carregar_manifesto()["fingerprint"]
@@ -0,0 +1,141 @@
+# Importa módulos padrão para busca binária, concorrência e decorators
+import bisect
+import threading
+from functools import wraps
+
+# ==========================================
+# MÉTRICAS NO FORMATO TEXTO DO PROMETHEUS
+# ==========================================
+# Contadores e histogramas em memória, atualizados pelos ganchos das rotas,
+# do download, da extração, da cópia e do isql. Cada gancho custa um lock e
+# algumas operações em dict; o texto só é montado quando o /cigs/metrics é lido.
+
+# Limites (s) dos histogramas de latência HTTP e das operações longas
+BUCKETS_HTTP = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BUCKETS_OPERACAO = (1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600)
+
+# Limites (MB/s) do histograma de vazão dos downloads
+BUCKETS_VAZAO = (0.5, 1, 2, 5, 10, 25, 50, 100, 250)
+
+# Nome -> (tipo, ajuda, buckets)
+METRICAS = {
+    "cigs_http_requisicoes_total": ("counter", "Requisições HTTP atendidas por rota, método e código", None),
+    "cigs_http_duracao_segundos": ("histogram", "Latência das requisições HTTP por rota", BUCKETS_HTTP),
+    "cigs_download_total": ("counter", "Downloads de pacotes por resultado", None),
+    "cigs_download_bytes_total": ("counter", "Bytes de pacotes baixados (sem contar trechos retomados)", None),
+    "cigs_download_duracao_segundos": ("histogram", "Duração dos downloads concluídos", BUCKETS_OPERACAO),
+    "cigs_download_vazao_mb_s": ("histogram", "Vazão dos downloads concluídos", BUCKETS_VAZAO),
+    "cigs_extracao_duracao_segundos": ("histogram", "Duração da extração dos pacotes por formato", BUCKETS_OPERACAO),
+    "cigs_copia_duracao_segundos": ("histogram", "Duração da cópia do pacote para cada pasta alvo", BUCKETS_OPERACAO),
+    "cigs_copia_bytes_total": ("counter", "Bytes gravados nas pastas alvo", None),
+    "cigs_isql_duracao_segundos": ("histogram", "Duração do check de banco pelo isql", BUCKETS_OPERACAO),
+}
+
+# Séries: (nome, rótulos ordenados) -> valor (contador) ou [contagens por bucket, soma, total] (histograma)
+_series = {}
+_lock = threading.Lock()
+
+
+def _chave(nome, rotulos):
+    return nome, tuple(sorted((k, str(v)) for k, v in rotulos.items()))
+
+
+def incrementar(nome, valor=1, **rotulos):
+    """Soma valor ao contador nome com os rótulos informados."""
+    chave = _chave(nome, rotulos)
+    with _lock:
+        _series[chave] = _series.get(chave, 0) + valor
+
+
+def observar(nome, valor, **rotulos):
+    """Registra uma observação (segundos, MB/s...) no histograma nome."""
+    buckets = METRICAS[nome][2]
+    chave = _chave(nome, rotulos)
+    posicao = bisect.bisect_left(buckets, valor)
+    with _lock:
+        serie = _series.get(chave)
+        if serie is None:
+            serie = _series[chave] = [[0] * (len(buckets) + 1), 0.0, 0]
+        serie[0][posicao] += 1
+        serie[1] += valor
+        serie[2] += 1
+
+
+def medir_download(func):
+    """
+    Decorator para funções de download que retornam (ok, mensagem, estatisticas):
+    conta o resultado e os bytes transferidos; duração e vazão só dos concluídos.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        ok, msg, estat = func(*args, **kwargs)
+        modo = "streaming" if estat.get("streaming") else "arquivo"
+        incrementar("cigs_download_total", resultado="ok" if ok else "erro", modo=modo)
+        incrementar("cigs_download_bytes_total", estat.get("bytes", 0), modo=modo)
+        if ok:
+            observar("cigs_download_duracao_segundos", estat.get("segundos", 0), modo=modo)
+            observar("cigs_download_vazao_mb_s", estat.get("mb_s", 0), modo=modo)
+        return ok, msg, estat
+    return wrapper
+
+
+def limpar():
+    """Zera todas as séries (testes)."""
+    with _lock:
+        _series.clear()
+
+
+def _rotulos_texto(rotulos, extra=()):
+    pares = list(rotulos) + list(extra)
+    if not pares:
+        return ""
+    escapados = (k + '="' + v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+                 for k, v in pares)
+    return "{" + ",".join(escapados) + "}"
+
+
+def _numero(valor):
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return str(valor)
+
+
+def texto_prometheus(medidores=()):
+    """
+    Monta o texto de exposição (formato 0.0.4 do Prometheus).
+    medidores: [(nome, tipo, ajuda, [(rotulos_dict, valor)])] lidos na hora do
+    scrape (fila do log, fila de jobs...).
+    """
+    with _lock:
+        series = {chave: (list(v[0]), v[1], v[2]) if isinstance(v, list) else v for chave, v in _series.items()}
+
+    por_nome = {}
+    for (nome, rotulos), valor in series.items():
+        por_nome.setdefault(nome, []).append((rotulos, valor))
+
+    linhas = []
+    for nome, (tipo, ajuda, buckets) in METRICAS.items():
+        linhas.append(f"# HELP {nome} {ajuda}")
+        linhas.append(f"# TYPE {nome} {tipo}")
+        for rotulos, valor in sorted(por_nome.get(nome, [])):
+            if tipo != "histogram":
+                linhas.append(f"{nome}{_rotulos_texto(rotulos)} {_numero(valor)}")
+                continue
+            contagens, soma, total = valor
+            acumulado = 0
+            for limite, qtd in zip(buckets, contagens):
+                acumulado += qtd
+                linhas.append(f"{nome}_bucket{_rotulos_texto(rotulos, [('le', _numero(float(limite)))])} {acumulado}")
+            linhas.append(f"{nome}_bucket{_rotulos_texto(rotulos, [('le', '+Inf')])} {total}")
+            linhas.append(f"{nome}_sum{_rotulos_texto(rotulos)} {_numero(round(soma, 6))}")
+            linhas.append(f"{nome}_count{_rotulos_texto(rotulos)} {total}")
+
+    for nome, tipo, ajuda, valores in medidores:
+        linhas.append(f"# HELP {nome} {ajuda}")
+        linhas.append(f"# TYPE {nome} {tipo}")
+        for rotulos, valor in valores:
+            if valor is None:
+                continue
+            linhas.append(f"{nome}{_rotulos_texto(sorted((k, str(v)) for k, v in rotulos.items()))} {_numero(valor)}")
+    return "\n".join(linhas) + "\n"
+
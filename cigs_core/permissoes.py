@@ -0,0 +1,114 @@
+# Importa módulos padrão para arquivos, JSON, processos e threads
+import os
+import json
+import threading
+import subprocess
+from datetime import datetime
+
+# Importa a pasta base, a regra aplicada e o arquivo de estado
+from .config import PASTA_BASE, PERMISSOES_REGRA, ARQUIVO_ESTADO_PERMISSOES
+
+# Importa o log do agente
+from .utils import log_debug
+
+# Resultado de garantir_permissoes()
+COMPLETO = "COMPLETO"   # icacls recursivo na pasta base inteira
+NOVAS = "NOVAS"         # só pastas novas (ou recriadas) desde a última vez
+OK = "OK"               # nada a fazer
+
+_lock = threading.Lock()
+
+
+def _icacls(alvo, recursivo):
+    # /c continua em erros, /q suprime as mensagens de sucesso
+    subprocess.run(f'icacls "{alvo}" /grant {PERMISSOES_REGRA} {"/t " if recursivo else ""}/c /q',
+                   shell=True, stdout=subprocess.DEVNULL)
+
+
+def _consultar_acl(alvo):
+    """Saída do icacls (só leitura, sem /t) ou None se não deu para consultar."""
+    try:
+        res = subprocess.run(f'icacls "{alvo}"', shell=True, capture_output=True, text=True, errors="replace")
+        return res.stdout if res.returncode == 0 else None
+    except Exception:
+        return None
+
+
+def _raiz_com_permissao(saida):
+    # Ex: 'C:\CIGS Todos:(OI)(CI)(F)' (o nome do grupo depende do idioma do Windows)
+    grupo = PERMISSOES_REGRA.split(":")[0]
+    for linha in saida.splitlines():
+        if (f"{grupo}:" in linha or "Everyone:" in linha) and "(OI)(CI)(F)" in linha:
+            return True
+    return False
+
+
+def _pastas_atuais():
+    # Identidade de cada subpasta da base: nome + data de criação (recriada = nova)
+    pastas = {}
+    with os.scandir(PASTA_BASE) as itens:
+        for item in itens:
+            if item.is_dir(follow_symlinks=False):
+                pastas[item.name] = item.stat(follow_symlinks=False).st_ctime_ns
+    return pastas
+
+
+def _carregar():
+    try:
+        with open(ARQUIVO_ESTADO_PERMISSOES, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except:
+        return {}
+
+
+def _salvar(estado):
+    try:
+        with open(ARQUIVO_ESTADO_PERMISSOES + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump(estado, f)
+        os.replace(ARQUIVO_ESTADO_PERMISSOES + ".tmp", ARQUIVO_ESTADO_PERMISSOES)
+    except Exception as e:
+        log_debug(f"Aviso: falha ao gravar estado das permissões: {e}")
+
+
+def garantir_permissoes(forcar=False):
+    """
+    Aplica PERMISSOES_REGRA em PASTA_BASE sem reescrever a árvore toda a cada missão.
+    A regra tem herança (OI)(CI): tudo que é criado dentro da base depois do
+    icacls recursivo já nasce com a permissão. Por isso o recursivo só roda
+    quando não há registro, a base/regra mudou, a ACL da raiz divergiu ou
+    forcar=True; senão só as subpastas novas (ou recriadas) recebem o icacls.
+
+    Returns:
+        str: COMPLETO, NOVAS ou OK
+    """
+    with _lock:
+        if not os.path.isdir(PASTA_BASE):
+            return OK
+        estado = _carregar()
+        valido = not forcar and estado.get("raiz") == PASTA_BASE and estado.get("regra") == PERMISSOES_REGRA
+        if valido:
+            saida = _consultar_acl(PASTA_BASE)
+            if saida is not None and not _raiz_com_permissao(saida):
+                log_debug("Permissões: divergência na ACL da pasta base, reaplicando")
+                valido = False
+
+        agora = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        if not valido:
+            _icacls(PASTA_BASE, True)
+            acao = COMPLETO
+            estado = {"raiz": PASTA_BASE, "regra": PERMISSOES_REGRA, "aplicado_em": agora}
+            pastas = _pastas_atuais()
+        else:
+            pastas = _pastas_atuais()
+            conhecidas = estado.get("pastas", {})
+            novas = [nome for nome, criada in pastas.items() if conhecidas.get(nome) != criada]
+            for nome in novas:
+                _icacls(os.path.join(PASTA_BASE, nome), True)
+            acao = NOVAS if novas else OK
+            if novas:
+                log_debug(f"Permissões aplicadas em {len(novas)} pasta(s) nova(s): {', '.join(sorted(novas))}")
+
+        estado["pastas"] = pastas
+        estado["verificado_em"] = agora
+        _salvar(estado)
+        return acao
@@ -0,0 +1,118 @@
+# Importa módulos padrão para tempo, threads e context managers
+import time
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+# Importa a política configurada do agente
+from .config import (POLITICA_DOWNLOAD_HORARIOS, POLITICA_DOWNLOAD_PADRAO_KBS,
+                     POLITICA_INSTALACAO_BAIXA_PRIORIDADE, POLITICA_PESADAS_MAX)
+
+# Importa o log do agente
+from .utils import log_debug
+
+# A central pode sobrescrever a política em cada ordem com o campo "politica":
+#   {"download_kbs": 512,          # limite da ordem (0 = sem limite); ausente = faixas de horário
+#    "baixa_prioridade": false}    # instalação com prioridade baixa; ausente = POLITICA_INSTALACAO_BAIXA_PRIORIDADE
+
+
+def _minutos(hhmm):
+    hora, minuto = hhmm.strip().split(":")
+    return int(hora) * 60 + int(minuto)
+
+
+def limite_download_kbs(agora=None):
+    """Limite de download (KB/s) da faixa de horário atual; 0 = sem limite."""
+    agora = agora or datetime.now()
+    minuto = agora.hour * 60 + agora.minute
+    for faixa, kbs in POLITICA_DOWNLOAD_HORARIOS:
+        inicio, fim = (_minutos(h) for h in faixa.split("-"))
+        if inicio <= fim:
+            dentro = inicio <= minuto < fim
+        else:
+            # Faixa que vira a meia-noite (ex: 22:00-06:00)
+            dentro = minuto >= inicio or minuto < fim
+        if dentro:
+            return kbs
+    return POLITICA_DOWNLOAD_PADRAO_KBS
+
+
+class LimitadorBanda:
+    """
+    Balde de fichas compartilhado: consumir(n) faz a thread dormir o necessário
+    para o conjunto dos downloads ficar na taxa. A taxa (bytes/s, 0 = livre) é
+    um número fixo ou uma função consultada a cada bloco (muda com o horário).
+    """
+
+    def __init__(self, taxa):
+        self._taxa = taxa
+        self._lock = threading.Lock()
+        self._fichas = 0.0
+        self._ultimo = time.monotonic()
+
+    def taxa(self):
+        return self._taxa() if callable(self._taxa) else self._taxa
+
+    def consumir(self, n):
+        taxa = self.taxa()
+        if not taxa:
+            return
+        with self._lock:
+            agora = time.monotonic()
+            # Rajada máxima de 1 segundo de fichas acumuladas
+            self._fichas = min(float(taxa), self._fichas + (agora - self._ultimo) * taxa)
+            self._ultimo = agora
+            self._fichas -= n
+            espera = -self._fichas / taxa if self._fichas < 0 else 0
+        if espera:
+            time.sleep(espera)
+
+
+# Limitador único dos downloads que seguem as faixas de horário do agente
+_banda_agente = LimitadorBanda(lambda: limite_download_kbs() * 1024)
+
+
+def limitador_download(politica=None):
+    """Limitador para um download: limite da ordem (se a central mandou) ou o do agente."""
+    if politica and politica.get("download_kbs") is not None:
+        return LimitadorBanda(max(0, int(politica["download_kbs"])) * 1024)
+    return _banda_agente
+
+
+def instalar_com_baixa_prioridade(politica=None):
+    """A instalação desta ordem deve rodar com prioridade baixa de CPU e disco?"""
+    if politica and politica.get("baixa_prioridade") is not None:
+        return bool(politica["baixa_prioridade"])
+    return POLITICA_INSTALACAO_BAIXA_PRIORIDADE
+
+
+# ==========================================
+# LIMITE GLOBAL DE OPERAÇÕES PESADAS
+# ==========================================
+_pesadas = threading.BoundedSemaphore(POLITICA_PESADAS_MAX)
+
+
+def tentar_operacao_pesada():
+    """Ocupa uma vaga sem esperar (rotas HTTP). Quem conseguir chama liberar_operacao_pesada()."""
+    return _pesadas.acquire(blocking=False)
+
+
+def liberar_operacao_pesada():
+    _pesadas.release()
+
+
+@contextmanager
+def operacao_pesada(nome, sistema="GERAL", aguardando=None):
+    """
+    Executa o bloco ocupando uma vaga do limite global (jobs esperam a vaga).
+    aguardando(): chamado uma vez se for preciso esperar.
+    """
+    if not _pesadas.acquire(blocking=False):
+        log_debug(f"{nome}: aguardando vaga (limite de {POLITICA_PESADAS_MAX} operações pesadas)", sistema)
+        if aguardando:
+            aguardando()
+        _pesadas.acquire()
+    try:
+        yield
+    finally:
+        _pesadas.release()
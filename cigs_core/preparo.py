@@ -0,0 +1,228 @@
+# Importa módulos padrão para arquivos, JSON, tempo e concorrência
+import os
+import json
+import time
+import threading
+from datetime import datetime
+
+# Importa configurações do pré-preparo
+from .config import PASTA_PREPARO, ARQUIVO_PREPARO, PREPARO_SEGMENTOS, PREPARO_FIXAR_HORAS
+
+# Motor de download e cache local de pacotes
+from .download import baixar_arquivo, url_sem_assinatura, consultar_etag
+from .cache_pacotes import buscar_pacote, guardar_pacote, fixar_pacote, identidade_pacote
+
+# Fila de jobs em segundo plano
+from .jobs import criar_job, FILA_PREPARO
+
+# Limite global de operações pesadas
+from .politica import operacao_pesada
+
+# Importa o log do agente
+from .utils import log_debug
+
+# Estados do pré-preparo de um sistema
+AGUARDANDO = "AGUARDANDO"
+BAIXANDO = "BAIXANDO"
+PRONTO = "PRONTO"
+FALHA = "FALHA"
+INSTALADO = "INSTALADO"
+
+# Formato do prazo "preparar até" (o mesmo da data/hora da missão)
+FORMATO_PRAZO = "%d/%m/%Y %H:%M"
+
+# Estado por sistema: {"AC": {estado, url, arquivo, sha256, tamanho, preparar_ate, prazo_ts, ...}}
+_estado = None
+_lock = threading.Lock()
+
+
+def _carregar():
+    try:
+        with open(ARQUIVO_PREPARO, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except:
+        return {}
+
+
+def _salvar():
+    try:
+        pasta = os.path.dirname(ARQUIVO_PREPARO)
+        if pasta and not os.path.exists(pasta):
+            os.makedirs(pasta)
+        with open(ARQUIVO_PREPARO + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump(_estado, f)
+        os.replace(ARQUIVO_PREPARO + ".tmp", ARQUIVO_PREPARO)
+    except Exception as e:
+        log_debug(f"Aviso: falha ao gravar estado do pré-preparo: {e}")
+
+
+def _obter_estado():
+    global _estado
+    if _estado is None:
+        _estado = _carregar()
+    return _estado
+
+
+def _atualizar(sistema, **campos):
+    with _lock:
+        registro = _obter_estado().setdefault(sistema.upper(), {})
+        registro.update(campos)
+        registro["atualizado_em"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        _salvar()
+
+
+def prazo_para_timestamp(preparar_ate):
+    """Converte o prazo 'DD/MM/AAAA HH:MM' (ValueError se inválido); None = sem prazo."""
+    if not preparar_ate:
+        return None
+    return datetime.strptime(preparar_ate, FORMATO_PRAZO).timestamp()
+
+
+def estado_preparo(sistema):
+    """
+    Situação do pré-preparo do sistema para o /status (sem a URL assinada).
+    atrasado: prazo vencido sem o pacote pronto.
+    """
+    with _lock:
+        registro = _obter_estado().get(sistema.upper())
+        if not registro:
+            return None
+        publico = {chave: registro.get(chave) for chave in
+                   ("estado", "arquivo", "preparar_ate", "progresso", "detalhe", "tamanho", "atualizado_em")}
+    prazo = registro.get("prazo_ts")
+    publico["atrasado"] = bool(prazo and publico["estado"] not in (PRONTO, INSTALADO) and time.time() > prazo)
+    return publico
+
+
+def executar_preparo(url, nome_arquivo, sistema, preparar_ate=None, sha256=None, tamanho=None, progresso=None,
+                     politica=None):
+    """
+    Baixa e verifica o pacote antes da missão. O pacote fica no cache (protegido
+    da limpeza até PREPARO_FIXAR_HORAS após o prazo) para o disparo seguinte
+    não precisar da rede.
+    politica: override da ordem (ex: {"download_kbs": 512} para preparar de dia).
+
+    Returns:
+        tuple: (ok, mensagem)
+    """
+    if progresso is None:
+        progresso = lambda *a, **k: None
+    prazo = prazo_para_timestamp(preparar_ate)
+    fixar_ate = (prazo or time.time()) + PREPARO_FIXAR_HORAS * 3600
+
+    _atualizar(sistema, estado=BAIXANDO, progresso=0, detalhe="Baixando em segundo plano")
+    progresso("DOWNLOAD", 0, "Baixando pacote em segundo plano")
+
+    caminho = buscar_pacote(url, sha256=sha256, tamanho=tamanho)
+    if caminho:
+        # Já está no cache: só protege até o prazo
+        fixar_pacote(caminho, fixar_ate)
+        no_cache = True
+        identidade = identidade_pacote(caminho) or {}
+        estat = {"cache": True, "tamanho": os.path.getsize(caminho), "sha256": identidade.get("sha256"),
+                 "etag": identidade.get("etag")}
+    else:
+        if not os.path.exists(PASTA_PREPARO):
+            os.makedirs(PASTA_PREPARO)
+        destino = os.path.join(PASTA_PREPARO, f"{sistema.upper()}_{os.path.basename(nome_arquivo)}")
+
+        def progresso_download(baixados, total):
+            pct = int(100 * baixados / total) if total else 0
+            _atualizar(sistema, progresso=pct, detalhe=f"Baixando: {baixados // (1024 * 1024)} MB")
+            progresso("DOWNLOAD", pct, f"Baixando: {baixados // (1024 * 1024)} MB")
+
+        # Uma conexão só: o link do servidor continua livre para a operação
+        ok, msg, estat = baixar_arquivo(url, destino, sha256=sha256, tamanho=tamanho, segmentos=PREPARO_SEGMENTOS,
+                                        progresso=progresso_download, sistema=sistema, politica=politica)
+        if not ok:
+            _atualizar(sistema, estado=FALHA, detalhe=msg)
+            return False, f"Pré-preparo falhou: {msg}"
+        # Hash sempre registrado (calculado aqui se a ordem não trouxe): a missão confere por ele
+        caminho, no_cache, estat["sha256"] = guardar_pacote(url, destino, nome_arquivo, sha256=estat.get("sha256"),
+                                                            etag=estat.get("etag"), fixar_ate=fixar_ate)
+
+    verificado = "SHA-256 conferido" if sha256 else "tamanho conferido"
+    _atualizar(sistema, estado=PRONTO, progresso=100, caminho=caminho, no_cache=no_cache,
+               sha256=(sha256 or estat.get("sha256") or "").lower() or None, etag=estat.get("etag"),
+               tamanho=estat.get("tamanho"),
+               detalhe=f"Pacote pronto ({verificado})")
+    log_debug(f"Pré-preparo concluído: {nome_arquivo} pronto em {caminho}", sistema)
+    return True, f"Pacote pronto para a missão ({verificado})"
+
+
+def enfileirar_preparo(url, nome_arquivo, sistema, preparar_ate=None, sha256=None, tamanho=None, politica=None):
+    """
+    Registra o pré-preparo e coloca na fila de segundo plano (prazo mais
+    próximo primeiro). ValueError se o prazo for inválido.
+
+    Returns:
+        str: ID do job
+    """
+    prazo = prazo_para_timestamp(preparar_ate)
+    _atualizar(sistema, estado=AGUARDANDO, url=url, arquivo=nome_arquivo, sha256=sha256, tamanho=tamanho,
+               preparar_ate=preparar_ate, prazo_ts=prazo, politica=politica, progresso=0,
+               detalhe="Na fila de pré-preparo", caminho=None, no_cache=False)
+
+    def tarefa(progresso):
+        def aguardando_vaga():
+            _atualizar(sistema, detalhe="Aguardando vaga de operação pesada")
+            progresso("FILA", 0, "Aguardando vaga de operação pesada")
+
+        with operacao_pesada("Pré-preparo", sistema, aguardando_vaga):
+            return executar_preparo(url, nome_arquivo, sistema, preparar_ate, sha256, tamanho, progresso, politica)
+
+    job_id = criar_job("PREPARO", sistema, tarefa, {"arquivo": nome_arquivo, "preparar_ate": preparar_ate},
+                       fila=FILA_PREPARO, ordem=prazo or float("inf"))
+    _atualizar(sistema, job_id=job_id)
+    return job_id
+
+
+def retomar_preparos():
+    """Recoloca na fila os pré-preparos interrompidos por um reinício do agente."""
+    with _lock:
+        pendentes = [(sis, dict(r)) for sis, r in _obter_estado().items() if r.get("estado") in (AGUARDANDO, BAIXANDO)]
+    for sistema, r in pendentes:
+        log_debug(f"Retomando pré-preparo de {r.get('arquivo')}", sistema)
+        enfileirar_preparo(r["url"], r["arquivo"], sistema, r.get("preparar_ate"), r.get("sha256"), r.get("tamanho"),
+                           r.get("politica"))
+
+
+def pacote_preparado(sistema, url, sha256=None, conferir_etag=True):
+    """
+    Pacote pré-preparado para esta missão (mesmo hash, ou mesmo link sem assinatura).
+    Hash da ordem diferente do preparado recusa mesmo com o link igual (pacote
+    republicado na mesma chave); achado só pelo link, confere o ETag no servidor
+    como buscar_pacote.
+
+    Returns:
+        tuple: (caminho ou None, True se o arquivo está no cache)
+    """
+    with _lock:
+        r = dict(_obter_estado().get(sistema.upper()) or {})
+    if r.get("estado") != PRONTO or not r.get("caminho"):
+        return None, False
+    sha_ordem = (sha256 or "").lower() or None
+    if sha_ordem and r.get("sha256") and sha_ordem != r["sha256"]:
+        return None, False
+    if not (sha_ordem and sha_ordem == r.get("sha256")):
+        if url_sem_assinatura(r.get("url") or "") != url_sem_assinatura(url or ""):
+            return None, False
+        if conferir_etag and r.get("etag"):
+            etag = consultar_etag(url)
+            # Sem resposta do servidor vale o preparado (como no cache)
+            if etag and etag != r["etag"]:
+                log_debug(f"Pré-preparo: {r.get('arquivo')} mudou no servidor (ETag), baixando de novo", sistema)
+                return None, False
+    try:
+        if r.get("tamanho") and os.path.getsize(r["caminho"]) != r["tamanho"]:
+            return None, False
+    except OSError:
+        return None, False
+    return r["caminho"], bool(r.get("no_cache"))
+
+
+def marcar_instalado(sistema, url, sha256=None):
+    """Missão instalou o pacote pré-preparado: o estado deixa de apontar para o arquivo."""
+    caminho, _ = pacote_preparado(sistema, url, sha256, conferir_etag=False)
+    if caminho:
+        _atualizar(sistema, estado=INSTALADO, detalhe="Pacote instalado pela missão", caminho=None)
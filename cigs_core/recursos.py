@@ -0,0 +1,147 @@
+# Importa módulos padrão para tempo, concorrência e o buffer circular de amostras
+import os
+import time
+import threading
+from collections import deque
+
+# Importa psutil para CPU, memória, volumes e contadores de I/O de disco
+import psutil
+
+# Importa configurações da amostragem
+from .config import RECURSOS_INTERVALO, RECURSOS_HISTORICO, RECURSOS_JANELAS_MEDIA
+
+# Importa o log do agente
+from .utils import log_debug
+
+# Volume do sistema: o campo "disk" do /status (compatível com as centrais antigas)
+VOLUME_SISTEMA = (os.environ.get("SystemDrive", "C:") + "\\") if os.name == 'nt' else "/"
+
+# Buffer circular das amostras (mais antiga primeiro)
+_amostras = deque(maxlen=RECURSOS_HISTORICO)
+_lock = threading.Lock()
+_thread = None
+_io_anterior = None
+
+
+def _volumes():
+    """Espaço livre (GB) de cada volume local. Drives de CD e volumes ilegíveis ficam de fora."""
+    livres = {}
+    for particao in psutil.disk_partitions(all=False):
+        if 'cdrom' in particao.opts or not particao.fstype:
+            continue
+        try:
+            livres[particao.mountpoint] = round(psutil.disk_usage(particao.mountpoint).free / (1024**3), 2)
+        except OSError:
+            pass
+    return livres
+
+
+def _taxas_io(agora):
+    # Taxa de leitura/escrita (MB/s) desde a amostra anterior
+    global _io_anterior
+    contadores = psutil.disk_io_counters()
+    if contadores is None:
+        return None, None
+    anterior, _io_anterior = _io_anterior, (agora, contadores.read_bytes, contadores.write_bytes)
+    if anterior is None or agora <= anterior[0]:
+        return 0.0, 0.0
+    segundos = agora - anterior[0]
+    return (round((contadores.read_bytes - anterior[1]) / (1024 * 1024) / segundos, 2),
+            round((contadores.write_bytes - anterior[2]) / (1024 * 1024) / segundos, 2))
+
+
+def coletar_amostra():
+    """Lê CPU, RAM, volumes e I/O agora (usado só pela thread de amostragem)."""
+    agora = time.time()
+    amostra = {"ts": round(agora, 1), "cpu": None, "ram": None, "volumes": {},
+               "disco_leitura_mb_s": None, "disco_escrita_mb_s": None}
+    try:
+        amostra["cpu"] = psutil.cpu_percent(interval=None)
+    except Exception:
+        pass
+    try:
+        amostra["ram"] = psutil.virtual_memory().percent
+    except Exception:
+        pass
+    try:
+        amostra["volumes"] = _volumes()
+    except Exception:
+        pass
+    try:
+        amostra["disco_leitura_mb_s"], amostra["disco_escrita_mb_s"] = _taxas_io(agora)
+    except Exception:
+        pass
+    return amostra
+
+
+def registrar_amostra(amostra):
+    with _lock:
+        _amostras.append(amostra)
+
+
+def _loop_amostragem():
+    # A primeira leitura de CPU do psutil é sempre 0: serve só de referência
+    try:
+        psutil.cpu_percent(interval=None)
+    except Exception:
+        pass
+    while True:
+        inicio = time.monotonic()
+        registrar_amostra(coletar_amostra())
+        time.sleep(max(RECURSOS_INTERVALO - (time.monotonic() - inicio), 0.5))
+
+
+def iniciar_amostragem():
+    """Inicia a thread que amostra os recursos a cada RECURSOS_INTERVALO segundos."""
+    global _thread
+    with _lock:
+        if _thread is not None and _thread.is_alive():
+            return
+        _thread = threading.Thread(target=_loop_amostragem, name="CIGS_Recursos", daemon=True)
+        _thread.start()
+    log_debug(f"Amostragem de recursos iniciada (a cada {RECURSOS_INTERVALO}s, {RECURSOS_HISTORICO} amostras)")
+
+
+def ultima_amostra():
+    """Amostra mais recente (None enquanto a thread não coletou nenhuma)."""
+    with _lock:
+        return dict(_amostras[-1]) if _amostras else None
+
+
+def _media(valores):
+    valores = [v for v in valores if v is not None]
+    return round(sum(valores) / len(valores), 2) if valores else None
+
+
+def medias(janela_s):
+    """Médias de CPU, RAM e I/O das amostras dos últimos janela_s segundos."""
+    with _lock:
+        if not _amostras:
+            return None
+        limite = _amostras[-1]["ts"] - janela_s
+        janela = [a for a in _amostras if a["ts"] > limite]
+    return {
+        "amostras": len(janela),
+        "cpu": _media(a["cpu"] for a in janela),
+        "ram": _media(a["ram"] for a in janela),
+        "disco_leitura_mb_s": _media(a["disco_leitura_mb_s"] for a in janela),
+        "disco_escrita_mb_s": _media(a["disco_escrita_mb_s"] for a in janela),
+    }
+
+
+def resumo_recursos():
+    """Última amostra e médias das janelas curtas, para o /status (sem ler nada do SO)."""
+    return {
+        "intervalo": RECURSOS_INTERVALO,
+        "amostra": ultima_amostra(),
+        "medias": {f"{janela}s": medias(janela) for janela in RECURSOS_JANELAS_MEDIA},
+    }
+
+
+def historico(desde=None):
+    """
+    Série do buffer circular (mais antiga primeiro).
+    desde: timestamp da última amostra que a central já tem (só as mais novas).
+    """
+    with _lock:
+        return [dict(a) for a in _amostras if desde is None or a["ts"] > desde]
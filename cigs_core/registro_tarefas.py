@@ -0,0 +1,89 @@
+# Importa módulos padrão para arquivos, JSON e concorrência
+import os
+import json
+import threading
+from datetime import datetime
+
+# Importa configuração do registro de tarefas
+from .config import ARQUIVO_REGISTRO_TAREFAS
+
+# Estado das missões da agenda interna
+from .agendador import ultima_entrada
+
+# Importa o log do agente
+from .utils import log_debug
+
+# Registro por nome da tarefa: {"CIGS_Update_AC": {nome, sistema, data_hora, bat, job_id, agendador, ...}}
+_registro = None
+_lock = threading.Lock()
+
+
+def _carregar():
+    try:
+        with open(ARQUIVO_REGISTRO_TAREFAS, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except:
+        return {}
+
+
+def _salvar():
+    try:
+        pasta = os.path.dirname(ARQUIVO_REGISTRO_TAREFAS)
+        if pasta and not os.path.exists(pasta):
+            os.makedirs(pasta)
+        with open(ARQUIVO_REGISTRO_TAREFAS + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump(_registro, f, ensure_ascii=False)
+        os.replace(ARQUIVO_REGISTRO_TAREFAS + ".tmp", ARQUIVO_REGISTRO_TAREFAS)
+    except Exception as e:
+        log_debug(f"Aviso: falha ao gravar o registro de tarefas: {e}")
+
+
+def _obter_registro():
+    global _registro
+    if _registro is None:
+        _registro = _carregar()
+    return _registro
+
+
+def registrar_tarefa(nome, sistema, data_hora, bat, job_id=None, agendador="SCHTASKS", usuario=None):
+    """
+    Registra a tarefa criada pelo agente. O mesmo nome substitui o registro
+    anterior (a tarefa também foi sobrescrita no agendador).
+    agendador: "SCHTASKS" ou "INTERNO" (define como a tarefa é cancelada).
+    """
+    with _lock:
+        _obter_registro()[nome] = {
+            "nome": nome,
+            "sistema": sistema.upper(),
+            "data_hora": data_hora,
+            "bat": bat,
+            "job_id": job_id,
+            "agendador": agendador,
+            "usuario": usuario or "SYSTEM",
+            "criado_em": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        _salvar()
+
+
+def remover_tarefa(nome):
+    with _lock:
+        if _obter_registro().pop(nome, None) is not None:
+            _salvar()
+
+
+def listar_tarefas(sistema=None, job_id=None):
+    """
+    Tarefas registradas (todas, do sistema ou do job). As da agenda interna
+    trazem o estado atual (AGENDADA, EXECUTANDO, CONCLUIDA...).
+
+    Returns:
+        list: registros ordenados por sistema
+    """
+    with _lock:
+        tarefas = [dict(t) for t in _obter_registro().values()
+                   if (not sistema or t["sistema"] == sistema.upper()) and (not job_id or t["job_id"] == job_id)]
+    for tarefa in tarefas:
+        if tarefa["agendador"] == "INTERNO":
+            entrada = ultima_entrada(tarefa["nome"])
+            tarefa["estado"] = entrada["estado"] if entrada else None
+    return sorted(tarefas, key=lambda t: t["sistema"])
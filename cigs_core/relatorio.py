@@ -0,0 +1,195 @@
+# Importa módulos padrão para arquivos, JSON, hashing e concorrência
+import os
+import glob
+import json
+import hashlib
+import threading
+
+# Importa caminhos do log de debug e do índice persistido
+from .config import PASTA_BASE, ARQUIVO_LOG_DEBUG, ARQUIVO_INDICE_RELATORIO
+
+# Importa o flush do escritor de log (linhas ainda na fila)
+from .utils import flush_log
+
+# Bytes iniciais do log usados para reconhecer o arquivo (detecta rotação/recriação)
+TAMANHO_ASSINATURA = 64
+
+# Estado do índice em memória (carregado do disco na primeira consulta)
+_indice = None
+_lock = threading.Lock()
+
+
+def _indice_vazio():
+    return {"assinatura": "", "offset": 0, "contadores": {}}
+
+
+def assinatura_arquivo(caminho):
+    """SHA-1 dos primeiros bytes do arquivo (vazio enquanto ele for menor que o bloco)."""
+    try:
+        with open(caminho, 'rb') as f:
+            inicio = f.read(TAMANHO_ASSINATURA)
+    except OSError:
+        return ""
+    # Só vale como assinatura quando o arquivo já tem o bloco completo
+    return hashlib.sha1(inicio).hexdigest() if len(inicio) == TAMANHO_ASSINATURA else ""
+
+
+def _carregar():
+    try:
+        with open(ARQUIVO_INDICE_RELATORIO, 'r', encoding='utf-8') as f:
+            dados = json.load(f)
+        if "offset" in dados and "contadores" in dados:
+            return dados
+    except:
+        pass
+    return _indice_vazio()
+
+
+def _salvar(indice):
+    try:
+        if not os.path.exists(PASTA_BASE):
+            os.makedirs(PASTA_BASE)
+        temp = ARQUIVO_INDICE_RELATORIO + ".tmp"
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump(indice, f)
+        os.replace(temp, ARQUIVO_INDICE_RELATORIO)
+    except:
+        pass
+
+
+def _contabilizar(indice, linha):
+    """
+    Classifica uma linha "[AAAA-MM-DD HH:MM:SS] [SISTEMA] msg" e soma nos
+    contadores de (sistema, data). Mesma regra do relatório original:
+    "Agendamento realizado com SUCESSO" = sucesso; "Erro"/"Falha" = falha.
+    """
+    if "Agendamento realizado com SUCESSO" in linha:
+        pos = 0
+    elif "Erro" in linha or "Falha" in linha:
+        pos = 1
+    else:
+        return
+
+    # Data e TAG do sistema vêm do cabeçalho fixo da linha
+    if not linha.startswith("[") or linha[20:23] != "] [":
+        return
+    fim_tag = linha.find("]", 23)
+    if fim_tag == -1:
+        return
+    chave = f"{linha[23:fim_tag]}|{linha[1:11]}"
+
+    par = indice["contadores"].setdefault(chave, [0, 0])
+    par[pos] += 1
+
+
+def _processar(indice, caminho, offset):
+    """
+    Lê o arquivo a partir do offset até a última quebra de linha completa.
+    Retorna o novo offset (linha incompleta no fim fica para a próxima vez).
+    """
+    with open(caminho, 'rb') as f:
+        f.seek(offset)
+        resto = b""
+        while True:
+            bloco = f.read(1024 * 1024)
+            if not bloco:
+                break
+            dados = resto + bloco
+            ultimo = dados.rfind(b"\n")
+            if ultimo == -1:
+                resto = dados
+                continue
+            for linha in dados[:ultimo].decode('utf-8', errors='replace').split("\n"):
+                _contabilizar(indice, linha)
+            offset += ultimo + 1
+            resto = dados[ultimo + 1:]
+    return offset
+
+
+def _arquivos_rotacionados():
+    # CIGS_debug.log.1, .2 ... e CIGS_debug.log.AAAA-MM-DD, do mais recente para o mais antigo
+    candidatos = glob.glob(ARQUIVO_LOG_DEBUG + ".*")
+    return sorted(candidatos, key=lambda p: os.path.getmtime(p), reverse=True)
+
+
+def atualizar_indice():
+    """
+    Processa apenas os bytes acrescentados ao CIGS_debug.log desde o último
+    checkpoint. Se o log foi rotacionado, termina de ler o arquivo antigo
+    (reconhecido pela assinatura) antes de começar o novo do zero.
+    """
+    global _indice
+    flush_log()
+
+    with _lock:
+        if _indice is None:
+            _indice = _carregar()
+        indice = _indice
+        offset_antes = indice["offset"]
+
+        if not os.path.exists(ARQUIVO_LOG_DEBUG):
+            return indice
+
+        assinatura_atual = assinatura_arquivo(ARQUIVO_LOG_DEBUG)
+        tamanho = os.path.getsize(ARQUIVO_LOG_DEBUG)
+
+        rotacionou = tamanho < indice["offset"] or \
+            bool(indice["assinatura"] and assinatura_atual != indice["assinatura"])
+        if rotacionou:
+            # Procura o arquivo antigo para não perder o trecho ainda não lido;
+            # arquivos rotacionados depois dele são lidos por inteiro
+            if indice["assinatura"]:
+                rotacionados = _arquivos_rotacionados()
+                for pos, antigo in enumerate(rotacionados):
+                    if assinatura_arquivo(antigo) == indice["assinatura"]:
+                        pendentes = [(antigo, indice["offset"])] + [(p, 0) for p in reversed(rotacionados[:pos])]
+                        for caminho, inicio in pendentes:
+                            try:
+                                _processar(indice, caminho, inicio)
+                            except OSError:
+                                pass
+                        break
+            indice["offset"] = 0
+
+        # Assinatura fica vazia até o arquivo ter o bloco mínimo de bytes
+        indice["assinatura"] = assinatura_atual
+
+        try:
+            indice["offset"] = _processar(indice, ARQUIVO_LOG_DEBUG, indice["offset"])
+        except OSError:
+            pass
+
+        if rotacionou or indice["offset"] != offset_antes:
+            _salvar(indice)
+        return indice
+
+
+def analisar_relatorio_deploy(sistema, data_filtro=None):
+    """
+    Conta sucessos/erros de agendamento do sistema (TAG [AC], [AG]...) a
+    partir do índice incremental, opcionalmente filtrando pela data (AAAAMMDD).
+    """
+    try:
+        indice = atualizar_indice()
+
+        # A central manda YYYYMMDD, o log usa YYYY-MM-DD
+        data_fmt = None
+        if data_filtro and len(data_filtro) == 8:
+            data_fmt = f"{data_filtro[:4]}-{data_filtro[4:6]}-{data_filtro[6:]}"
+
+        sucessos = 0; falhas = 0
+        with _lock:
+            if data_fmt:
+                s, f = indice["contadores"].get(f"{sistema}|{data_fmt}", (0, 0))
+                sucessos += s; falhas += f
+            else:
+                prefixo = f"{sistema}|"
+                for chave, (s, f) in indice["contadores"].items():
+                    if chave.startswith(prefixo):
+                        sucessos += s; falhas += f
+
+        total = sucessos + falhas
+        p = int((sucessos/total)*100) if total > 0 else 0
+        return {"total": total, "sucessos": sucessos, "falhas": falhas, "porcentagem": p}
+    except:
+        return {"total": 0, "sucessos": 0, "falhas": 0, "porcentagem": 0}
@@ -0,0 +1,116 @@
+# Importa módulos padrão para threads e decorators
+import threading
+from functools import wraps
+from concurrent.futures import ThreadPoolExecutor
+
+# Importa jsonify para a resposta de "agente ocupado"
+from flask import jsonify
+
+# Servidor WSGI do werkzeug (já vem com o Flask), usado quando o waitress não está disponível
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+# Importa configurações do servidor HTTP
+from .config import SERVIDOR_THREADS_PESADAS, SERVIDOR_TIMEOUT_CONEXAO
+
+# Importa o log do agente
+from .utils import log_debug
+
+# Limite global de operações pesadas (compartilhado com missões e pré-preparo)
+from .politica import tentar_operacao_pesada, liberar_operacao_pesada
+
+# Waitress é opcional: se estiver no build, é o servidor preferido no modo PRODUCAO
+try:
+    import waitress
+    HAS_WAITRESS = True
+except ImportError:
+    HAS_WAITRESS = False
+
+# ==========================================
+# ISOLAMENTO DAS ROTAS PESADAS
+# ==========================================
+# Rotas pesadas disputam um número limitado de vagas; assim sempre sobram
+# threads para as sondas leves (/status) mesmo com isql ou download em curso.
+_vagas_pesadas = threading.BoundedSemaphore(SERVIDOR_THREADS_PESADAS)
+
+
+def configurar_vagas_pesadas(qtd):
+    """Redefine o limite de requisições pesadas simultâneas (chamar antes de servir)."""
+    global _vagas_pesadas
+    _vagas_pesadas = threading.BoundedSemaphore(max(1, qtd))
+
+
+def rota_pesada(func):
+    """
+    Decorator para rotas pesadas: sem vaga livre responde HTTP 503 na hora.
+    Esperar pela vaga prenderia uma thread do pool e, com várias esperas
+    simultâneas, as sondas leves ficariam sem thread para atendê-las.
+    A rota também ocupa uma vaga do limite global de operações pesadas
+    (POLITICA_PESADAS_MAX), o mesmo das missões e do pré-preparo.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        vagas = _vagas_pesadas
+        if not vagas.acquire(blocking=False):
+            log_debug(f"Rota pesada recusada (agente ocupado): {func.__name__}")
+            return jsonify({"resultado": "ERRO", "status": "OCUPADO", "detalhe": "Agente ocupado, tente novamente"}), 503
+        if not tentar_operacao_pesada():
+            vagas.release()
+            log_debug(f"Rota pesada recusada (limite de operações pesadas): {func.__name__}")
+            return jsonify({"resultado": "ERRO", "status": "OCUPADO", "detalhe": "Agente ocupado com instalação, tente novamente"}), 503
+        try:
+            return func(*args, **kwargs)
+        finally:
+            liberar_operacao_pesada()
+            vagas.release()
+    return wrapper
+
+
+# ==========================================
+# SERVIDOR DE PRODUÇÃO (fallback werkzeug)
+# ==========================================
+class _HandlerKeepAlive(WSGIRequestHandler):
+    # HTTP/1.1 habilita keep-alive; o timeout encerra conexões ociosas e clientes lentos
+    protocol_version = "HTTP/1.1"
+    timeout = SERVIDOR_TIMEOUT_CONEXAO
+
+
+class ServidorPool(BaseWSGIServer):
+    """
+    Servidor WSGI do werkzeug atendendo cada conexão em um pool fixo de threads
+    (em vez de uma thread nova por conexão como no servidor de desenvolvimento).
+    """
+
+    def __init__(self, host, port, app, threads):
+        super().__init__(host, port, app, handler=_HandlerKeepAlive)
+        self.pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="CIGS_HTTP")
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._atender, request, client_address)
+
+    def _atender(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False)
+
+
+def servir_producao(app, host, porta, threads):
+    """Serve a aplicação em modo produção (waitress se disponível, senão pool werkzeug)."""
+    if HAS_WAITRESS:
+        log_debug(f"Servidor HTTP: waitress ({threads} threads)")
+        waitress.serve(app, host=host, port=porta, threads=threads,
+                       channel_timeout=SERVIDOR_TIMEOUT_CONEXAO, ident="CIGS_Agent")
+        return
+
+    log_debug(f"Servidor HTTP: pool werkzeug ({threads} threads)")
+    servidor = ServidorPool(host, porta, app, threads)
+    try:
+        servidor.serve_forever()
+    finally:
+        servidor.server_close()
@@ -1,17 +1,52 @@
 # Importa módulos do Python para manipulação de arquivos, processos, downloads etc.
 import os
 import sys
-import requests
 import subprocess
 import glob
 import shutil
 from datetime import datetime
+from urllib.parse import urlparse
 
 # Importa configurações e caminhos principais do sistema
-from .config import PASTA_BASE, PASTA_DOWNLOAD, UNRAR_PATH, MAPA_RAIZ, get_caminho_atualizador
+from .config import PASTA_BASE, PASTA_DOWNLOAD, MAPA_RAIZ, AGENDADOR_MODO, ARQUIVO_LOG_EXECUCAO, get_caminho_atualizador
 
 # Importa utilidades (log e permissões)
-from .utils import log_debug, ajustar_permissoes
+from .utils import log_debug, ajustar_permissoes, prioridade_baixa
+
+# Política de uso de recursos (limite de banda, prioridade e operações pesadas)
+from .politica import operacao_pesada, instalar_com_baixa_prioridade
+
+# Importa o cache do config.ini (invalidado quando o agente reescreve o arquivo)
+from .ini_cache import invalidar_config_sistema
+
+# Relatório de deploy servido pelo índice incremental do CIGS_debug.log
+from .relatorio import analisar_relatorio_deploy
+
+# Motor de download (retomada, segmentos e verificação)
+from .download import baixar_arquivo
+
+# Extração dos pacotes (ZIP/TAR/7z no processo, RAR pelo UnRAR)
+from .extracao import formato_pacote, extrair_pacote, baixar_e_extrair, FORMATOS_STREAM
+
+# Cache local de pacotes (evita baixar de novo o mesmo pacote)
+from .cache_pacotes import buscar_pacote, guardar_pacote
+
+# Pacotes pré-preparados antes da missão
+from .preparo import pacote_preparado, marcar_instalado
+
+# Distribuição do pacote extraído para as pastas alvo (lista única de arquivos, cópia paralela)
+from .instalacao import (listar_arquivos, instalar_em_alvos, montar_manifesto_pacote,
+                         salvar_manifesto_pacote, carregar_manifesto_pacote, verificar_alvo)
+
+# Pacote delta (só as diferenças para a versão instalada)
+from .delta import reconstruir_por_delta, impressao_manifesto
+
+# Agenda interna do agente (alternativa ao schtasks)
+from .agendador import instante_missao, agendar_missao, cancelar_agendadas
+
+# Registro das tarefas/launchers criados pelo agente e o job que os criou
+from .registro_tarefas import registrar_tarefa, remover_tarefa, listar_tarefas
+from .jobs import job_atual
 
 def sanitizar_extracao(destino):
     """
@@ -78,6 +113,7 @@ def descomentar_clientes_ini(sistema):
         if alterado:
             with open(ini_path, 'w', encoding='utf-8') as f:
                 f.writelines(linhas)
+            invalidar_config_sistema(sistema)
             return True, 'Clientes descomentados com sucesso!'
         return True, 'Nenhum cliente estava comentado.'
     except Exception as e:
@@ -107,7 +143,226 @@ def limpar_logs_cloudup(sistema):
 # ==========================================
 # FUNÇÃO PRINCIPAL DE AGENDAMENTO E CÓPIA
 # ==========================================
-def agendar_tarefa_universal(url, nome_arquivo, data_hora, usuario, senha, start_in, sistema, modo, script_nome="Executa.bat", script_args=""):
+def _recriar_pasta(pasta):
+    if os.path.exists(pasta):
+        shutil.rmtree(pasta, ignore_errors=True)
+    os.makedirs(pasta)
+
+
+def _preparar_por_delta(delta_url, delta_sha256, sistema, pasta_instalada, temp_extract, progresso, progresso_download,
+                        politica=None):
+    """
+    Baixa o pacote delta e monta em temp_extract a versão nova sobre a versão
+    instalada em pasta_instalada (base = manifesto gravado na última instalação).
+
+    Returns:
+        list | None: manifesto conferido do pacote montado; None = usar o pacote completo
+    """
+    base = carregar_manifesto_pacote(sistema)
+    if not base:
+        log_debug("Delta ignorado: sem manifesto da versao instalada", sistema)
+        return None
+
+    caminho_delta = os.path.join(PASTA_DOWNLOAD, os.path.basename(urlparse(delta_url).path) or "pacote.cigsdelta")
+    log_debug("Baixando pacote delta...", sistema)
+    progresso("DOWNLOAD", 10, "Baixando pacote delta")
+    ok, msg, estat = baixar_arquivo(delta_url, caminho_delta, sha256=delta_sha256,
+                                    progresso=progresso_download, sistema=sistema, politica=politica)
+    if not ok:
+        log_debug(f"Delta indisponivel ({msg}), usando pacote completo", sistema)
+        return None
+    progresso("DOWNLOAD", 40, "Pacote delta baixado", download=dict(estat, delta=True))
+
+    try:
+        _recriar_pasta(temp_extract)
+        progresso("EXTRACAO", 40, "Aplicando pacote delta")
+        ok, msg, esperado = reconstruir_por_delta(caminho_delta, base["arquivos"], pasta_instalada, temp_extract, sistema)
+        if ok:
+            # Verificação completa: o pacote montado tem que bater com o manifesto da versão nova
+            progresso("VERIFICACAO", 55, "Conferindo pacote montado pelo delta")
+            manifesto = montar_manifesto_pacote(temp_extract, listar_arquivos(temp_extract))
+            if impressao_manifesto(manifesto) == impressao_manifesto(esperado):
+                return manifesto
+            msg = "pacote montado nao confere com o manifesto do delta"
+        log_debug(f"Delta descartado ({msg}), usando pacote completo", sistema)
+        return None
+    except Exception as e:
+        log_debug(f"Delta descartado ({e}), usando pacote completo", sistema)
+        return None
+    finally:
+        try:
+            os.remove(caminho_delta)
+        except OSError:
+            pass
+
+
+def _baixar_e_instalar(url, nome_arquivo, sistema, pasta_destino, progresso, sha256=None, tamanho=None,
+                       delta_url=None, delta_sha256=None, politica=None):
+    """
+    Modo COMPLETO: obtém o pacote (delta, pré-preparo, cache ou download), extrai,
+    instala nas pastas alvo e verifica por hash.
+
+    Returns:
+        tuple: (ok, mensagem)
+    """
+    if not os.path.exists(PASTA_DOWNLOAD):
+        os.makedirs(PASTA_DOWNLOAD)
+    caminho_rar = os.path.join(PASTA_DOWNLOAD, nome_arquivo)
+    temp_extract = os.path.join(PASTA_BASE, "Temp_Install")
+    em_cache = True  # nada a apagar quando o pacote vem do delta
+    formato = formato_pacote(nome_arquivo)
+    extraido = False  # TAR pode ser extraído durante o próprio download
+
+    def progresso_download(baixados, total):
+        mb = baixados / (1024 * 1024)
+        if total:
+            progresso("DOWNLOAD", 10 + int(30 * baixados / total), f"Baixando pacote: {mb:.1f} de {total / (1024 * 1024):.1f} MB")
+        else:
+            progresso("DOWNLOAD", 10, f"Baixando pacote: {mb:.1f} MB")
+
+    # Pacote delta (opcional): baixa só as diferenças e monta a versão nova sobre a instalada
+    manifesto_delta = None
+    if delta_url:
+        manifesto_delta = _preparar_por_delta(delta_url, delta_sha256, sistema, pasta_destino,
+                                              temp_extract, progresso, progresso_download, politica)
+
+    if manifesto_delta is None:
+        log_debug("Baixando pacote...", sistema)
+        progresso("DOWNLOAD", 10, "Baixando pacote")
+
+        # Pacote pré-preparado para esta missão; senão re-disparo, nova tentativa ou o
+        # mesmo pacote para outro sistema: usa o cache local
+        caminho_preparado, em_cache = pacote_preparado(sistema, url, sha256=sha256)
+        caminho_cache = caminho_preparado or buscar_pacote(url, sha256=sha256, tamanho=tamanho)
+        if caminho_preparado:
+            caminho_rar = caminho_preparado
+            log_debug(f"Pacote pré-preparado: {caminho_rar}", sistema)
+            progresso("DOWNLOAD", 40, "Pacote pré-preparado", download={"cache": True, "preparado": True})
+        elif caminho_cache:
+            em_cache = True
+            caminho_rar = caminho_cache
+            log_debug(f"Pacote encontrado no cache local: {caminho_rar}", sistema)
+            progresso("DOWNLOAD", 40, "Pacote encontrado no cache local", download={"cache": True})
+        else:
+            ok = False
+            if formato in FORMATOS_STREAM:
+                # Extrai enquanto baixa; se algo falhar, segue pelo download com retomada
+                _recriar_pasta(temp_extract)
+                ok, msg, estat = baixar_e_extrair(url, caminho_rar, temp_extract, formato, sha256=sha256,
+                                                  tamanho=tamanho, progresso=progresso_download, sistema=sistema,
+                                                  politica=politica)
+                extraido = ok
+            if not ok:
+                # Download com retomada (Range), segmentação para pacotes grandes e verificação opcional
+                ok, msg, estat = baixar_arquivo(url, caminho_rar, sha256=sha256, tamanho=tamanho,
+                                                progresso=progresso_download, sistema=sistema, politica=politica)
+            progresso("DOWNLOAD", 40, msg, download=estat)
+            if not ok:
+                log_debug(f"Falha no download: {msg}", sistema)
+                return False, msg
+            log_debug(f"Download OK: {estat.get('tamanho', 0)} bytes em {estat['segundos']}s ({estat['mb_s']} MB/s"
+                      f"{', extraido durante o download' if extraido else ', retomado de ' + str(estat.get('retomado_de', 0))})", sistema)
+            caminho_rar, em_cache, _ = guardar_pacote(url, caminho_rar, nome_arquivo,
+                                                   sha256=estat.get("sha256"), etag=estat.get("etag"))
+
+    try:
+        if manifesto_delta is None and not extraido:
+            _recriar_pasta(temp_extract)
+
+            log_debug(f"Extraindo para temporario ({formato})...", sistema)
+            progresso("EXTRACAO", 40, "Extraindo pacote")
+            ok, msg = extrair_pacote(caminho_rar, temp_extract, formato)
+            if not ok:
+                log_debug(f"Falha na extração: {msg}", sistema)
+                shutil.rmtree(temp_extract, ignore_errors=True)
+                return False, msg
+
+        # Lógica de correção de pasta (anti-subpasta); o delta já sai na estrutura certa
+        items = os.listdir(temp_extract)
+        source_folder = temp_extract
+        if manifesto_delta is None and len(items) == 1 and os.path.isdir(os.path.join(temp_extract, items[0])):
+            source_folder = os.path.join(temp_extract, items[0])
+            log_debug(f"Subpasta detectada ({items[0]}). Ajustando origem.", sistema)
+        
+        # Identifica o diretório pai (ex: C:\Atualiza\CloudUp\CloudUpCmd\AC\Atualizadores)
+        base_atualizadores = os.path.dirname(pasta_destino)
+        pasta_alvo = []
+        if os.path.exists(base_atualizadores):
+            for item in os.listdir(base_atualizadores):
+                caminho_completo = os.path.join(base_atualizadores, item)
+                # Se for pasta e começar com o nome do sistema (ex: AC, AC1, AC_CONTABIL)
+                if os.path.isdir(caminho_completo) and item.upper().startswith(sistema.upper()):
+                    pasta_alvo.append(caminho_completo)
+
+        # Fallback caso não ache nada, usa o destino original
+        if not pasta_alvo:
+            pasta_alvo = [pasta_destino]
+        # O destino da ordem é o alvo principal (recebe os arquivos movidos do temporário)
+        elif pasta_destino in pasta_alvo:
+            pasta_alvo.remove(pasta_destino)
+            pasta_alvo.insert(0, pasta_destino)
+
+        if manifesto_delta is not None:
+            # Pacote montado pelo delta já foi conferido por hash
+            manifesto = manifesto_delta
+        else:
+            # Lista única dos arquivos extraídos (reaproveitada na cópia e na verificação)
+            arquivos = listar_arquivos(source_folder)
+            log_debug(f'Total de arquivos extraidos identificados: {len(arquivos)}', sistema)
+
+            # Manifesto (arquivo, tamanho, hash) do pacote, antes de mover os arquivos do temporário
+            progresso("VERIFICACAO", 55, "Gerando manifesto do pacote")
+            manifesto = montar_manifesto_pacote(source_folder, arquivos)
+        salvar_manifesto_pacote(sistema, nome_arquivo, manifesto)
+
+        def progresso_copia(concluidos, total, resultado):
+            progresso("COPIA", 60 + int(25 * concluidos / total), f"Copiado para {resultado['alvo']}")
+
+        progresso("COPIA", 60, f"Copiando para {len(pasta_alvo)} pasta(s)")
+        # Cópia delta: só arquivos novos ou alterados em cada pasta
+        estat_alvos = instalar_em_alvos(source_folder, manifesto, pasta_alvo, progresso=progresso_copia, sistema=sistema)
+        iguais = {r["alvo"]: r.pop("iguais") for r in estat_alvos}
+        ignorado_mb = sum(r["bytes_ignorados"] for r in estat_alvos) // (1024 * 1024)
+        progresso("COPIA", 85, f"Pacote instalado em {len(pasta_alvo)} pasta(s), {ignorado_mb} MB sem alteração",
+                  instalacao=estat_alvos)
+
+        # Verificação de Integridade: tamanho e hash de cada arquivo do manifesto em cada alvo
+        verificacao = []
+        for alvo in pasta_alvo:
+            resultado = verificar_alvo(alvo, manifesto, ja_conferidos=iguais.get(alvo))
+            verificacao.append(resultado)
+            if resultado["ok"]:
+                log_debug(f"[✅ CHECKLIST] Integridade confirmada no destino: {alvo} ({resultado['segundos']}s)", sistema)
+            else:
+                log_debug(f"[⚠️ ALERTA] Divergencia em {alvo}: {resultado['total_ausentes']} ausentes, "
+                          f"{resultado['total_corrompidos']} corrompidos de {resultado['arquivos']}", sistema)
+        progresso("VERIFICACAO", 85, "Integridade conferida", verificacao=verificacao)
+        if manifesto_delta is None:
+            marcar_instalado(sistema, url, sha256)
+        
+        shutil.rmtree(temp_extract, ignore_errors=True)
+        
+        # Pacote no cache fica para os próximos disparos (o limite de disco cuida da limpeza)
+        if not em_cache:
+            try:
+                os.remove(caminho_rar)
+            except:
+                pass
+
+    except Exception as e:
+        log_debug(f"Erro na Instalação: {e}", sistema)
+        return False, f"Erro Install: {e}"
+
+    return True, "Pacote instalado"
+
+
+def agendar_tarefa_universal(url, nome_arquivo, data_hora, usuario, senha, start_in, sistema, modo, script_nome="Executa.bat", script_args="", progresso=None, sha256=None, tamanho=None,
+                             delta_url=None, delta_sha256=None, politica=None):
+    # progresso(etapa, pct, detalhe): callback opcional do job assíncrono
+    # politica: override da política de recursos enviado pela central (ver cigs_core.politica)
+    if progresso is None:
+        progresso = lambda *a, **k: None
+
     # Log inicial
     log_debug(f"--- Missao: {sistema} | Script: {script_nome} ---", sistema)
     
@@ -129,80 +384,16 @@ def agendar_tarefa_universal(url, nome_arquivo, data_hora, usuario, senha, start
     # 2. OPERAÇÃO DE DOWNLOAD E EXTRAÇÃO (se modo COMPLETO)
     # ====================================================
     if modo == "COMPLETO":
-        if not os.path.exists(PASTA_DOWNLOAD):
-            os.makedirs(PASTA_DOWNLOAD)
-        caminho_rar = os.path.join(PASTA_DOWNLOAD, nome_arquivo)
+        def aguardando_vaga():
+            progresso("FILA", 5, "Aguardando vaga de operação pesada")
 
-        try:
-            log_debug("Baixando pacote...", sistema)
-            r = requests.get(url, stream=True, timeout=300)
-            if r.status_code == 200:
-                with open(caminho_rar, 'wb') as f:
-                    for chunk in r.iter_content(8192):
-                        f.write(chunk)
-            else:
-                return False, f"HTTP Download {r.status_code}"
-        except Exception as e:
-            return False, f"Erro Download: {e}"
-
-        try:
-            temp_extract = os.path.join(PASTA_BASE, "Temp_Install")
-            if os.path.exists(temp_extract):
-                shutil.rmtree(temp_extract, ignore_errors=True)
-            os.makedirs(temp_extract)
-
-            log_debug("Extraindo para temporario...", sistema)
-            subprocess.run(f'"{UNRAR_PATH}" x -y "{caminho_rar}" "{temp_extract}\\"', shell=True, stdout=subprocess.DEVNULL)
-
-            # Lógica de correção de pasta (anti-subpasta)
-            items = os.listdir(temp_extract)
-            source_folder = temp_extract
-            if len(items) == 1 and os.path.isdir(os.path.join(temp_extract, items[0])):
-                source_folder = os.path.join(temp_extract, items[0])
-                log_debug(f"Subpasta detectada ({items[0]}). Ajustando origem.", sistema)
-            
-            # Identifica o diretório pai (ex: C:\Atualiza\CloudUp\CloudUpCmd\AC\Atualizadores)
-            base_atualizadores = os.path.dirname(pasta_destino)
-            pasta_alvo = []
-            if os.path.exists(base_atualizadores):
-                for item in os.listdir(base_atualizadores):
-                    caminho_completo = os.path.join(base_atualizadores, item)
-                    # Se for pasta e começar com o nome do sistema (ex: AC, AC1, AC_CONTABIL)
-                    if os.path.isdir(caminho_completo) and item.upper().startswith(sistema.upper()):
-                        pasta_alvo.append(caminho_completo)
-
-            # Fallback caso não ache nada, usa o destino original
-            if not pasta_alvo:
-                pasta_alvo = [pasta_destino]
-
-            arquivos_na_origem = sum([len(files) for r, d, files in os.walk(source_folder)])
-            log_debug(f'Total de arquivos extraidos identificados: {arquivos_na_origem}', sistema)
-
-
-            # Dispara a cópia par todas as pastas encontradas
-            for alvo in pasta_alvo:
-                log_debug(f"Copiando arquivos para: {alvo}", sistema)
-                # O Robocopy (/E copia subpastas, /IS inclui arquivos iguais que foram modificados, /NFL /NDL esconde logs desnecessários)
-                cmd_copy = f'robocopy "{source_folder}" "{alvo}" /E /IS /NFL /NDL /NJH /NJS'
-                subprocess.run(cmd_copy, shell=True, stdout=subprocess.DEVNULL)
-
-                # Verificação de Integridade
-                arquivos_no_alvo = sum([len(files) for r, d, files in os.walk(alvo)])
-                if arquivos_no_alvo >= arquivos_na_origem:
-                    log_debug(f"[✅ CHECKLIST] Integridade confirmada no destino: {alvo}", sistema)
-                else:
-                    log_debug(f"[⚠️ ALERTA] Possivel falta de arquivos! Origem: {arquivos_na_origem}, Destino: {arquivos_no_alvo}", sistema)
-            
-            shutil.rmtree(temp_extract, ignore_errors=True)
-            
-            try:
-                os.remove(caminho_rar)
-            except:
-                pass
-
-        except Exception as e:
-            log_debug(f"Erro na Instalação: {e}", sistema)
-            return False, f"Erro Install: {e}"
+        # Limite global de operações pesadas e instalação em prioridade baixa (política ou ordem)
+        with operacao_pesada("Instalação", sistema, aguardando_vaga), \
+                prioridade_baixa(instalar_com_baixa_prioridade(politica)):
+            ok, msg = _baixar_e_instalar(url, nome_arquivo, sistema, pasta_destino, progresso, sha256, tamanho,
+                                         delta_url, delta_sha256, politica)
+        if not ok:
+            return False, msg
 
     # ======================================
     # 3. GERAR BAT DE EXECUÇÃO
@@ -214,8 +405,9 @@ def agendar_tarefa_universal(url, nome_arquivo, data_hora, usuario, senha, start
     else:
         pasta_scripts = pasta_destino  # fallback
 
+    progresso("BAT", 85, "Gerando Launcher")
     bat_path = os.path.join(PASTA_BASE, f"Launcher_{sistema}.bat")
-    log_bat = r"C:\CIGS\execucao.log"
+    log_bat = ARQUIVO_LOG_EXECUCAO
     target_script = os.path.join(pasta_scripts, script_nome)
 
     conteudo_bat = f"""@echo off
@@ -235,9 +427,26 @@ exit
     except:
         return False, "Erro criar BAT"
 
+    task_name = f"CIGS_Update_{sistema.upper()}"
+
+    # ======================================
+    # 4a. AGENDA INTERNA DO AGENTE (sem schtasks)
+    # ======================================
+    if AGENDADOR_MODO == "INTERNO":
+        progresso("AGENDAMENTO", 90, "Registrando na agenda do agente")
+        try:
+            executar_em = instante_missao(data_hora)
+        except ValueError:
+            return False, "Data/hora inválida (use DD/MM/AAAA HH:MM)"
+        ok, msg = agendar_missao(task_name, sistema, bat_path, executar_em, usuario)
+        if ok:
+            registrar_tarefa(task_name, sistema, data_hora, bat_path, job_atual(), "INTERNO", usuario)
+        return ok, msg
+
     # ======================================
-    # 4. AGENDAR NO WINDOWS (Task Scheduler)
+    # 4b. AGENDAR NO WINDOWS (Task Scheduler)
     # ======================================
+    progresso("AGENDAMENTO", 90, "Criando tarefa no Windows")
     try:
         if " " in data_hora:
             d_str, h_str = data_hora.split(" ")
@@ -245,8 +454,6 @@ exit
             d_str = datetime.now().strftime("%d/%m/%Y")
             h_str = "03:00"
     
-        task_name = f"CIGS_Update_{sistema.upper()}"
-    
         # Monta as duas versoes do comando (Com Usuario e com SYSTEM)
         cmd_sch_user = f'schtasks /create /tn "{task_name}" /tr "{bat_path}" /sc ONCE /sd {d_str} /st {h_str} /ru "{usuario}" /rp "{senha}" /rl HIGHEST /f'
         cmd_sch_sys = f'schtasks /create /tn "{task_name}" /tr "{bat_path}" /sc ONCE /sd {d_str} /st {h_str} /ru SYSTEM /rl HIGHEST /f'
@@ -272,6 +479,7 @@ exit
     
         if res.returncode == 0:
             log_debug(f"Agendamento realizado com SUCESSO: {task_name} com usuário {usuario if usuario else 'SYSTEM'}", sistema)
+            registrar_tarefa(task_name, sistema, f"{d_str} {h_str}", bat_path, job_atual(), "SCHTASKS", usuario)
             return True, "Agendado"
         else:
             # --- NOVO: TRADUTOR DE ERROS DO SCHTASKS ---
@@ -333,69 +541,44 @@ def analisar_log_backup(sistema, data_alvo=None):
     except:
         return {"erro": "Erro Leitura"}
 
-def cancelar_missao():
-    log_debug("Iniciando cancelamento de missoes...")
-    try:
-        # 1. Lista todas as tarefas em formato CSV
-        res = subprocess.run('schtasks /query /fo CSV /nh', shell=True, capture_output=True, text=True)
-        if res.returncode != 0: return "Erro ao ler tarefas"
-        
-        count = 0
-        # 2. Varre linha por linha procurando "CIGS_"
-        for linha in res.stdout.splitlines():
-            if "CIGS_" in linha:
-                # Pega o nome da tarefa (primeira coluna, remove aspas)
-                nome_tarefa = linha.split(',')[0].strip('"')
-                log_debug(f"Matando tarefa: {nome_tarefa}")
-                
-                # 3. Deleta especificamente essa tarefa
-                subprocess.run(f'schtasks /delete /tn "{nome_tarefa}" /f', shell=True)
-                count += 1
-        
-        if count == 0: return "Nenhuma tarefa encontrada."
-        return f"Abatidas {count} tarefas CIGS."
-        
-    except Exception as e:
-        return f"Erro Abortar: {str(e)}"
-
-def analisar_relatorio_deploy(sistema, data_filtro=None):
+def cancelar_missao(sistema=None, job_id=None):
     """
-    Lê o log do agente (CIGS_debug.log) e conta sucessos/erros 
-    FILTRANDO pelo sistema (ex: [AC], [AG]).
+    Cancela apenas as tarefas que o próprio agente registrou (todas, só as do
+    sistema ou só a criada pelo job). Agenda interna: cancelamento em memória;
+    schtasks: um /delete por tarefa registrada, sem varrer o Agendador do Windows.
     """
-    # Importa aqui para evitar erro circular ou garanta que ARQUIVO_LOG_DEBUG está importado no topo
-    from .config import ARQUIVO_LOG_DEBUG 
-    
-    total = 0; sucessos = 0; falhas = 0
-    
-    if not os.path.exists(ARQUIVO_LOG_DEBUG):
-        return {"total": 0, "sucessos": 0, "falhas": 0, "porcentagem": 0}
-
-    # Formata data para bater com o log (YYYY-MM-DD)
-    data_fmt = None
-    if data_filtro and len(data_filtro) == 8:
-        data_fmt = f"{data_filtro[:4]}-{data_filtro[4:6]}-{data_filtro[6:]}"
-
+    filtro = f" (sistema {sistema})" if sistema else f" (job {job_id})" if job_id else ""
+    log_debug(f"Iniciando cancelamento de missoes{filtro}...")
     try:
-        with open(ARQUIVO_LOG_DEBUG, "r", encoding="utf-8") as f:
-            for line in f:
-                # 1. Filtra pelo sistema (A chave do sucesso!)
-                if f"[{sistema}]" not in line:
-                    continue
-                
-                # 2. Filtra pela data (se informada)
-                if data_fmt and data_fmt not in line:
+        tarefas = listar_tarefas(sistema=sistema, job_id=job_id)
+        if not tarefas: return "Nenhuma tarefa encontrada."
+
+        count = 0
+        falhas = []
+        for tarefa in tarefas:
+            nome_tarefa = tarefa["nome"]
+            log_debug(f"Matando tarefa: {nome_tarefa}", tarefa["sistema"])
+            if tarefa["agendador"] == "INTERNO":
+                cancelar_agendadas(nome=nome_tarefa)
+            else:
+                res = subprocess.run(f'schtasks /delete /tn "{nome_tarefa}" /f', shell=True, capture_output=True, text=True)
+                erro_bruto = (res.stderr or res.stdout or "").lower()
+                # Tarefa apagada por fora do agente: só sai do registro
+                if res.returncode != 0 and not any(t in erro_bruto for t in ("não existe", "does not exist", "cannot find", "não foi possível localizar")):
+                    log_debug(f"Falha ao remover {nome_tarefa}: {erro_bruto.strip()}", tarefa["sistema"])
+                    falhas.append(nome_tarefa)
                     continue
 
-                # 3. Contabiliza
-                if "Agendamento realizado com SUCESSO" in line:
-                    sucessos += 1
-                    total += 1
-                elif "Erro" in line or "Falha" in line:
-                    falhas += 1
-                    total += 1
-        
-        p = int((sucessos/total)*100) if total > 0 else 0
-        return {"total": total, "sucessos": sucessos, "falhas": falhas, "porcentagem": p}
-    except:
-        return {"total": 0, "sucessos": 0, "falhas": 0, "porcentagem": 0}
\ No newline at end of file
+            # Tarefa removida: o launcher dela não é mais necessário
+            remover_tarefa(nome_tarefa)
+            try:
+                os.remove(tarefa["bat"])
+            except OSError:
+                pass
+            count += 1
+
+        if falhas: return f"Abatidas {count} tarefas CIGS. Falharam: {', '.join(falhas)}"
+        return f"Abatidas {count} tarefas CIGS."
+
+    except Exception as e:
+        return f"Erro Abortar: {str(e)}"
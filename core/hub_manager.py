@@ -0,0 +1,262 @@
+"""
+CIGS Hub Manager - Canal persistente dos agentes com a Central
+Agentes com CANAL_HUB configurado conectam aqui (uma conexão TCP de saída cada)
+e enviam heartbeats, mudanças de status e fim de jobs; a Central manda comandos
+pela mesma conexão. Agentes fora do hub continuam no polling HTTP da porta 5580.
+"""
+
+import os
+import json
+import time
+import uuid
+import socket
+import logging
+import threading
+import socketserver
+from collections import deque
+
+# Porta padrão do hub na Central
+PORTA_HUB = 5582
+
+# Segredo apresentado pelos agentes (CANAL_TOKEN no config do agente); vazio = aceita qualquer agente
+TOKEN_HUB = os.environ.get("CIGS_HUB_TOKEN", "")
+
+# Tempo (s) para o agente se apresentar depois de conectar
+TIMEOUT_APRESENTACAO = 10
+
+# Eventos de fim de job guardados por agente
+EVENTOS_POR_AGENTE = 50
+
+
+class _HandlerHub(socketserver.StreamRequestHandler):
+    """Uma conexão de agente: apresentação, depois uma mensagem JSON por linha até cair."""
+
+    def setup(self):
+        super().setup()
+        self.lock_envio = threading.Lock()
+
+    def enviar(self, mensagem):
+        dados = (json.dumps(mensagem, ensure_ascii=False) + "\n").encode('utf-8')
+        with self.lock_envio:
+            self.wfile.write(dados)
+
+    def fechar(self):
+        try:
+            self.request.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def handle(self):
+        hub = self.server.hub
+        ip = self.client_address[0]
+        self.request.settimeout(TIMEOUT_APRESENTACAO)
+        try:
+            ola = json.loads(self.rfile.readline() or b"{}")
+        except (OSError, ValueError):
+            return
+        if ola.get("tipo") != "ola" or (hub.token and ola.get("token") != hub.token):
+            logging.warning(f"Hub: conexão recusada de {ip} (apresentação inválida)")
+            return
+
+        # Sem nenhuma mensagem em 3 heartbeats o agente é dado como perdido
+        self.request.settimeout(max(ola.get("heartbeat") or 15, 1) * 3)
+        hub._conectar(ip, self, ola)
+        try:
+            for linha in self.rfile:
+                hub._receber(ip, self, json.loads(linha))
+        except (OSError, ValueError):
+            pass
+        finally:
+            hub._desconectar(ip, self)
+
+
+class _ServidorHub(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class CIGSHub:
+    """
+    Hub do canal persistente.
+    estado(ip) devolve o último status/heartbeat de um agente conectado (None = fora
+    do hub, use HTTP); enviar_comando() chama uma rota /cigs/... do agente pela
+    conexão aberta; ouvintes recebem (ip, mensagem) a cada evento.
+    """
+
+    def __init__(self, porta=PORTA_HUB, token=TOKEN_HUB):
+        self.porta = porta
+        self.token = token
+        self.agentes = {}       # ip -> {agente, versao, hash, conectado, heartbeat, sistemas, eventos...}
+        self.ouvintes = []      # funcao(ip, mensagem): conectado, desconectado, heartbeat, status, job
+        self.lock = threading.Lock()
+        self.servidor = None
+        self._conexoes = {}     # ip -> handler da conexão ativa
+        self._pendentes = {}    # id do comando -> {"ip", "evento", "resposta"}
+        self._aviso_job = threading.Condition(self.lock)
+
+    # ---------------------------------
+    # Servidor TCP
+    # ---------------------------------
+    def iniciar(self):
+        """Sobe o hub (uma vez) em segundo plano."""
+        if self.servidor:
+            return True, f"Hub ativo na porta {self.porta}"
+        try:
+            servidor = _ServidorHub(("0.0.0.0", self.porta), _HandlerHub)
+        except OSError as e:
+            return False, f"Porta {self.porta} indisponível: {e}"
+        servidor.hub = self
+        self.porta = servidor.server_address[1]
+        threading.Thread(target=servidor.serve_forever, name="CIGS_Hub", daemon=True).start()
+        self.servidor = servidor
+        logging.info(f"Hub: ativo na porta {self.porta}")
+        return True, f"Hub ativo na porta {self.porta}"
+
+    def parar(self):
+        if self.servidor:
+            self.servidor.shutdown()
+            self.servidor.server_close()
+            self.servidor = None
+        with self.lock:
+            conexoes = list(self._conexoes.values())
+        for handler in conexoes:
+            handler.fechar()
+
+    # ---------------------------------
+    # Mensagens dos agentes
+    # ---------------------------------
+    def _conectar(self, ip, handler, ola):
+        with self.lock:
+            anterior = self._conexoes.get(ip)
+            self._conexoes[ip] = handler
+            estado = self.agentes.setdefault(ip, {"sistemas": {}, "heartbeat": {},
+                                                  "eventos": deque(maxlen=EVENTOS_POR_AGENTE)})
+            estado.update(agente=ola.get("agente"), versao=ola.get("versao"), porta_api=ola.get("porta_api"),
+                          conectado=True, conectado_em=time.time(), ultimo_contato=time.time())
+        # Agente reconectou antes de a conexão antiga cair por timeout
+        if anterior:
+            anterior.fechar()
+        logging.info(f"Hub: agente {ip} conectado ({ola.get('agente')}, {ola.get('versao')})")
+        self._avisar(ip, {"tipo": "conectado", "agente": ola.get("agente"), "versao": ola.get("versao")})
+
+    def _desconectar(self, ip, handler):
+        with self.lock:
+            if self._conexoes.get(ip) is not handler:
+                return
+            del self._conexoes[ip]
+            self.agentes[ip]["conectado"] = False
+            # Comandos sem resposta falham na hora (em vez de esperar o timeout)
+            for comando_id, pendente in list(self._pendentes.items()):
+                if pendente["ip"] == ip:
+                    pendente["resposta"] = {"codigo": None, "erro": "Agente desconectou do hub"}
+                    pendente["evento"].set()
+                    del self._pendentes[comando_id]
+            self._aviso_job.notify_all()
+        logging.info(f"Hub: agente {ip} desconectado")
+        self._avisar(ip, {"tipo": "desconectado"})
+
+    def _receber(self, ip, handler, mensagem):
+        tipo = mensagem.get("tipo")
+        pendente = None
+        with self.lock:
+            estado = self.agentes[ip]
+            estado["ultimo_contato"] = time.time()
+            if tipo == "heartbeat":
+                estado["heartbeat"] = {k: v for k, v in mensagem.items() if k not in ("tipo", "enviado")}
+            elif tipo == "status":
+                estado["sistemas"] = mensagem.get("sistemas") or {}
+                estado["versao"] = mensagem.get("version") or estado.get("versao")
+                estado["hash"] = mensagem.get("hash")
+            elif tipo == "job":
+                estado["eventos"].append(mensagem)
+                self._aviso_job.notify_all()
+            elif tipo == "resposta":
+                pendente = self._pendentes.pop(mensagem.get("id"), None)
+
+        if tipo == "heartbeat":
+            # O agente mede o RTT pelo pong e encerra a sessão se eles pararem de chegar
+            try:
+                handler.enviar({"tipo": "pong", "enviado": mensagem.get("enviado")})
+            except OSError:
+                pass
+        if tipo == "resposta":
+            if pendente:
+                pendente["resposta"] = mensagem
+                pendente["evento"].set()
+            return
+        self._avisar(ip, mensagem)
+
+    def _avisar(self, ip, mensagem):
+        for ouvinte in list(self.ouvintes):
+            try:
+                ouvinte(ip, mensagem)
+            except Exception as e:
+                logging.error(f"Hub: falha no ouvinte de eventos: {e}")
+
+    # ---------------------------------
+    # Consultas e comandos da Central
+    # ---------------------------------
+    def conectado(self, ip):
+        with self.lock:
+            return ip in self._conexoes
+
+    def estado(self, ip):
+        """Cópia do estado do agente conectado; None se ele não está no hub."""
+        with self.lock:
+            if ip not in self._conexoes:
+                return None
+            estado = dict(self.agentes[ip])
+            estado["eventos"] = list(estado["eventos"])
+            return estado
+
+    def listar_agentes(self):
+        """ip -> resumo (agente, versão, conectado, último contato) de todos que já conectaram."""
+        with self.lock:
+            return {ip: {"agente": e.get("agente"), "versao": e.get("versao"), "conectado": e.get("conectado"),
+                         "ultimo_contato": e.get("ultimo_contato")} for ip, e in self.agentes.items()}
+
+    def enviar_comando(self, ip, metodo, rota, corpo=None, params=None, timeout=30):
+        """
+        Chama a rota do agente pela conexão do canal.
+
+        Returns:
+            dict: {"codigo", "corpo" | "texto" | "erro"}; codigo None = sem resposta
+            None: agente fora do hub ou comando não entregue (seguro repetir por HTTP)
+        """
+        comando_id = uuid.uuid4().hex
+        pendente = {"ip": ip, "evento": threading.Event(), "resposta": None}
+        with self.lock:
+            handler = self._conexoes.get(ip)
+            if not handler:
+                return None
+            self._pendentes[comando_id] = pendente
+        try:
+            handler.enviar({"tipo": "comando", "id": comando_id, "metodo": metodo, "rota": rota,
+                            "params": params or {}, "corpo": corpo})
+        except OSError:
+            with self.lock:
+                self._pendentes.pop(comando_id, None)
+            return None
+        if not pendente["evento"].wait(timeout):
+            with self.lock:
+                self._pendentes.pop(comando_id, None)
+            return {"codigo": None, "erro": f"Sem resposta do agente em {timeout}s"}
+        return pendente["resposta"]
+
+    def aguardar_fim_job(self, ip, job_id, timeout):
+        """
+        Espera o evento de fim do job chegar pelo canal.
+        Returns: o job finalizado, ou None (timeout ou agente fora do hub)
+        """
+        limite = time.monotonic() + timeout
+        with self._aviso_job:
+            while True:
+                if ip not in self._conexoes:
+                    return None
+                for evento in self.agentes[ip]["eventos"]:
+                    if (evento.get("job") or {}).get("id") == job_id:
+                        return dict(evento["job"])
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    return None
+                self._aviso_job.wait(restante)
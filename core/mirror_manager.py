@@ -0,0 +1,251 @@
+"""
+CIGS Mirror Manager - Espelho local de pacotes na Central
+A Central baixa o pacote do S3 uma única vez e os agentes puxam dela pela rede local.
+"""
+
+import os
+import json
+import socket
+import hashlib
+import logging
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, urlunparse, quote, unquote
+
+import requests
+
+# Tamanho dos blocos lidos/enviados pelo espelho
+TAMANHO_BLOCO = 256 * 1024
+
+
+class _HandlerEspelho(BaseHTTPRequestHandler):
+    """Serve GET/HEAD /pacotes/<nome> com suporte a Range (uma faixa por requisição)."""
+    protocol_version = "HTTP/1.1"
+    timeout = 60
+
+    def log_message(self, formato, *args):
+        logging.info("Espelho %s - %s", self.client_address[0], formato % args)
+
+    def do_HEAD(self):
+        self._servir(False)
+
+    def do_GET(self):
+        self._servir(True)
+
+    def _responder_vazio(self, codigo, headers=None):
+        self.send_response(codigo)
+        for chave, valor in (headers or {}).items():
+            self.send_header(chave, valor)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _servir(self, enviar_corpo):
+        caminho = unquote(urlparse(self.path).path)
+        if not caminho.startswith("/pacotes/"):
+            return self._responder_vazio(404)
+
+        # Só serve pacotes publicados (nunca monta caminho a partir do que o cliente mandou)
+        pacote = self.server.espelho.obter_pacote(os.path.basename(caminho))
+        if not pacote:
+            return self._responder_vazio(404)
+
+        tamanho = pacote["tamanho"]
+        inicio, fim = 0, tamanho - 1
+        parcial = False
+        faixa = self.headers.get("Range", "")
+        if faixa.startswith("bytes=") and "," not in faixa:
+            a, _, b = faixa[6:].strip().partition("-")
+            try:
+                if a:
+                    inicio = int(a)
+                    fim = min(int(b), tamanho - 1) if b else tamanho - 1
+                else:
+                    # bytes=-N: últimos N bytes
+                    inicio = max(0, tamanho - int(b))
+                parcial = True
+            except ValueError:
+                parcial = False
+            if parcial and (inicio >= tamanho or inicio > fim):
+                return self._responder_vazio(416, {"Content-Range": f"bytes */{tamanho}"})
+
+        self.send_response(206 if parcial else 200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", f'"{pacote["sha256"]}"')
+        self.send_header("Content-Length", str(fim - inicio + 1))
+        if parcial:
+            self.send_header("Content-Range", f"bytes {inicio}-{fim}/{tamanho}")
+        self.end_headers()
+        if not enviar_corpo:
+            return
+
+        restante = fim - inicio + 1
+        try:
+            with open(pacote["caminho"], 'rb') as f:
+                f.seek(inicio)
+                while restante > 0:
+                    bloco = f.read(min(TAMANHO_BLOCO, restante))
+                    if not bloco:
+                        break
+                    self.wfile.write(bloco)
+                    restante -= len(bloco)
+        except (ConnectionError, OSError):
+            # Cliente desconectou no meio (o agente retoma com Range)
+            self.close_connection = True
+
+
+class CIGSMirror:
+    """
+    Espelho de pacotes da Central.
+    preparar_pacote() baixa o link do TopPanel uma vez; iniciar() publica a pasta
+    via HTTP (com Range e clientes simultâneos) e url_para() monta o link do agente.
+    """
+
+    def __init__(self, pasta="espelho_pacotes", porta=5581):
+        self.pasta = pasta
+        self.porta = porta
+        self.pacotes = {}       # nome -> {"caminho", "tamanho", "sha256", "origem", "etag"}
+        self.lock = threading.Lock()
+        self.servidor = None
+        self._carregar()
+
+    # ---------------------------------
+    # Catálogo de pacotes publicados
+    # ---------------------------------
+    def _arquivo_catalogo(self):
+        return os.path.join(self.pasta, "catalogo.json")
+
+    def _carregar(self):
+        try:
+            with open(self._arquivo_catalogo(), 'r', encoding='utf-8') as f:
+                catalogo = json.load(f)
+            self.pacotes = {nome: p for nome, p in catalogo.items() if os.path.exists(p["caminho"])}
+        except Exception:
+            self.pacotes = {}
+
+    def _salvar(self):
+        try:
+            with open(self._arquivo_catalogo() + ".tmp", 'w', encoding='utf-8') as f:
+                json.dump(self.pacotes, f)
+            os.replace(self._arquivo_catalogo() + ".tmp", self._arquivo_catalogo())
+        except Exception as e:
+            logging.error(f"Espelho: falha ao gravar catálogo: {e}")
+
+    def obter_pacote(self, nome):
+        with self.lock:
+            pacote = self.pacotes.get(nome)
+            return dict(pacote) if pacote else None
+
+    # ---------------------------------
+    # Download do pacote original (uma vez)
+    # ---------------------------------
+    @staticmethod
+    def _origem(url):
+        # Link sem a assinatura: o mesmo objeto do S3 com outro link presigned
+        p = urlparse(url)
+        return urlunparse(p._replace(query="", fragment=""))
+
+    @staticmethod
+    def _etag_remoto(url):
+        # GET Range 0-0 (links presigned do S3 não aceitam HEAD)
+        try:
+            r = requests.get(url, headers={"Range": "bytes=0-0"}, stream=True, timeout=15)
+            r.close()
+            if r.status_code in (200, 206):
+                return r.headers.get("ETag") or r.headers.get("Last-Modified")
+        except Exception:
+            pass
+        return None
+
+    def preparar_pacote(self, url, nome, progresso=None):
+        """
+        Garante o pacote na pasta do espelho, baixando do link original só se
+        ainda não estiver lá (ou se o objeto mudou no servidor).
+        progresso(baixados, total): opcional.
+
+        Returns:
+            tuple: (ok, mensagem, pacote) - pacote tem nome, tamanho e sha256
+        """
+        nome = os.path.basename(nome)
+        origem = self._origem(url)
+        etag = self._etag_remoto(url)
+
+        atual = self.obter_pacote(nome)
+        if atual and atual.get("origem") == origem and (not etag or etag == atual.get("etag")):
+            return True, "Pacote já está no espelho", {"nome": nome, "tamanho": atual["tamanho"], "sha256": atual["sha256"]}
+
+        if not os.path.exists(self.pasta):
+            os.makedirs(self.pasta)
+        destino = os.path.join(self.pasta, nome)
+        temp = destino + ".part"
+
+        try:
+            h = hashlib.sha256()
+            baixados = 0
+            with requests.get(url, stream=True, timeout=60) as r:
+                if r.status_code != 200:
+                    return False, f"HTTP {r.status_code}", None
+                total = int(r.headers.get("Content-Length", 0) or 0)
+                etag = r.headers.get("ETag") or r.headers.get("Last-Modified") or etag
+                with open(temp, 'wb') as f:
+                    for bloco in r.iter_content(TAMANHO_BLOCO):
+                        f.write(bloco)
+                        h.update(bloco)
+                        baixados += len(bloco)
+                        if progresso:
+                            progresso(baixados, total)
+            if total and baixados != total:
+                return False, f"Download incompleto: {baixados} de {total} bytes", None
+
+            with self.lock:
+                # Substitui o arquivo publicado (downloads em curso do arquivo antigo
+                # recebem outro ETag e recomeçam no agente)
+                os.replace(temp, destino)
+                self.pacotes[nome] = {"caminho": destino, "tamanho": baixados, "sha256": h.hexdigest(),
+                                      "origem": origem, "etag": etag}
+                self._salvar()
+            logging.info(f"Espelho: {nome} publicado ({baixados} bytes)")
+            return True, "Pacote baixado para o espelho", {"nome": nome, "tamanho": baixados, "sha256": h.hexdigest()}
+        except Exception as e:
+            try:
+                os.remove(temp)
+            except OSError:
+                pass
+            return False, f"Erro Download: {e}", None
+
+    # ---------------------------------
+    # Servidor HTTP
+    # ---------------------------------
+    def iniciar(self):
+        """Sobe o servidor do espelho (uma vez) em segundo plano."""
+        if self.servidor:
+            return True, f"Espelho ativo na porta {self.porta}"
+        try:
+            servidor = ThreadingHTTPServer(("0.0.0.0", self.porta), _HandlerEspelho)
+        except OSError as e:
+            return False, f"Porta {self.porta} indisponível: {e}"
+        servidor.daemon_threads = True
+        servidor.espelho = self
+        self.porta = servidor.server_address[1]
+        threading.Thread(target=servidor.serve_forever, name="CIGS_Espelho", daemon=True).start()
+        self.servidor = servidor
+        return True, f"Espelho ativo na porta {self.porta}"
+
+    def parar(self):
+        if self.servidor:
+            self.servidor.shutdown()
+            self.servidor.server_close()
+            self.servidor = None
+
+    def url_para(self, ip_agente, nome):
+        """
+        Link do pacote no espelho, usando o IP da Central que alcança o agente
+        (a Central pode ter várias placas de rede/VPN).
+        """
+        try:
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+                s.connect((ip_agente, 5580))   # UDP: só escolhe a rota, não envia nada
+                ip_local = s.getsockname()[0]
+        except OSError:
+            ip_local = socket.gethostbyname(socket.gethostname())
+        return f"http://{ip_local}:{self.porta}/pacotes/{quote(os.path.basename(nome))}"
@@ -4,10 +4,24 @@ import logging                      # Biblioteca para registrar logs em arquivo
 from urllib.parse import urlparse, parse_qs   # Para analisar parâmetros de URLs
 from datetime import datetime, timedelta, timezone  # Para manipular datas e fusos horários
 import subprocess
+import time
+import threading
+from collections import deque
 
 class CIGSCore:
     def __init__(self):
         self.PORTA_AGENTE = 5580    # Porta padrão usada pelo agente nos servidores
+
+        # Série de recursos (CPU/RAM/disco) recebida de cada agente; só as amostras novas são buscadas
+        self._telemetria = {}
+        self._lock_telemetria = threading.Lock()
+
+        # Última resposta de /status e /status_all por (rota, ip, parâmetros): (etag, dados) para o If-None-Match
+        self._cache_status = {}
+        self._lock_cache_status = threading.Lock()
+
+        # Hub do canal persistente (opcional): agentes conectados nele respondem sem polling
+        self.hub = None
         
         # Configuração inicial do Logger
         # Cria o arquivo 'cigs_ops.log'
@@ -58,6 +72,87 @@ class CIGSCore:
             self.registrar_log(f"Erro ao ler arquivo: {e}", "ERRO")
             return []
 
+    def usar_hub(self, hub):
+        """Liga o CIGSHub: status, ping, jobs e comandos passam a usar o canal dos agentes conectados."""
+        self.hub = hub
+
+    def _estado_hub(self, ip):
+        # Estado em tempo real do agente no canal (None = fora do hub: segue o HTTP)
+        return self.hub.estado(ip) if self.hub else None
+
+    def _comando_hub(self, ip, metodo, rota, corpo=None, params=None, timeout=30):
+        """
+        Chama a rota pelo canal do agente.
+        Returns: dict {"codigo", "corpo"...} ou None se o agente não está no hub
+        """
+        if not self.hub:
+            return None
+        return self.hub.enviar_comando(ip, metodo, rota, corpo=corpo, params=params, timeout=timeout)
+
+    def _get_condicional(self, ip, rota, params, timeout):
+        """
+        GET com If-None-Match da última resposta da mesma rota/parâmetros.
+        304 devolve os dados guardados (o agente não manda o corpo de novo).
+
+        Returns:
+            tuple: (código HTTP, dados) - 304 vira 200 com os dados em cache
+        """
+        chave = (rota, ip, tuple(sorted(params.items())))
+        with self._lock_cache_status:
+            anterior = self._cache_status.get(chave)
+        headers = {'If-None-Match': anterior[0]} if anterior else {}
+        resp = requests.get(f"http://{ip}:{self.PORTA_AGENTE}{rota}", params=params, headers=headers, timeout=timeout)
+        if resp.status_code == 304 and anterior:
+            return 200, anterior[1]
+        if resp.status_code != 200:
+            return resp.status_code, None
+        dados = resp.json()
+        if resp.headers.get('ETag'):
+            with self._lock_cache_status:
+                self._cache_status[chave] = (resp.headers['ETag'], dados)
+        return 200, dados
+
+    def ping_agente(self, ip, timeout=2):
+        """
+        Liveness barato: /cigs/ping só lê memória no agente (sem config.ini, hash ou log).
+        Agentes antigos (404) caem no /cigs/status básico.
+
+        Returns:
+            dict: 'ip', 'status', 'version', 'latencia_ms' e 'msg'
+        """
+        estado = self._estado_hub(ip)
+        if estado:
+            hb = estado.get('heartbeat') or {}
+            return {"ip": ip, "status": "ONLINE", "version": estado.get('versao'), "uptime": hb.get('uptime'),
+                    "jobs_fila": hb.get('jobs_fila'), "latencia_ms": hb.get('rtt_ms'), "msg": None, "via": "hub"}
+
+        inicio = time.perf_counter()
+        try:
+            resp = requests.get(f"http://{ip}:{self.PORTA_AGENTE}/cigs/ping", timeout=timeout)
+            latencia = round((time.perf_counter() - inicio) * 1000)
+            if resp.status_code == 200:
+                dados = resp.json()
+                return {"ip": ip, "status": "ONLINE", "version": dados.get('version', '?'),
+                        "uptime": dados.get('uptime'), "jobs_fila": dados.get('jobs_fila'),
+                        "latencia_ms": latencia, "msg": None}
+            if resp.status_code == 404:
+                res = self.checar_status_agente(ip, timeout=timeout)
+                return {"ip": ip, "status": res.get('status'), "version": res.get('version'),
+                        "latencia_ms": round((time.perf_counter() - inicio) * 1000),
+                        "msg": res.get('msg') or "Agente sem /cigs/ping (modo legado)"}
+            return {"ip": ip, "status": "ERRO_API", "version": None, "latencia_ms": latencia,
+                    "msg": f"HTTP {resp.status_code}"}
+        except requests.exceptions.Timeout:
+            return {"ip": ip, "status": "TIMEOUT", "version": None, "latencia_ms": None,
+                    "msg": f"Timeout após {timeout}s"}
+        except requests.exceptions.ConnectionError:
+            return {"ip": ip, "status": "OFFLINE", "version": None, "latencia_ms": None,
+                    "msg": "Conexão recusada"}
+        except Exception as e:
+            print(f"[ERRO] ping_agente({ip}): {type(e).__name__} - {e}")
+            return {"ip": ip, "status": "ERRO", "version": None, "latencia_ms": None,
+                    "msg": f"{type(e).__name__}"}
+
     def checar_status_agente(self, ip, sistema="AC", full=False, timeout=3):
         """
         Consulta o agente do servidor e busca informações de status.
@@ -73,22 +168,28 @@ class CIGSCore:
                 Sucesso: status='ONLINE' + dados do agente
                 Erro: status='OFFLINE'/'ERRO_API'/'TIMEOUT' + mensagem
         """
+        # Agente no canal: último status enviado por ele (o full continua pelo HTTP)
+        estado = None if full else self._estado_hub(ip)
+        sis = (estado or {}).get('sistemas', {}).get(sistema.upper())
+        if sis is not None:
+            return {"ip": ip, "status": "ONLINE", "version": estado.get('versao'), "hash": estado.get('hash'),
+                    "clientes": sis.get('clientes', 0), "ref": sis.get('ref', '-'), "preparo": sis.get('preparo'),
+                    "disk": None, "ram": None, "recursos": None, "msg": None, "via": "hub"}
+
         try:
-            # Monta URL com parâmetros
-            url = f"http://{ip}:{self.PORTA_AGENTE}/cigs/status"
+            # Monta parâmetros
             params = {'sistema': sistema}
             if full:
                 params['full'] = '1'
             
-            # Timeout adaptativo: full=true precisa de mais tempo
-            timeout_atual = timeout * 2 if full else timeout
+            # Agentes novos respondem o full=1 da amostra em memória (sem timeout maior)
+            timeout_atual = timeout
             
-            # Faz a requisição
-            resp = requests.get(url, params=params, timeout=timeout_atual)
+            # Faz a requisição (304 reaproveita a última resposta)
+            codigo, dados = self._get_condicional(ip, "/cigs/status", params, timeout_atual)
             
             # Trata diferentes status HTTP
-            if resp.status_code == 200:
-                dados = resp.json()
+            if codigo == 200:
                 return {
                     "ip": ip,
                     "status": "ONLINE",
@@ -96,11 +197,13 @@ class CIGSCore:
                     "hash": dados.get('hash'),
                     "clientes": dados.get('clientes', 0),
                     "ref": dados.get('ref', '-'),
+                    "preparo": dados.get('preparo'),
                     "disk": dados.get('disk', '?') if full else None,
                     "ram": dados.get('ram', '?') if full else None,
+                    "recursos": dados.get('recursos') if full else None,
                     "msg": None
                 }
-            elif resp.status_code == 404:
+            elif codigo == 404:
                 return {
                     "ip": ip,
                     "status": "ERRO_API",
@@ -111,7 +214,7 @@ class CIGSCore:
                 return {
                     "ip": ip,
                     "status": "ERRO_API",
-                    "msg": f"HTTP {resp.status_code}",
+                    "msg": f"HTTP {codigo}",
                     "version": None, "hash": None, "clientes": 0, "ref": "-"
                 }
                 
@@ -139,7 +242,185 @@ class CIGSCore:
                 "version": None, "hash": None, "clientes": 0, "ref": "-"
             }
 
-    def enviar_ordem_agendamento(self, ip, url, arq, data, user, senha, sistema, modo, script="Executa.bat", params=""):
+    def checar_status_todos(self, ip, full=False, timeout=3):
+        """
+        Consulta em uma única chamada o status de todos os sistemas do agente
+        (AC, AG, PONTO e PATRIO) via /cigs/status_all.
+        
+        Agentes antigos (sem a rota, 404) caem no modo legado: uma chamada
+        de checar_status_agente por sistema.
+        
+        Returns:
+            dict: 'ip', 'status', 'version', 'hash', 'disk', 'ram', 'msg' e
+                'sistemas' = {"AC": {"clientes": n, "ref": "..."}, ...}
+        """
+        estado = None if full else self._estado_hub(ip)
+        if estado and estado.get('sistemas'):
+            return {"ip": ip, "status": "ONLINE", "version": estado.get('versao'), "hash": estado.get('hash'),
+                    "sistemas": estado['sistemas'], "disk": None, "ram": None, "recursos": None, "msg": None,
+                    "via": "hub"}
+
+        timeout_atual = timeout
+        try:
+            params = {'full': '1'} if full else {}
+            codigo, dados = self._get_condicional(ip, "/cigs/status_all", params, timeout_atual)
+            
+            if codigo == 200:
+                return {
+                    "ip": ip,
+                    "status": "ONLINE",
+                    "version": dados.get('version', '?'),
+                    "hash": dados.get('hash'),
+                    "sistemas": dados.get('sistemas', {}),
+                    "disk": dados.get('disk', '?') if full else None,
+                    "ram": dados.get('ram', '?') if full else None,
+                    "recursos": dados.get('recursos') if full else None,
+                    "msg": None
+                }
+            elif codigo == 404:
+                # Agente antigo: monta o mesmo formato com chamadas individuais
+                sistemas = {}
+                base = None
+                for sis in ("AC", "AG", "PONTO", "PATRIO"):
+                    res = self.checar_status_agente(ip, sis, full=full and base is None, timeout=timeout)
+                    if res.get('status') != "ONLINE":
+                        return {**res, "sistemas": {}}
+                    base = base or res
+                    sistemas[sis] = {"clientes": res.get('clientes', 0), "ref": res.get('ref', '-'),
+                                     "preparo": res.get('preparo')}
+                return {
+                    "ip": ip,
+                    "status": "ONLINE",
+                    "version": base.get('version'),
+                    "hash": base.get('hash'),
+                    "sistemas": sistemas,
+                    "disk": base.get('disk'),
+                    "ram": base.get('ram'),
+                    "msg": "Agente sem /cigs/status_all (modo legado)"
+                }
+            else:
+                return {"ip": ip, "status": "ERRO_API", "msg": f"HTTP {codigo}",
+                        "version": None, "hash": None, "sistemas": {}}
+                
+        except requests.exceptions.Timeout:
+            return {"ip": ip, "status": "TIMEOUT", "msg": f"Timeout após {timeout_atual}s",
+                    "version": None, "hash": None, "sistemas": {}}
+        except requests.exceptions.ConnectionError:
+            return {"ip": ip, "status": "OFFLINE", "msg": "Conexão recusada",
+                    "version": None, "hash": None, "sistemas": {}}
+        except Exception as e:
+            print(f"[ERRO] checar_status_todos({ip}): {type(e).__name__} - {e}")
+            return {"ip": ip, "status": "ERRO", "msg": f"{type(e).__name__}",
+                    "version": None, "hash": None, "sistemas": {}}
+
+    def historico_recursos(self, ip, timeout=5):
+        """
+        Série de recursos do agente (CPU, RAM, volumes e I/O de disco) para os gráficos.
+        Pede ao /cigs/metrics/history só as amostras mais novas que a última recebida
+        e mantém a série em memória por servidor.
+
+        Returns:
+            list: amostras (mais antiga primeiro); a série anterior se o agente não responder
+        """
+        # O lock só protege a série: a chamada HTTP fica fora para os servidores serem consultados em paralelo
+        with self._lock_telemetria:
+            serie = self._telemetria.setdefault(ip, deque(maxlen=720))
+            params = {'desde': serie[-1]['ts']} if serie else {}
+        amostras = []
+        try:
+            r = requests.get(f"http://{ip}:{self.PORTA_AGENTE}/cigs/metrics/history", params=params, timeout=timeout)
+            if r.status_code == 200:
+                amostras = r.json().get('amostras', [])
+        except Exception:
+            pass
+        with self._lock_telemetria:
+            # Duas consultas simultâneas do mesmo servidor não duplicam amostras
+            ultimo = serie[-1]['ts'] if serie else None
+            serie.extend(a for a in amostras if ultimo is None or a['ts'] > ultimo)
+            return list(serie)
+
+    def ler_log_agente(self, ip, arquivo="debug", offset=None, assinatura=None, sistema=None, timeout=5):
+        """
+        Trecho novo do log do agente (/cigs/logs): só os bytes depois do offset.
+        Sem offset traz a cauda do arquivo. Repasse o 'offset' e a 'assinatura'
+        da resposta anterior na chamada seguinte.
+
+        Returns:
+            dict: resposta do agente ('linhas', 'offset', 'assinatura', 'reiniciado', 'mais')
+                ou {'erro': mensagem}
+        """
+        params = {'arquivo': arquivo}
+        if offset is not None:
+            params['offset'] = offset
+        if assinatura:
+            params['assinatura'] = assinatura
+        if sistema:
+            params['sistema'] = sistema
+        try:
+            r = requests.get(f"http://{ip}:{self.PORTA_AGENTE}/cigs/logs", params=params, timeout=timeout)
+            if r.status_code == 200:
+                return r.json()
+            if r.status_code == 404:
+                return {"erro": "Agente sem /cigs/logs (versão antiga)"}
+            return {"erro": r.json().get('erro') if r.status_code == 400 else f"HTTP {r.status_code}"}
+        except Exception as e:
+            return {"erro": f"{type(e).__name__}"}
+
+    def baixar_logs_agente(self, ip, de, ate, destino, sistema=None, arquivos=("debug", "execucao"), timeout=30):
+        """
+        Baixa o .log.gz do período de..ate (AAAA-MM-DD) gerado pelo agente (/cigs/logs/lote)
+        gravando direto no arquivo destino.
+
+        Returns:
+            tuple: (ok, mensagem)
+        """
+        params = {'de': de, 'ate': ate, 'arquivos': ",".join(arquivos)}
+        if sistema:
+            params['sistema'] = sistema
+        try:
+            with requests.get(f"http://{ip}:{self.PORTA_AGENTE}/cigs/logs/lote", params=params,
+                              timeout=timeout, stream=True) as r:
+                if r.status_code != 200:
+                    erro = r.json().get('erro') if r.status_code == 400 else f"HTTP {r.status_code}"
+                    return False, erro
+                total = 0
+                with open(destino, 'wb') as f:
+                    for bloco in r.iter_content(chunk_size=64 * 1024):
+                        f.write(bloco)
+                        total += len(bloco)
+            self.registrar_log(f"Logs de {ip} ({de} a {ate}) salvos em {destino}")
+            return True, f"{total / 1024:.0f} KB salvos em {destino}"
+        except Exception as e:
+            return False, str(e)
+
+    def obter_manifesto_agente(self, ip, timeout=5):
+        """
+        Busca o manifesto de build do agente (versão, fingerprint e SHA-256 por arquivo).
+        Retorna o dict do agente ou {"erro": ...} em caso de falha.
+        """
+        try:
+            r = requests.get(f"http://{ip}:{self.PORTA_AGENTE}/cigs/manifest", timeout=timeout)
+            if r.status_code == 200:
+                return r.json()
+            return {"erro": f"HTTP {r.status_code}"}
+        except Exception as e:
+            return {"erro": str(e)}
+
+    def comparar_manifestos(self, ref, outro):
+        """
+        Compara dois manifestos de build e lista os arquivos divergentes.
+        Retorna dict com 'diferentes', 'faltando' (só em ref) e 'extras' (só em outro).
+        """
+        a = {x['arquivo']: x['sha256'] for x in ref.get('arquivos', [])}
+        b = {x['arquivo']: x['sha256'] for x in outro.get('arquivos', [])}
+        return {
+            "diferentes": sorted(k for k in a.keys() & b.keys() if a[k] != b[k]),
+            "faltando": sorted(a.keys() - b.keys()),
+            "extras": sorted(b.keys() - a.keys())
+        }
+
+    def disparar_ordem_agendamento(self, ip, url, arq, data, user, senha, sistema, modo, script="Executa.bat", params="",
+                                   sha256=None, tamanho=None, delta_url=None, delta_sha256=None, politica=None):
         """
         Envia ao agente uma ordem de agendamento de atualização, contendo:
         - url do pacote
@@ -149,6 +430,17 @@ class CIGSCore:
         - sistema
         - script a executar
         - parâmetros opcionais
+        - sha256/tamanho esperados do pacote (opcionais, verificados pelo agente)
+        - delta_url/delta_sha256: pacote delta opcional sobre a versão instalada
+          (o agente volta para o pacote completo se a base não conferir)
+        - politica: override da política de recursos do agente nesta missão
+          ({"download_kbs": n, "baixa_prioridade": bool}; ausente = configuração do agente)
+        
+        O agente responde na hora com um job_id e executa a missão em segundo plano.
+        
+        Returns:
+            tuple: (aceito, job_id, detalhe). Agentes antigos (síncronos) devolvem
+                job_id=None e o resultado final já em 'aceito'/'detalhe'.
         """
         api = f"http://{ip}:{self.PORTA_AGENTE}/cigs/executar"
         
@@ -169,16 +461,104 @@ class CIGSCore:
             "script": script, 
             "params": params
         }
+        if sha256:
+            payload["sha256"] = sha256
+        if tamanho:
+            payload["tamanho"] = tamanho
+        if delta_url:
+            payload["delta_url"] = delta_url
+            if delta_sha256:
+                payload["delta_sha256"] = delta_sha256
+        if politica:
+            payload["politica"] = politica
         
         try:
-            r = requests.post(api, json=payload, timeout=60)  # Envia requisição POST
+            # Timeout longo apenas para agentes antigos, que ainda processam tudo dentro da requisição
+            r = requests.post(api, json=payload, timeout=60)
             if r.status_code == 200:
                 resp = r.json()
-                # Retorna sucesso/falha baseado no JSON
-                return (True, resp.get('detalhe')) if resp.get('resultado') == "SUCESSO" else (False, resp.get('detalhe'))
-            return False, f"Http {r.status_code}"
+                if resp.get('job_id'):
+                    return True, resp['job_id'], resp.get('detalhe')
+                return resp.get('resultado') == "SUCESSO", None, resp.get('detalhe')
+            return False, None, f"Http {r.status_code}"
         except Exception as e:
-            return False, str(e)
+            return False, None, str(e)
+
+    def enviar_ordem_preparo(self, ip, url, arq, sistema, preparar_ate, sha256=None, tamanho=None, politica=None):
+        """
+        Pré-preparo: envia o pacote antes da missão com o prazo "preparar até"
+        (DD/MM/AAAA HH:MM). O agente baixa e verifica em segundo plano; o disparo
+        seguinte do mesmo pacote não usa a rede. politica: ex. {"download_kbs": 512}
+        para preparar durante o expediente.
+        
+        Returns:
+            tuple: (aceito, job_id, detalhe)
+        """
+        payload = {"url": url, "arquivo": arq, "sistema": sistema, "preparar_ate": preparar_ate}
+        if sha256:
+            payload["sha256"] = sha256
+        if tamanho:
+            payload["tamanho"] = tamanho
+        if politica:
+            payload["politica"] = politica
+        try:
+            r = requests.post(f"http://{ip}:{self.PORTA_AGENTE}/cigs/preparar", json=payload, timeout=15)
+            if r.status_code == 200:
+                resp = r.json()
+                return True, resp.get('job_id'), resp.get('detalhe')
+            if r.status_code == 404:
+                return False, None, "Agente sem suporte a pré-preparo"
+            return False, None, r.json().get('detalhe', f"Http {r.status_code}")
+        except Exception as e:
+            return False, None, str(e)
+
+    def consultar_job(self, ip, job_id, timeout=5):
+        """
+        Consulta o estado de um job do agente (/cigs/jobs/<id>).
+        Retorna o dict do job ou {"estado": "DESCONHECIDO", "detalhe": ...} em falha.
+        """
+        resposta = self._comando_hub(ip, "GET", f"/cigs/jobs/{job_id}", timeout=timeout)
+        if resposta is not None:
+            if resposta.get('codigo') == 200:
+                return resposta.get('corpo')
+            return {"estado": "DESCONHECIDO", "detalhe": resposta.get('erro') or f"HTTP {resposta.get('codigo')}"}
+        try:
+            r = requests.get(f"http://{ip}:{self.PORTA_AGENTE}/cigs/jobs/{job_id}", timeout=timeout)
+            if r.status_code == 200:
+                return r.json()
+            return {"estado": "DESCONHECIDO", "detalhe": f"HTTP {r.status_code}"}
+        except Exception as e:
+            return {"estado": "DESCONHECIDO", "detalhe": str(e)}
+
+    def aguardar_job(self, ip, job_id, timeout=1800, intervalo=3):
+        """
+        Acompanha um job até ele terminar (ou estourar o timeout).
+        Returns:
+            tuple: (sucesso, detalhe)
+        """
+        limite = time.time() + timeout
+        while time.time() < limite:
+            job = self.consultar_job(ip, job_id)
+            if job.get('estado') in ("SUCESSO", "ERRO", "INTERROMPIDO"):
+                return job['estado'] == "SUCESSO", job.get('detalhe')
+            # Agente no canal: o fim do job chega como evento (a consulta vira só conferência)
+            if self.hub and self.hub.conectado(ip):
+                job = self.hub.aguardar_fim_job(ip, job_id, min(60, max(limite - time.time(), 0)))
+                if job:
+                    return job.get('estado') == "SUCESSO", job.get('detalhe')
+                continue
+            time.sleep(intervalo)
+        return False, f"Job {job_id} sem conclusão após {timeout}s"
+
+    def enviar_ordem_agendamento(self, ip, url, arq, data, user, senha, sistema, modo, script="Executa.bat", params=""):
+        """
+        Versão bloqueante de disparar_ordem_agendamento: envia a ordem e aguarda
+        o job terminar. Retorna (sucesso, detalhe).
+        """
+        ok, job_id, detalhe = self.disparar_ordem_agendamento(ip, url, arq, data, user, senha, sistema, modo, script, params)
+        if not ok or not job_id:
+            return ok, detalhe
+        return self.aguardar_job(ip, job_id)
     
     def verificar_banco(self, ip, sistema):
         """
@@ -264,12 +644,23 @@ class CIGSCore:
             pass
         return {"erro": "Falha"}                       # Retorno padrão em falha
     
-    def enviar_ordem_abortar(self, ip):
+    def enviar_ordem_abortar(self, ip, sistema=None, job_id=None):
         """
-        Envia comando para abortar a execução atual no agente.
+        Envia comando para abortar as tarefas agendadas pelo agente.
+        sistema / job_id: cancela só as tarefas do sistema ou do job (padrão: todas).
         """
+        filtro = {}
+        if sistema:
+            filtro['sistema'] = sistema
+        if job_id:
+            filtro['job_id'] = job_id
+        resposta = self._comando_hub(ip, "POST", "/cigs/abortar", corpo=filtro, timeout=15)
+        if resposta is not None:
+            if resposta.get('codigo') == 200:
+                return True, resposta['corpo'].get('detalhe')
+            return False, resposta.get('erro') or "Erro"
         try:
-            r = requests.post(f"http://{ip}:{self.PORTA_AGENTE}/cigs/abortar", timeout=5)
+            r = requests.post(f"http://{ip}:{self.PORTA_AGENTE}/cigs/abortar", json=filtro, timeout=5)
             if r.status_code == 200:
                 return True, r.json().get('detalhe')   # Sucesso
         except:
@@ -387,6 +778,12 @@ class CIGSCore:
         return "%d/%m/%Y"  # fallback seguro
     
     def enviar_ordem_descomentar(self, ip, sistema):
+        resposta = self._comando_hub(ip, "POST", "/cigs/descomentar", corpo={"sistema": sistema}, timeout=15)
+        if resposta is not None:
+            if resposta.get('codigo') != 200:
+                return False, resposta.get('erro') or f"HTTP {resposta.get('codigo')}"
+            corpo = resposta['corpo']
+            return (True, corpo.get('detalhe')) if corpo.get('resultado') == "SUCESSO" else (False, corpo.get('detalhe'))
         try:
             r = requests.post(f"http://{ip}:{self.PORTA_AGENTE}/cigs/descomentar", json={"sistema": sistema}, timeout=15)
             if r.status_code == 200:
@@ -396,6 +793,12 @@ class CIGSCore:
         return False, "Erro de Conexão"
 
     def enviar_ordem_limpeza(self, ip, sistema):
+        resposta = self._comando_hub(ip, "POST", "/cigs/limpar_logs", corpo={"sistema": sistema}, timeout=15)
+        if resposta is not None:
+            if resposta.get('codigo') != 200:
+                return False, resposta.get('erro') or f"HTTP {resposta.get('codigo')}"
+            corpo = resposta['corpo']
+            return (True, corpo.get('detalhe')) if corpo.get('resultado') == "SUCESSO" else (False, corpo.get('detalhe'))
         try:
             r = requests.post(f"http://{ip}:{self.PORTA_AGENTE}/cigs/limpar_logs", json={"sistema": sistema}, timeout=15)
             if r.status_code == 200:
@@ -0,0 +1,173 @@
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog, scrolledtext
+import threading
+from datetime import datetime
+
+# Intervalo entre as leituras do log (ms)
+INTERVALO_LEITURA = 2000
+
+# Linhas mantidas na tela (as mais antigas saem)
+MAX_LINHAS_TELA = 5000
+
+
+class LogViewerDialog(tk.Toplevel):
+    """
+    Visualizador ao vivo do log de um agente.
+    Cada leitura pede só os bytes depois do último offset recebido (/cigs/logs).
+    """
+
+    def __init__(self, parent, core, ip):
+        super().__init__(parent)
+        self.core = core
+        self.ip = ip
+        self.title(f"📜 Logs ao Vivo - {ip}")
+        self.geometry("900x550")
+        self.configure(bg="#ecf0f1")
+
+        # Posição atual no arquivo do agente (None = começar pela cauda)
+        self.offset = None
+        self.assinatura = None
+        self._lendo = False
+        self._after_id = None
+
+        self.setup_ui()
+        self.protocol("WM_DELETE_WINDOW", self.fechar)
+        self.agendar_leitura(0)
+
+    def setup_ui(self):
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(1, weight=1)
+
+        # Filtros da leitura ao vivo
+        f_top = tk.Frame(self, bg="#ecf0f1")
+        f_top.grid(row=0, column=0, sticky="ew", padx=10, pady=5)
+
+        tk.Label(f_top, text="Arquivo:", bg="#ecf0f1").pack(side="left")
+        self.cb_arquivo = ttk.Combobox(f_top, values=["debug", "execucao"], state="readonly", width=10)
+        self.cb_arquivo.set("debug")
+        self.cb_arquivo.pack(side="left", padx=5)
+        self.cb_arquivo.bind("<<ComboboxSelected>>", lambda e: self.reiniciar())
+
+        tk.Label(f_top, text="Sistema:", bg="#ecf0f1").pack(side="left", padx=(10, 0))
+        self.cb_sistema = ttk.Combobox(f_top, values=["", "AC", "AG", "PONTO", "PATRIO", "GERAL"], state="readonly", width=8)
+        self.cb_sistema.pack(side="left", padx=5)
+        self.cb_sistema.bind("<<ComboboxSelected>>", lambda e: self.reiniciar())
+
+        self.var_pausa = tk.BooleanVar(value=False)
+        ttk.Checkbutton(f_top, text="Pausar", variable=self.var_pausa).pack(side="left", padx=10)
+        ttk.Button(f_top, text="🧹 Limpar Tela", command=lambda: self.txt.delete("1.0", "end")).pack(side="left")
+
+        self.lbl_status = ttk.Label(f_top, text="Conectando...")
+        self.lbl_status.pack(side="right")
+
+        # Área do log
+        self.txt = scrolledtext.ScrolledText(self, font=("Consolas", 9), bg="#1e272e", fg="#d2dae2", wrap="none")
+        self.txt.grid(row=1, column=0, sticky="nsew", padx=10)
+        self.txt.tag_configure("ERRO", foreground="#ff6b6b")
+        self.txt.tag_configure("AVISO", foreground="#feca57")
+
+        # Download compactado de um período
+        f_lote = tk.Frame(self, bg="#ecf0f1")
+        f_lote.grid(row=2, column=0, sticky="ew", padx=10, pady=5)
+        hoje = datetime.now().strftime("%d/%m/%Y")
+        tk.Label(f_lote, text="Período De:", bg="#ecf0f1").pack(side="left")
+        self.ent_de = ttk.Entry(f_lote, width=12)
+        self.ent_de.insert(0, hoje)
+        self.ent_de.pack(side="left", padx=5)
+        tk.Label(f_lote, text="Até:", bg="#ecf0f1").pack(side="left")
+        self.ent_ate = ttk.Entry(f_lote, width=12)
+        self.ent_ate.insert(0, hoje)
+        self.ent_ate.pack(side="left", padx=5)
+        tk.Button(f_lote, text="⬇️ Baixar Período (.gz)", command=self.baixar_periodo,
+                  bg="#2980b9", fg="white").pack(side="left", padx=10)
+
+    # --- LEITURA AO VIVO ---
+    def agendar_leitura(self, atraso=INTERVALO_LEITURA):
+        self._after_id = self.after(atraso, self.disparar_leitura)
+
+    def disparar_leitura(self):
+        if self._lendo or self.var_pausa.get():
+            self.agendar_leitura()
+            return
+        self._lendo = True
+        arquivo, sistema = self.cb_arquivo.get(), self.cb_sistema.get() or None
+        threading.Thread(target=self._worker_leitura, args=(arquivo, sistema, self.offset, self.assinatura),
+                         daemon=True).start()
+
+    def _worker_leitura(self, arquivo, sistema, offset, assinatura):
+        res = self.core.ler_log_agente(self.ip, arquivo, offset=offset, assinatura=assinatura, sistema=sistema)
+        try:
+            self.after(0, lambda: self._aplicar(res, arquivo, sistema))
+        except tk.TclError:
+            pass  # Janela fechada durante a leitura
+
+    def _aplicar(self, res, arquivo, sistema):
+        self._lendo = False
+        # Filtro trocado durante a leitura: descarta e lê de novo do jeito novo
+        if arquivo != self.cb_arquivo.get() or sistema != (self.cb_sistema.get() or None):
+            self.agendar_leitura(0)
+            return
+
+        if res.get('erro'):
+            self.lbl_status.config(text=f"⚠️ {res['erro']}", foreground="red")
+            self.agendar_leitura()
+            return
+        if not res.get('existe', True):
+            self.lbl_status.config(text="Arquivo ainda não existe no agente", foreground="orange")
+            self.agendar_leitura()
+            return
+
+        if res.get('reiniciado'):
+            self._inserir(["----- log rotacionado no agente -----"])
+        self._inserir(res.get('linhas', []))
+        self.offset = res.get('offset')
+        self.assinatura = res.get('assinatura')
+        self.lbl_status.config(text=f"{self.offset / 1024:.0f} / {res.get('tamanho', 0) / 1024:.0f} KB", foreground="green")
+
+        # Ainda há bytes pendentes: busca o próximo trecho sem esperar o intervalo
+        self.agendar_leitura(0 if res.get('mais') else INTERVALO_LEITURA)
+
+    def _inserir(self, linhas):
+        if not linhas:
+            return
+        no_fim = self.txt.yview()[1] >= 0.999
+        for linha in linhas:
+            tag = "ERRO" if ("Erro" in linha or "Falha" in linha or "ERRO" in linha) else ("AVISO" if "⚠️" in linha else None)
+            self.txt.insert("end", linha + "\n", tag)
+        excedente = int(self.txt.index("end-1c").split(".")[0]) - MAX_LINHAS_TELA
+        if excedente > 0:
+            self.txt.delete("1.0", f"{excedente + 1}.0")
+        if no_fim:
+            self.txt.see("end")
+
+    def reiniciar(self):
+        """Troca de arquivo/sistema: limpa a tela e volta para a cauda."""
+        self.offset = None
+        self.assinatura = None
+        self.txt.delete("1.0", "end")
+
+    # --- DOWNLOAD DO PERÍODO ---
+    def baixar_periodo(self):
+        try:
+            de = datetime.strptime(self.ent_de.get().strip(), "%d/%m/%Y").strftime("%Y-%m-%d")
+            ate = datetime.strptime(self.ent_ate.get().strip(), "%d/%m/%Y").strftime("%Y-%m-%d")
+        except ValueError:
+            messagebox.showerror("Erro", "Datas devem estar no formato DD/MM/AAAA", parent=self)
+            return
+        destino = filedialog.asksaveasfilename(parent=self, defaultextension=".gz",
+                                               initialfile=f"CIGS_logs_{self.ip}_{de}_{ate}.log.gz",
+                                               filetypes=[("Log compactado", "*.gz")])
+        if not destino:
+            return
+        sistema = self.cb_sistema.get() or None
+
+        def run():
+            ok, msg = self.core.baixar_logs_agente(self.ip, de, ate, destino, sistema=sistema)
+            self.after(0, lambda: (messagebox.showinfo if ok else messagebox.showerror)("Logs", msg, parent=self))
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def fechar(self):
+        if self._after_id:
+            self.after_cancel(self._after_id)
+        self.destroy()
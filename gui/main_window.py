@@ -29,7 +29,10 @@ from core.sheets_manager import CIGSSheets
 from core.security_manager import CIGSSecurity
 from core.db_manager import CIGSDatabase
 from gui.dialogs.schedule_dialog import ScheduleDialog
+from gui.dialogs.log_viewer_dialog import LogViewerDialog
 from core.email_manager import CIGSEmailManager
+from core.mirror_manager import CIGSMirror
+from core.hub_manager import CIGSHub
 
 # Imports dos Painéis
 from gui.panels.top_panel import TopPanel
@@ -56,6 +59,15 @@ class CIGSApp:
         self.sheets = CIGSSheets()
         self.security = CIGSSecurity()
         self.email_manager = CIGSEmailManager(self.security)
+        self.mirror = CIGSMirror()
+
+        # Hub do canal persistente: agentes com CANAL_HUB conectam aqui e dispensam o polling
+        self.hub = CIGSHub()
+        ok_hub, msg_hub = self.hub.iniciar()
+        if ok_hub:
+            self.core.usar_hub(self.hub)
+            self.hub.ouvintes.append(self._evento_hub)
+        self.core.registrar_log(f"Hub: {msg_hub}", "INFO" if ok_hub else "ERRO")
                 
         self.monitor_active = False 
         self.setup_window()
@@ -197,7 +209,8 @@ class CIGSApp:
             'edit_server': self.abrir_edit_server,   # NOVO
             'delete_server': self.deletar_servidor, # NOVO
             'descomentar': self.btn_descomentar_massa, # NOVO
-            'limpar': self.btn_limpar_massa
+            'limpar': self.btn_limpar_massa,
+            'logs': self.abrir_logs_servidor
         })
         self.pages["infra"] = self.infra_panel
         
@@ -254,11 +267,12 @@ class CIGSApp:
         
         # Botões alinhados à direita (ordem IMPORTANTE!)
         tk.Button(f_act, text="☢️ DISPARAR EM TODOS", command=self.btn_disparar_todos, 
-                 bg="black", fg="#e74c3c", font=("Arial", 10, "bold"), padx=10).grid(row=0, column=5, padx=5)
+                 bg="black", fg="#e74c3c", font=("Arial", 10, "bold"), padx=10).grid(row=0, column=6, padx=5)
         tk.Button(f_act, text="🚀 DISPARAR MISSÃO (Checklist)", command=self.pre_flight_checklist, 
-                 bg="#27ae60", fg="white", font=("Arial", 10, "bold"), padx=10).grid(row=0, column=4, padx=5)
+                 bg="#27ae60", fg="white", font=("Arial", 10, "bold"), padx=10).grid(row=0, column=5, padx=5)
         tk.Button(f_act, text='❌ Abortar Disparo', command=self.btn_abortar, 
-                 bg='#6D1B08', fg='white', font=("Arial", 10, "bold"), padx=10).grid(row=0, column=3, padx=5)
+                 bg='#6D1B08', fg='white', font=("Arial", 10, "bold"), padx=10).grid(row=0, column=4, padx=5)
+        tk.Button(f_act, text="📦 Pré-preparar", command=self.btn_preparar).grid(row=0, column=3, padx=5)
         tk.Button(f_act, text="📡 Scanear Infra", command=self.btn_scanear).grid(row=0, column=2, padx=5)
         tk.Button(f_act, text="📊 Ver Relatório", command=self.btn_relatorio_final).grid(row=0, column=1, padx=5)
 
@@ -311,6 +325,35 @@ class CIGSApp:
         self.progress_var.set(val)
         self.lbl_progress.config(text=txt)
 
+    def _evento_hub(self, ip, msg):
+        """Mensagens do canal (thread do hub): atualiza a linha do servidor e o log sem esperar o scan."""
+        tipo = msg.get('tipo')
+        if tipo == "conectado":
+            self.log_visual(f"🔌 {ip} conectado ao hub ({msg.get('agente')} {msg.get('versao')})")
+        elif tipo == "desconectado":
+            self.log_visual(f"🔌 {ip} saiu do hub (volta ao polling)")
+        elif tipo == "job":
+            job = msg.get('job') or {}
+            self.log_visual(f"📬 {ip}: job {job.get('id')} ({job.get('sistema')}) {job.get('estado')} - {job.get('detalhe')}")
+        elif tipo == "status":
+            self.root.after(0, lambda: self._aplicar_status_hub(ip))
+
+    def _aplicar_status_hub(self, ip):
+        # Mesmo formato da coluna de status do scan, para o sistema selecionado
+        sis = self.top_panel.get_data()['sistema']
+        res = self.core.checar_status_agente(ip, sis)
+        if res.get('via') != "hub":
+            return
+        for item in self.infra_panel.tree.get_children():
+            valores = list(self.infra_panel.tree.item(item)['values'])
+            if not valores or str(valores[0]) != ip:
+                continue
+            while len(valores) < 7:
+                valores.append("-")
+            valores[5] = f"ON ({res.get('clientes', 0)} - {res.get('ref', '-')})"
+            tags = self.infra_panel.tree.item(item).get('tags', [])
+            self._atualizar_tree_seguro(item, valores, ("SUCESSO",) if "SUCESSO" in tags else ("ONLINE",))
+
     def _atualizar_tree_seguro(self, item_id, valores, tags):
         """Atualiza a árvore apenas se o item ainda existir"""
         try:
@@ -540,20 +583,21 @@ class CIGSApp:
     # ==========================================
     
     def monitor_thread(self):
-        """Inicia thread para monitoramento em tempo real"""
+        """
+        Inicia thread para monitoramento do servidor selecionado.
+        O agente amostra CPU/RAM/disco em segundo plano: a cada 30s a central
+        busca só as amostras novas do histórico (em vez de um status completo a cada 3s).
+        """
         def run():
             while self.monitor_active:
                 try:
                     sel = self.infra_panel.tree.selection()
                     if sel:
                         ip = self.infra_panel.tree.item(sel[0])['values'][0]
-                        sis = self.top_panel.get_data()['sistema']
-                        res = self.core.checar_status_agente(ip, sis, full=True)
-                        if res.get('status') == 'ONLINE':
-                            pass
+                        self.core.historico_recursos(ip)
                 except: 
                     pass
-                time.sleep(3)
+                time.sleep(30)
         threading.Thread(target=run, daemon=True).start()
 
     # ==========================================
@@ -581,13 +625,20 @@ class CIGSApp:
             self.log_visual("⚠️  Lista de servidores vazia!")
             return
 
+        # Agentes no canal respondem do estado em memória do hub; o polling HTTP fica para os demais
+        no_hub = sum(1 for a in self.hub.listar_agentes().values() if a.get('conectado'))
+        if no_hub:
+            self.log_visual(f"🔌 {no_hub} agente(s) no hub (estado em tempo real, sem polling)\n")
+
         stats = {
             'online': 0,
             'offline': 0,
             'erro': 0,
             'total_clientes': 0,
             'versoes': {},
-            'tempo_resposta': []
+            'tempo_resposta': [],
+            'fingerprints': {},
+            'clientes_sistema': {}
         }
 
         for i, item in enumerate(items, 1):
@@ -611,7 +662,8 @@ class CIGSApp:
             foi_agendado = "SUCESSO" in tags_atuais
             
             try:
-                res = self.core.checar_status_agente(ip, sis, full=False)
+                # Uma chamada por servidor traz todos os sistemas (/cigs/status_all)
+                res = self.core.checar_status_todos(ip, full=False)
                 tempo = round((time.time() - inicio) * 1000, 1)
                 
                 st = res.get('status', 'ERRO')
@@ -619,8 +671,9 @@ class CIGSApp:
                 
                 if st == "ONLINE":
                     versao = res.get('version', '?')
-                    qtd_clientes = res.get('clientes', 0)
-                    ref_cliente = res.get('ref', '-')
+                    dados_sis = res.get('sistemas', {}).get(sis.upper(), {})
+                    qtd_clientes = dados_sis.get('clientes', 0)
+                    ref_cliente = dados_sis.get('ref', '-')
                     disk_gb = res.get('disk', '?')
                     ram_perc = res.get('ram', '?')
                     
@@ -628,6 +681,8 @@ class CIGSApp:
                     stats['total_clientes'] += qtd_clientes
                     stats['tempo_resposta'].append(tempo)
                     stats['versoes'][versao] = stats['versoes'].get(versao, 0) + 1
+                    if res.get('hash') not in (None, "dev_mode", "erro_hash"):
+                        stats['fingerprints'][ip] = res['hash']
                     
                     status_display = f"ON ({qtd_clientes} - {ref_cliente})"
                     tag = "ONLINE"
@@ -646,6 +701,27 @@ class CIGSApp:
                         info_extra = f"v{versao} | Disk: {disk_gb}GB | RAM: {ram_perc}%"
                     
                     self.log_visual(f"   ✅ ONLINE | Clientes: {qtd_clientes} | Ref: {ref_cliente} | Versão: {versao} | {tempo}ms")
+
+                    outros = []
+                    for nome, dados in res.get('sistemas', {}).items():
+                        qtd = dados.get('clientes', 0) or 0
+                        stats['clientes_sistema'][nome] = stats['clientes_sistema'].get(nome, 0) + qtd
+                        if nome != sis:
+                            outros.append(f"{nome}: {qtd}")
+                    if outros:
+                        self.log_visual(f"   ↳ Demais sistemas: {' | '.join(outros)}")
+
+                    # Pré-preparo do pacote (download antecipado) para o sistema
+                    preparo = dados_sis.get('preparo')
+                    if preparo and preparo.get('estado') != "INSTALADO":
+                        estado_prep = preparo.get('estado')
+                        if estado_prep in ("AGUARDANDO", "BAIXANDO"):
+                            estado_prep = f"{estado_prep} {preparo.get('progresso', 0)}%"
+                        if preparo.get('atrasado'):
+                            estado_prep += " ⚠️ ATRASADO"
+                        info_extra += f" | 📦 {estado_prep}"
+                        self.log_visual(f"   📦 Pré-preparo: {estado_prep} | {preparo.get('arquivo')} "
+                                        f"até {preparo.get('preparar_ate')} | {preparo.get('detalhe')}")
                 else:
                     stats['offline' if st == "OFFLINE" else 'erro'] += 1
                     status_display = st
@@ -692,6 +768,8 @@ class CIGSApp:
         self.log_visual(f"⚠️  Erros:   {stats['erro']}")
         self.log_visual(f"📋 Total:    {total}")
         self.log_visual(f"\n👥 Total de clientes ativos: {stats['total_clientes']}")
+        if stats['clientes_sistema']:
+            self.log_visual("   " + " | ".join(f"{nome}: {qtd}" for nome, qtd in sorted(stats['clientes_sistema'].items())))
         self.log_visual(f"⏱️  Latência média: {latencia_media}ms")
         
         if stats['versoes']:
@@ -699,6 +777,8 @@ class CIGSApp:
             for versao, qtd in sorted(stats['versoes'].items()):
                 percent = round((qtd / stats['online']) * 100, 1) if stats['online'] > 0 else 0
                 self.log_visual(f"   • {versao}: {qtd} servidores ({percent}%)")
+
+        self._auditar_builds(stats['fingerprints'])
         
         if total > 0:
             sucesso_percent = round((stats['online'] / total) * 100, 1)
@@ -711,6 +791,42 @@ class CIGSApp:
         self.update_progress(total, total, f"Scan Completo: {stats['online']} ON / {stats['offline']} OFF / {stats['erro']} ERRO")
         self.root.after(0, self.dash_panel.update_plots)
 
+    def _auditar_builds(self, fingerprints):
+        """
+        Agentes fora do build predominante: compara o manifesto (/cigs/manifest)
+        de cada um com o de um agente de referência e lista os arquivos divergentes.
+        """
+        contagem = {}
+        for fp in fingerprints.values():
+            contagem[fp] = contagem.get(fp, 0) + 1
+        if len(contagem) < 2:
+            return
+
+        padrao = max(contagem, key=contagem.get)
+        ip_ref = next(ip for ip, fp in fingerprints.items() if fp == padrao)
+        self.log_visual(f"\n🧬 Builds divergentes: {len(fingerprints) - contagem[padrao]} agente(s) "
+                        f"diferente(s) do build de {ip_ref} ({contagem[padrao]} servidores)")
+        ref = self.core.obter_manifesto_agente(ip_ref)
+        if ref.get('erro'):
+            self.log_visual(f"   ⚠️  Manifesto de {ip_ref} indisponível: {ref['erro']}")
+            return
+
+        for ip, fp in fingerprints.items():
+            if fp == padrao:
+                continue
+            outro = self.core.obter_manifesto_agente(ip)
+            if outro.get('erro'):
+                self.log_visual(f"   • {ip}: manifesto indisponível ({outro['erro']})")
+                continue
+            dif = self.core.comparar_manifestos(ref, outro)
+            resumo = ", ".join(f"{len(lista)} {tipo}" for tipo, lista in dif.items() if lista)
+            self.log_visual(f"   • {ip} (v{outro.get('versao')}): {resumo or 'mesmos arquivos'}")
+            for tipo, lista in dif.items():
+                for arquivo in lista[:10]:
+                    self.log_visual(f"      - [{tipo}] {arquivo}")
+                if len(lista) > 10:
+                    self.log_visual(f"      ... +{len(lista) - 10} {tipo}")
+
     # ==========================================
     # DEPLOY
     # ==========================================
@@ -907,7 +1023,8 @@ class CIGSApp:
                     erros += 1
             
             ip_teste = self.infra_panel.tree.item(sel[0])['values'][0]
-            res = self.core.checar_status_agente(ip_teste, d['sistema'])
+            # Conectividade só precisa do liveness (/cigs/ping, sem disco no agente)
+            res = self.core.ping_agente(ip_teste)
             if res.get('status') == "ONLINE":
                 add("✅ Conectividade OK", "green")
             else:
@@ -945,8 +1062,28 @@ class CIGSApp:
             self.log_visual("❌ ERRO: Formato de data/hora inválido!")
             return
 
+        try:
+            nome = os.path.basename(urlparse(d['url']).path) or "up.rar"
+        except:
+            nome = "up.rar"
+
+        pacote_espelho = None
+        if modo == "COMPLETO":
+            seguir, pacote_espelho = self._preparar_espelho(d, nome)
+            if not seguir:
+                return
+
+        # Pacote delta opcional: link inválido/expirado = agentes usam só o pacote completo
+        delta_url = d.get('delta') if modo == "COMPLETO" else None
+        if delta_url:
+            valido, msg_link, _ = self.core.verificar_validade_link(delta_url)
+            if not valido:
+                self.log_visual(f"⚠️ Link delta ignorado ({msg_link}). Agentes usarão o pacote completo.")
+                delta_url = None
+
         self.log_visual(">>> PROCESSANDO DISPARO <<<")
         cnt = 0
+        pendentes = {}  # item_id -> (ip, job_id) dos agentes que aceitaram a ordem
         
         for item_id in selecionados:
             item = self.infra_panel.tree.item(item_id)
@@ -987,33 +1124,156 @@ class CIGSApp:
                         msg = "Erro Copy"
 
             if copia_ok:
-                try:
-                    nome = os.path.basename(urlparse(d['url']).path) or "up.rar"
-                except:
-                    nome = "up.rar"
+                url_agente, sha_pacote, tam_pacote = self._origem_pacote(ip, d['url'], pacote_espelho)
                 
-                suc, msg = self.core.enviar_ordem_agendamento(
+                suc, job_id, msg = self.core.disparar_ordem_agendamento(
                     ip, 
-                    d['url'], 
+                    url_agente, 
                     nome, dt_str, 
                     user_atual, 
                     pass_atual, 
                     d['sistema'], 
                     modo,
-                    script=d['script'], params=d['params']
+                    script=d['script'], params=d['params'],
+                    sha256=sha_pacote, tamanho=tam_pacote,
+                    delta_url=delta_url,
+                    politica=d.get('politica')
                 )
             else:
                 suc = False
+                job_id = None
             
-            # Atualiza interface com resultado
-            tag = "SUCESSO" if suc else "OFFLINE"
-            self.root.after(0, lambda i=item_id, m=msg, t=tag: 
-                          self._atualizar_tree_apos_disparo(i, m, t))
+            if suc and job_id:
+                # Agente aceitou: o resultado final vem pelo acompanhamento do job
+                pendentes[item_id] = (ip, job_id)
+                self.log_visual(f"-> {ip}: Job {job_id} na fila")
+                self.root.after(0, lambda i=item_id, j=job_id: 
+                              self._atualizar_tree_apos_disparo(i, f"⏳ Job {j}", "ONLINE"))
+            else:
+                # Atualiza interface com resultado
+                tag = "SUCESSO" if suc else "OFFLINE"
+                self.root.after(0, lambda i=item_id, m=msg, t=tag: 
+                              self._atualizar_tree_apos_disparo(i, m, t))
             
             cnt += 1
         
+        self.log_visual(">>> ORDENS ENVIADAS <<<")
+        if pendentes:
+            self._acompanhar_jobs(pendentes)
         self.log_visual(">>> FIM DISPARO <<<")
 
+    def _preparar_espelho(self, d, nome):
+        """
+        Espelho: a Central baixa uma vez do S3 e serve os agentes pela rede local.
+        Returns: (seguir, pacote do espelho ou None = agentes baixam direto do link)
+        """
+        if not d.get('espelho'):
+            return True, None
+        valido, msg_link, _ = self.core.verificar_validade_link(d['url'])
+        if not valido:
+            self.log_visual(f"❌ ERRO: {msg_link}")
+            return False, None
+        self.log_visual(">>> ESPELHO: baixando pacote na Central <<<")
+        ok_esp, msg_esp, pacote = self.mirror.preparar_pacote(
+            d['url'], nome,
+            progresso=lambda b, t: self.update_progress(b // (1024 * 1024), t // (1024 * 1024), "MB no espelho"))
+        if ok_esp:
+            ok_esp, msg_esp = self.mirror.iniciar()
+        if not ok_esp:
+            self.log_visual(f"⚠️ Espelho indisponível ({msg_esp}). Agentes baixarão direto do link.")
+            return True, None
+        self.log_visual(f"✅ Espelho: {msg_esp} ({pacote['tamanho'] // (1024 * 1024)} MB)")
+        return True, pacote
+
+    def _origem_pacote(self, ip, url, pacote_espelho):
+        """(url, sha256, tamanho) que o agente recebe: link do espelho com o hash conferido, ou o link original."""
+        if pacote_espelho:
+            return self.mirror.url_para(ip, pacote_espelho['nome']), pacote_espelho['sha256'], pacote_espelho['tamanho']
+        return url, None, None
+
+    def btn_preparar(self):
+        """Envia o pacote antecipadamente aos servidores selecionados (prazo = data/hora da missão)"""
+        sel = self.infra_panel.tree.selection()
+        if not sel:
+            messagebox.showwarning("Aviso", "Nenhum servidor selecionado.\nSelecione na lista.")
+            return
+        d = self.top_panel.get_data()
+        if not d['url']:
+            messagebox.showwarning("Aviso", "Informe o link do pacote.")
+            return
+        prazo = f"{d['data']} {d['hora']}"
+        if messagebox.askyesno("Pré-preparo", f"Enviar o pacote para {len(sel)} servidor(es)?\n\n"
+                                              f"Os agentes baixam em segundo plano e deixam o pacote pronto até {prazo}."):
+            threading.Thread(target=self.worker_preparo, args=(sel, prazo), daemon=True).start()
+
+    def worker_preparo(self, selecionados, prazo):
+        """Pré-preparo: o agente baixa e verifica o pacote antes da janela de manutenção"""
+        d = self.top_panel.get_data()
+        try:
+            datetime.strptime(prazo, "%d/%m/%Y %H:%M")
+        except ValueError:
+            self.log_visual("❌ ERRO: Formato de data/hora inválido!")
+            return
+        try:
+            nome = os.path.basename(urlparse(d['url']).path) or "up.rar"
+        except:
+            nome = "up.rar"
+
+        # Mesma origem do disparo (espelho + hash): a missão reconhece o pacote preparado
+        seguir, pacote_espelho = self._preparar_espelho(d, nome)
+        if not seguir:
+            return
+
+        self.log_visual(f">>> PRÉ-PREPARO: {nome} pronto até {prazo} <<<")
+        aceitos = 0
+        for item_id in selecionados:
+            ip = self.infra_panel.tree.item(item_id)['values'][0]
+            url_agente, sha_pacote, tam_pacote = self._origem_pacote(ip, d['url'], pacote_espelho)
+            ok, job_id, msg = self.core.enviar_ordem_preparo(ip, url_agente, nome, d['sistema'], prazo,
+                                                             sha256=sha_pacote, tamanho=tam_pacote,
+                                                             politica=d.get('politica'))
+            if ok:
+                aceitos += 1
+                self.log_visual(f"-> {ip}: {msg}")
+                self.root.after(0, lambda i=item_id: self._atualizar_tree_apos_disparo(i, "📦 Preparando", "ONLINE"))
+            else:
+                self.log_visual(f"❌ {ip}: {msg}")
+        self.log_visual(f">>> PRÉ-PREPARO: {aceitos}/{len(selecionados)} agentes aceitaram. Acompanhe pelo Scan. <<<")
+
+    def _acompanhar_jobs(self, pendentes, timeout=1800, intervalo=3):
+        """
+        Acompanha em conjunto os jobs de missão disparados ({item_id: (ip, job_id)}),
+        atualizando a tabela com a etapa de cada um até todos terminarem.
+        """
+        limite = time.time() + timeout
+        while pendentes and time.time() < limite:
+            for item_id, (ip, job_id) in list(pendentes.items()):
+                job = self.core.consultar_job(ip, job_id)
+                estado = job.get('estado')
+                if estado in ("SUCESSO", "ERRO", "INTERROMPIDO"):
+                    del pendentes[item_id]
+                    msg = job.get('detalhe', estado)
+                    tag = "SUCESSO" if estado == "SUCESSO" else "OFFLINE"
+                    self.log_visual(f"{'✅' if estado == 'SUCESSO' else '❌'} {ip}: {msg}")
+                    # Divergências da verificação por hash (arquivos ausentes/corrompidos por pasta)
+                    for v in job.get('verificacao') or []:
+                        if not v.get('ok'):
+                            self.log_visual(f"⚠️ {ip}: {v['alvo']} - {v['total_ausentes']} ausentes, "
+                                            f"{v['total_corrompidos']} corrompidos "
+                                            f"(ex: {(v['ausentes'] + v['corrompidos'])[:3]})")
+                elif estado in ("FILA", "EXECUTANDO"):
+                    msg = f"⏳ {job.get('etapa', estado)} {job.get('progresso', 0)}%"
+                    tag = "ONLINE"
+                else:
+                    continue
+                self.root.after(0, lambda i=item_id, m=msg, t=tag: 
+                              self._atualizar_tree_apos_disparo(i, m, t))
+            if pendentes:
+                time.sleep(intervalo)
+
+        for item_id, (ip, job_id) in pendentes.items():
+            self.log_visual(f"⚠️ {ip}: Job {job_id} sem conclusão após {timeout}s")
+
     def _atualizar_tree_apos_disparo(self, item_id, mensagem, tag):
         """Atualiza a árvore após disparo"""
         try:
@@ -1029,6 +1289,10 @@ class CIGSApp:
     # RDP
     # ==========================================
     
+    def abrir_logs_servidor(self, ip):
+        """Abre o visualizador ao vivo do log do agente (só os bytes novos trafegam)"""
+        LogViewerDialog(self.root, self.core, ip)
+
     def rdp_connect(self, ip):
         """Estabelece conexão RDP com servidor"""
         user_esp, pass_esp = self.obter_credenciais_servidor(ip)
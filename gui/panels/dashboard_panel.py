@@ -122,12 +122,14 @@ class DashboardPanel(ttk.Frame):
         # 2. Função rápida de check (ping)
         def check_server(srv):
             ip = srv['ip']
-            # Usa check simples (ping http)
-            res = self.core.checar_status_agente(ip, "SISTEMA") 
+            # O semáforo só precisa saber se o agente responde: /cigs/ping (memória, sem disco)
+            res = self.core.ping_agente(ip)
             status = "ONLINE" if res.get('status') == "ONLINE" else "OFFLINE"
-            # Simula latência se não vier (ou pega do res se implementado)
-            latencia = 10 # ms (Placeholder)
-            return {**srv, 'status': status, 'latencia': latencia}
+            # Latência medida no próprio ping
+            latencia = res.get('latencia_ms') or 0
+            # Série de CPU/RAM do agente (só as amostras novas trafegam)
+            serie = self.core.historico_recursos(ip) if status == "ONLINE" else []
+            return {**srv, 'status': status, 'latencia': latencia, 'serie': serie[-60:]}
 
         # 3. Executa em paralelo (Muito rápido!)
         with ThreadPoolExecutor(max_workers=20) as executor:
@@ -174,6 +176,14 @@ class DashboardPanel(ttk.Frame):
             tk.Label(info_frame, text=srv['hostname'], bg="white", fg="gray", font=("Arial", 8), anchor="w").pack(fill="x")
             tk.Label(info_frame, text=srv['ip'], bg="white", fg="#2980b9", font=("Consolas", 8), anchor="w").pack(fill="x")
 
+            # Sparkline de CPU (últimas 60 amostras do agente) e última leitura de CPU/RAM
+            serie = srv.get('serie') or []
+            if serie:
+                self._desenhar_sparkline(card, [a.get('cpu') for a in serie])
+                ultima = serie[-1]
+                tk.Label(info_frame, text=f"CPU {ultima.get('cpu') or 0:.0f}% | RAM {ultima.get('ram') or 0:.0f}%",
+                         bg="white", fg="#7f8c8d", font=("Consolas", 7), anchor="w").pack(fill="x")
+
             # Lógica de quebra de linha do grid
             col += 1
             if col >= colunas_max:
@@ -181,4 +191,18 @@ class DashboardPanel(ttk.Frame):
                 row += 1
 
         # Atualiza gráficos também
-        self.update_plots()
\ No newline at end of file
+        self.update_plots()
+
+    def _desenhar_sparkline(self, parent, valores, largura=70, altura=30):
+        """Linha simples de 0 a 100% com os valores da série (None = sem leitura)."""
+        valores = [v for v in valores if v is not None]
+        cv = tk.Canvas(parent, width=largura, height=altura, bg="white", highlightthickness=0)
+        cv.pack(side="right", padx=3)
+        if len(valores) < 2:
+            return
+        passo = largura / (len(valores) - 1)
+        pontos = []
+        for i, v in enumerate(valores):
+            pontos.extend((i * passo, altura - 2 - (altura - 4) * min(v, 100) / 100))
+        cor = "#e74c3c" if valores[-1] >= 90 else "#2980b9"
+        cv.create_line(*pontos, fill=cor, width=1)
\ No newline at end of file
@@ -120,6 +120,7 @@ class InfraPanel(ttk.Frame):
         self.menu = Menu(self, tearoff=0)
         self.menu.add_command(label="🖥️ Acessar RDP", command=self.call_rdp)
         self.menu.add_command(label="📋 Copiar IP", command=self.copy_ip)
+        self.menu.add_command(label="📜 Ver Logs ao Vivo", command=self.call_logs)
         self.menu.add_separator()
 
         # --- NOVOS BOTÕES DE MANUTENÇÃO ---
@@ -144,6 +145,11 @@ class InfraPanel(ttk.Frame):
         if sel:
             self.cb['rdp'](self.tree.item(sel[0])['values'][0])
 
+    def call_logs(self):
+        sel = self.tree.selection()
+        if sel:
+            self.cb['logs'](self.tree.item(sel[0])['values'][0])
+
     def copy_ip(self):
         sel = self.tree.selection()
         if sel:
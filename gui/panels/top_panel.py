@@ -79,6 +79,25 @@ class TopPanel(ttk.LabelFrame):
         self.cb_tipo = ttk.Combobox(self, values=["Nuvem (Link AWS)", "Rede Local (Cópia)"], state="readonly")
         self.cb_tipo.current(0)  # Seleciona "Nuvem" por padrão
         self.cb_tipo.grid(row=3, column=1, columnspan=2, sticky="ew", padx=5)
+
+        # Linha 4: Pacote delta opcional (só as diferenças para a versão instalada no agente)
+        ttk.Label(self, text="Link Delta (opcional):").grid(row=4, column=0, sticky="w", pady=5)
+        self.ent_delta = ttk.Entry(self, width=50)
+        self.ent_delta.grid(row=4, column=1, columnspan=3, sticky="ew", padx=5)
+
+        # Linha 5: Política de recursos da missão (vazio/"Política do agente" = configuração do agente)
+        ttk.Label(self, text="Limite Download (KB/s):").grid(row=5, column=0, sticky="w")
+        self.ent_limite = ttk.Entry(self, width=12)  # 0 = sem limite
+        self.ent_limite.grid(row=5, column=1, sticky="w", padx=5)
+
+        ttk.Label(self, text="Prioridade Instalação:").grid(row=5, column=2, sticky="e")
+        self.cb_prioridade = ttk.Combobox(self, values=["Política do agente", "Baixa", "Normal"], width=18, state="readonly")
+        self.cb_prioridade.current(0)
+        self.cb_prioridade.grid(row=5, column=3, sticky="w", padx=5)
+
+        # Espelho: a Central baixa o pacote uma vez e os agentes puxam dela pela rede local
+        self.var_espelho = tk.BooleanVar(value=True)
+        ttk.Checkbutton(self, text="Distribuir pela Central (espelho)", variable=self.var_espelho).grid(row=3, column=3, columnspan=3, sticky="w", padx=5)
     
     def check_link(self, event=None):
         # Pega o valor digitado no campo URL
@@ -117,5 +136,19 @@ class TopPanel(ttk.LabelFrame):
             "sistema": self.cb_sis.get().strip(),
             "script": self.cb_script.get().strip(), # Nome do script selecionado
             "params": self.ent_params.get().strip(), # Parâmetros adicionais
-            "tipo": self.cb_tipo.get() # Fonte (Nuvem ou Local)
+            "tipo": self.cb_tipo.get(), # Fonte (Nuvem ou Local)
+            "espelho": self.var_espelho.get(), # Agentes baixam do espelho da Central
+            "delta": self.ent_delta.get().strip(), # Link do pacote delta (opcional)
+            "politica": self.get_politica() # Override da política de recursos do agente (ou None)
         }
+
+    def get_politica(self):
+        # Monta o override de política enviado ao agente; None = agente usa a própria configuração
+        politica = {}
+        limite = self.ent_limite.get().strip()
+        if limite.isdigit():
+            politica["download_kbs"] = int(limite)
+        prioridade = self.cb_prioridade.get()
+        if prioridade in ("Baixa", "Normal"):
+            politica["baixa_prioridade"] = prioridade == "Baixa"
+        return politica or None
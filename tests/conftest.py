@@ -0,0 +1,93 @@
+import os
+import sys
+import time
+import tempfile
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+# Raiz do projeto no path (os testes importam cigs_core direto)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Os caminhos de config.py são de Windows (C:\CIGS...); no Linux viram caminhos
+# relativos. Roda a partir de uma pasta temporária para não sujar o repositório.
+os.chdir(tempfile.mkdtemp(prefix="cigs_testes_"))
+
+
+ETAG = '"pacote-v1"'
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        srv = self.server
+        dados = srv.dados
+        srv.requisicoes.append(self.headers.get("Range"))
+        faixa = self.headers.get("Range")
+        if faixa:
+            inicio, fim = faixa.split("=")[1].split("-")
+            inicio = int(inicio)
+            fim = int(fim) if fim else len(dados) - 1
+            if inicio >= len(dados) or (srv.recusar_retomada and inicio > 0):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(dados)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            if inicio in srv.falhar_em:
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            corpo = dados[inicio:fim + 1]
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {inicio}-{fim}/{len(dados)}")
+        else:
+            corpo = dados
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(corpo)))
+        self.send_header("ETag", srv.etag)
+        self.end_headers()
+
+        enviados = 0
+        for i in range(0, len(corpo), 16384):
+            if srv.cortar_apos is not None and enviados >= srv.cortar_apos:
+                # Simula queda de conexão no meio da resposta
+                self.close_connection = True
+                return
+            self.wfile.write(corpo[i:i + 16384])
+            enviados += 16384
+            if srv.atraso:
+                time.sleep(srv.atraso)
+
+
+@pytest.fixture
+def servidor():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    srv.daemon_threads = True
+    srv.dados = os.urandom(512 * 1024)
+    srv.requisicoes = []
+    srv.recusar_retomada = False
+    srv.falhar_em = set()
+    srv.cortar_apos = None
+    srv.atraso = 0
+    srv.etag = ETAG
+    t = threading.Thread(target=srv.serve_forever, daemon=True)
+    t.start()
+    srv.url = f"http://127.0.0.1:{srv.server_address[1]}/pacote.rar?X-Amz-Signature=abc"
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+@pytest.fixture(autouse=True)
+def sem_limite_de_horario(monkeypatch):
+    # O limite por faixa de horário deixaria os downloads dos testes dependentes da hora
+    from cigs_core import politica
+    monkeypatch.setattr(politica, "POLITICA_DOWNLOAD_HORARIOS", [])
+    monkeypatch.setattr(politica, "POLITICA_DOWNLOAD_PADRAO_KBS", 0)
@@ -0,0 +1,137 @@
+import json
+import time
+import threading
+
+import pytest
+
+from cigs_core import agendador, tasks, registro_tarefas
+
+
+@pytest.fixture(autouse=True)
+def agenda_isolada(tmp_path, monkeypatch):
+    monkeypatch.setattr(agendador, "ARQUIVO_AGENDA", str(tmp_path / "agenda.json"))
+    monkeypatch.setattr(agendador, "_agenda", None)
+    disparos = []
+    evento = threading.Event()
+
+    def executar(bat):
+        disparos.append(bat)
+        evento.set()
+        return 0
+
+    monkeypatch.setattr(agendador, "_executar_launcher", executar)
+    yield disparos, evento
+    # Acorda o disparador para ele largar a agenda do teste
+    with agendador._aviso:
+        agendador._aviso.notify_all()
+
+
+def _aguardar_estado(entrada_id, estados, timeout=5):
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        for e in agendador.listar_agenda():
+            if e["id"] == entrada_id and e["estado"] in estados:
+                return e
+        time.sleep(0.02)
+    raise AssertionError(f"{entrada_id} não chegou em {estados}")
+
+
+def _id(nome):
+    return next(e["id"] for e in agendador.listar_agenda() if e["nome"] == nome and e["estado"] == agendador.AGENDADA)
+
+
+def test_dispara_no_horario(agenda_isolada):
+    disparos, evento = agenda_isolada
+    ok, _ = agendador.agendar_missao("CIGS_Update_AC", "AC", "Launcher_AC.bat", time.time() + 0.3)
+    assert ok
+    entrada_id = _id("CIGS_Update_AC")
+    assert not disparos
+    assert evento.wait(5)
+    entrada = _aguardar_estado(entrada_id, (agendador.CONCLUIDA,))
+    assert disparos == ["Launcher_AC.bat"]
+    assert entrada["retorno"] == 0
+
+
+def test_cancelamento_em_memoria(agenda_isolada):
+    disparos, _ = agenda_isolada
+    agendador.agendar_missao("CIGS_Update_AC", "AC", "Launcher_AC.bat", time.time() + 3600)
+    agendador.agendar_missao("CIGS_Update_AG", "AG", "Launcher_AG.bat", time.time() + 3600)
+
+    canceladas = agendador.cancelar_agendadas("ag")
+    assert [e["nome"] for e in canceladas] == ["CIGS_Update_AG"]
+    assert [e["nome"] for e in agendador.listar_agenda(pendentes=True)] == ["CIGS_Update_AC"]
+    assert len(agendador.cancelar_agendadas()) == 1
+    assert agendador.listar_agenda(pendentes=True) == []
+    assert not disparos
+
+
+def test_mesmo_nome_substitui_agendamento(agenda_isolada):
+    agendador.agendar_missao("CIGS_Update_AC", "AC", "Launcher_AC.bat", time.time() + 3600)
+    agendador.agendar_missao("CIGS_Update_AC", "AC", "Launcher_AC.bat", time.time() + 7200)
+    estados = sorted(e["estado"] for e in agendador.listar_agenda())
+    assert estados == [agendador.AGENDADA, agendador.CANCELADA]
+
+
+def test_agenda_sobrevive_ao_reinicio(agenda_isolada, monkeypatch, tmp_path):
+    agendador.agendar_missao("CIGS_Update_AC", "AC", "Launcher_AC.bat", time.time() + 3600)
+    monkeypatch.setattr(agendador, "_agenda", None)
+    assert [e["nome"] for e in agendador.listar_agenda(pendentes=True)] == ["CIGS_Update_AC"]
+
+
+def _gravar_agenda(caminho, *entradas):
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump({e["id"]: e for e in entradas}, f)
+
+
+def _entrada(entrada_id, estado, executar_em):
+    return {"id": entrada_id, "nome": f"CIGS_Update_{entrada_id}", "sistema": "AC", "bat": f"{entrada_id}.bat",
+            "executar_em": executar_em, "data_hora": "-", "estado": estado, "detalhe": ""}
+
+
+def test_horario_perdido_respeita_tolerancia(agenda_isolada, monkeypatch):
+    disparos, evento = agenda_isolada
+    monkeypatch.setattr(agendador, "AGENDADOR_TOLERANCIA_MIN", 30)
+    agora = time.time()
+    _gravar_agenda(agendador.ARQUIVO_AGENDA,
+                   _entrada("1_atrasada", agendador.AGENDADA, agora - 10 * 60),
+                   _entrada("2_perdida", agendador.AGENDADA, agora - 3 * 3600),
+                   _entrada("3_rodando", agendador.EXECUTANDO, agora - 60))
+    # O disparador do teste anterior pode ter carregado a agenda antes do arquivo existir
+    monkeypatch.setattr(agendador, "_agenda", None)
+
+    agendador.iniciar_agendador()
+
+    assert evento.wait(5)
+    atrasada = _aguardar_estado("1_atrasada", (agendador.CONCLUIDA,))
+    assert atrasada["atraso_s"] >= 10 * 60
+    assert disparos == ["1_atrasada.bat"]
+    estados = {e["id"]: e["estado"] for e in agendador.listar_agenda()}
+    assert estados["2_perdida"] == agendador.PERDIDA
+    assert estados["3_rodando"] == agendador.INTERROMPIDA
+
+
+def test_launcher_com_erro_vira_falha(agenda_isolada, monkeypatch):
+    monkeypatch.setattr(agendador, "_executar_launcher", lambda bat: 1)
+    agendador.agendar_missao("CIGS_Update_AC", "AC", "Launcher_AC.bat", time.time())
+    entrada = _aguardar_estado(agendador.listar_agenda()[0]["id"], (agendador.FALHA,))
+    assert entrada["retorno"] == 1
+
+
+def test_instante_missao():
+    ts = agendador.instante_missao("25/12/2030 22:15")
+    assert time.strftime("%d/%m/%Y %H:%M", time.localtime(ts)) == "25/12/2030 22:15"
+    assert time.strftime("%H:%M", time.localtime(agendador.instante_missao(""))) == "03:00"
+    with pytest.raises(ValueError):
+        agendador.instante_missao("2030-12-25 22:15")
+
+
+def test_abortar_no_modo_interno_nao_chama_schtasks(agenda_isolada, monkeypatch, tmp_path):
+    monkeypatch.setattr(tasks, "AGENDADOR_MODO", "INTERNO")
+    monkeypatch.setattr(tasks.subprocess, "run", lambda *a, **k: pytest.fail("schtasks chamado"))
+    monkeypatch.setattr(registro_tarefas, "ARQUIVO_REGISTRO_TAREFAS", str(tmp_path / "tarefas.json"))
+    monkeypatch.setattr(registro_tarefas, "_registro", None)
+    agendador.agendar_missao("CIGS_Update_AC", "AC", "Launcher_AC.bat", time.time() + 3600)
+    registro_tarefas.registrar_tarefa("CIGS_Update_AC", "AC", "-", "Launcher_AC.bat", agendador="INTERNO")
+    assert tasks.cancelar_missao() == "Abatidas 1 tarefas CIGS."
+    assert agendador.listar_agenda(pendentes=True) == []
+    assert tasks.cancelar_missao() == "Nenhuma tarefa encontrada."
@@ -0,0 +1,73 @@
+import os
+
+import pytest
+
+from cigs_core import cache_pacotes
+from cigs_core.cache_pacotes import buscar_pacote, guardar_pacote
+from cigs_core.download import sha256_arquivo
+
+
+@pytest.fixture(autouse=True)
+def cache_isolado(tmp_path, monkeypatch):
+    pasta = str(tmp_path / "Cache")
+    monkeypatch.setattr(cache_pacotes, "PASTA_CACHE", pasta)
+    monkeypatch.setattr(cache_pacotes, "ARQUIVO_INDICE_CACHE", os.path.join(pasta, "indice.json"))
+    monkeypatch.setattr(cache_pacotes, "_indice", None)
+    return pasta
+
+
+def _pacote(tmp_path, nome, tamanho):
+    caminho = str(tmp_path / nome)
+    with open(caminho, 'wb') as f:
+        f.write(os.urandom(tamanho))
+    return caminho
+
+
+def test_busca_por_hash_nao_usa_rede(tmp_path):
+    origem = _pacote(tmp_path, "pacote.rar", 1000)
+    sha = sha256_arquivo(origem)
+    caminho, em_cache, sha_guardado = guardar_pacote("http://127.0.0.1:1/pacote.rar?X-Amz-Signature=a", origem,
+                                                     "pacote.rar")
+    assert em_cache and not os.path.exists(origem) and sha_guardado == sha
+    assert os.path.basename(caminho) == sha + ".rar"
+
+    # Porta 1: qualquer acesso à rede falharia
+    assert buscar_pacote("http://127.0.0.1:1/outro.rar", sha256=sha.upper()) == caminho
+    assert buscar_pacote("http://127.0.0.1:1/outro.rar", sha256="0" * 64) is None
+
+
+def test_busca_por_url_confere_etag(servidor, tmp_path):
+    origem = _pacote(tmp_path, "pacote.rar", 1000)
+    caminho, _, _ = guardar_pacote(servidor.url, origem, "pacote.rar", etag=servidor.etag)
+
+    # Link novo (outra assinatura) do mesmo objeto: mesmo pacote
+    assert buscar_pacote(servidor.url.replace("abc", "zzz")) == caminho
+
+    # Objeto mudou no servidor: não serve o pacote antigo
+    servidor.etag = '"pacote-v2"'
+    assert buscar_pacote(servidor.url) is None
+
+
+def test_arquivo_apagado_sai_do_indice(tmp_path):
+    origem = _pacote(tmp_path, "pacote.rar", 1000)
+    sha = sha256_arquivo(origem)
+    caminho, _, _ = guardar_pacote("http://h/p.rar", origem, "pacote.rar")
+    os.remove(caminho)
+    assert buscar_pacote("http://h/p.rar", sha256=sha) is None
+
+
+def test_remove_menos_usado_acima_do_limite(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_pacotes, "CACHE_LIMITE_BYTES", 2500)
+    a, _, _ = guardar_pacote("http://h/a.rar", _pacote(tmp_path, "a.rar", 1000), "a.rar")
+    b, _, _ = guardar_pacote("http://h/b.rar", _pacote(tmp_path, "b.rar", 1000), "b.rar")
+    sha_a = os.path.splitext(os.path.basename(a))[0]
+
+    # "a" usado por último: "b" é o menos usado e sai quando "c" entra
+    assert buscar_pacote("http://h/a.rar", sha256=sha_a) == a
+    c, _, _ = guardar_pacote("http://h/c.rar", _pacote(tmp_path, "c.rar", 1000), "c.rar")
+    assert os.path.exists(a) and os.path.exists(c)
+    assert not os.path.exists(b)
+
+    # Pacote maior que o limite inteiro não entra no cache
+    grande = _pacote(tmp_path, "g.rar", 3000)
+    assert guardar_pacote("http://h/g.rar", grande, "g.rar")[:2] == (grande, False)
@@ -0,0 +1,117 @@
+import time
+
+import pytest
+
+from cigs_core import api, canal, jobs
+from core.hub_manager import CIGSHub
+from core.network_ops import CIGSCore
+
+IP = "127.0.0.1"
+
+
+def _esperar(condicao, timeout=5):
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        valor = condicao()
+        if valor:
+            return valor
+        time.sleep(0.05)
+    raise AssertionError("condição não atingida")
+
+
+@pytest.fixture
+def status_agente():
+    # Status básico que o agente publica (cópia nova a cada chamada, como resumo_status_canal)
+    return {"version": "teste", "hash": "abc", "sistemas": {"AC": {"clientes": 3, "ref": "202610", "preparo": None}}}
+
+
+@pytest.fixture
+def hub(monkeypatch, status_agente):
+    monkeypatch.setattr(canal, "CANAL_HEARTBEAT", 0.2)
+    monkeypatch.setattr(canal, "CANAL_TOKEN", "segredo")
+    hub = CIGSHub(porta=0, token="segredo")
+    assert hub.iniciar()[0]
+    resumo = lambda: {**status_agente, "sistemas": {k: dict(v) for k, v in status_agente["sistemas"].items()}}
+    assert canal.iniciar_canal(api.app, resumo, hub=f"{IP}:{hub.porta}")
+    yield hub
+    canal.parar_canal()
+    hub.parar()
+
+
+def test_status_e_heartbeat_chegam_sem_polling(hub, status_agente, monkeypatch):
+    estado = _esperar(lambda: (hub.estado(IP) or {}).get("sistemas"))
+    assert estado["AC"]["clientes"] == 3
+
+    core = CIGSCore()
+    core.usar_hub(hub)
+
+    def sem_http(*args, **kwargs):
+        raise AssertionError("não deveria usar HTTP")
+
+    monkeypatch.setattr("core.network_ops.requests.get", sem_http)
+    res = core.checar_status_agente(IP, "AC")
+    assert res["via"] == "hub" and res["clientes"] == 3 and res["hash"] == "abc"
+
+    # O RTT vem do pong do hub no heartbeat seguinte
+    ping = _esperar(lambda: core.ping_agente(IP)["latencia_ms"] is not None and core.ping_agente(IP))
+    assert ping["status"] == "ONLINE" and ping["via"] == "hub"
+
+    # Mudança de status é empurrada pelo agente
+    status_agente["sistemas"]["AC"]["clientes"] = 4
+    _esperar(lambda: hub.estado(IP)["sistemas"]["AC"]["clientes"] == 4)
+
+
+def test_comando_pelo_canal_usa_as_rotas_da_api(hub):
+    _esperar(lambda: hub.conectado(IP))
+    resposta = hub.enviar_comando(IP, "GET", "/cigs/ping", timeout=5)
+    assert resposta["codigo"] == 200
+    assert resposta["corpo"]["status"] == "ONLINE" and resposta["corpo"]["canal"] is True
+
+    assert hub.enviar_comando(IP, "GET", "/outra", timeout=5)["codigo"] == 404
+    assert hub.enviar_comando("10.0.0.9", "GET", "/cigs/ping") is None
+
+
+def test_fim_de_job_chega_como_evento(hub):
+    _esperar(lambda: hub.conectado(IP))
+    core = CIGSCore()
+    core.usar_hub(hub)
+
+    job_id = jobs.criar_job("MISSAO", "TSTC", lambda progresso: (True, "feito"))
+    assert hub.aguardar_fim_job(IP, job_id, 5)["estado"] == jobs.SUCESSO
+    assert core.aguardar_job(IP, job_id, timeout=5) == (True, "feito")
+
+
+def test_token_errado_e_recusado(monkeypatch):
+    monkeypatch.setattr(canal, "CANAL_HEARTBEAT", 0.2)
+    monkeypatch.setattr(canal, "CANAL_TOKEN", "errado")
+    hub = CIGSHub(porta=0, token="segredo")
+    hub.iniciar()
+    try:
+        canal.iniciar_canal(api.app, lambda: {"sistemas": {}}, hub=f"{IP}:{hub.porta}")
+        _esperar(lambda: canal.estado_canal()["conexoes"] > 0)
+        time.sleep(0.3)
+        assert not hub.conectado(IP)
+        assert hub.listar_agentes() == {}
+    finally:
+        canal.parar_canal()
+        hub.parar()
+
+
+def test_queda_do_hub_volta_para_http_e_reconecta(hub):
+    _esperar(lambda: hub.conectado(IP))
+    porta = hub.porta
+    hub.parar()
+    _esperar(lambda: not canal.estado_canal()["conectado"])
+
+    core = CIGSCore()
+    core.usar_hub(hub)
+    assert core._estado_hub(IP) is None
+
+    # Hub volta na mesma porta: o agente reconecta sozinho
+    novo = CIGSHub(porta=porta, token="segredo")
+    assert novo.iniciar()[0]
+    try:
+        _esperar(lambda: novo.conectado(IP), timeout=8)
+        assert canal.estado_canal()["conexoes"] >= 2
+    finally:
+        novo.parar()
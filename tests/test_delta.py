@@ -0,0 +1,120 @@
+import os
+import json
+import zipfile
+
+from cigs_core import tasks, instalacao
+from cigs_core.delta import gerar_delta, gerar_patch, aplicar_patch, reconstruir_por_delta, impressao_manifesto
+from cigs_core.instalacao import listar_arquivos, montar_manifesto_pacote
+
+
+def _criar(pasta, arquivos):
+    for rel, conteudo in arquivos.items():
+        caminho = os.path.join(pasta, rel)
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        with open(caminho, 'wb') as f:
+            f.write(conteudo)
+
+
+def _manifesto(pasta):
+    return montar_manifesto_pacote(pasta, listar_arquivos(pasta))
+
+
+EXE_V1 = os.urandom(64 * 1024 * 8)
+EXE_V2 = EXE_V1[:64 * 1024 * 3] + os.urandom(64 * 1024) + EXE_V1[64 * 1024 * 4:]
+
+V1 = {"AC.exe": EXE_V1, os.path.join("dll", "a.dll"): b"a" * 300, "velho.txt": b"sai"}
+V2 = {"AC.exe": EXE_V2, os.path.join("dll", "a.dll"): b"a" * 300, os.path.join("dll", "novo.dll"): b"n" * 50}
+
+
+def test_patch_por_blocos(tmp_path):
+    base, novo, saida = (str(tmp_path / n) for n in ("base", "novo", "saida"))
+    _criar(str(tmp_path), {"base": EXE_V1, "novo": EXE_V2})
+    patch = gerar_patch(base, novo)
+    # Só o bloco alterado vai literal
+    assert len(patch) < 64 * 1024 + 200
+    aplicar_patch(base, patch, saida)
+    with open(saida, 'rb') as f:
+        assert f.read() == EXE_V2
+
+
+def test_reconstroi_versao_nova_sobre_a_instalada(tmp_path):
+    instalada, nova, montada = (str(tmp_path / n) for n in ("AC", "v2", "montada"))
+    _criar(instalada, V1)
+    _criar(nova, V2)
+    caminho_delta = str(tmp_path / "v2.cigsdelta")
+    resumo = gerar_delta(instalada, nova, caminho_delta)
+    assert resumo["alterados"] == 2 and resumo["removidos"] == 1
+    assert resumo["bytes"] < len(EXE_V2) // 2
+
+    ok, msg, esperado = reconstruir_por_delta(caminho_delta, _manifesto(instalada), instalada, montada)
+    assert ok, msg
+    assert impressao_manifesto(_manifesto(montada)) == impressao_manifesto(esperado) == impressao_manifesto(_manifesto(nova))
+
+
+def test_base_diferente_recusa(tmp_path):
+    instalada, nova = str(tmp_path / "AC"), str(tmp_path / "v2")
+    _criar(instalada, V1)
+    _criar(nova, V2)
+    caminho_delta = str(tmp_path / "v2.cigsdelta")
+    gerar_delta(instalada, nova, caminho_delta)
+
+    # Manifesto gravado é de outra versão
+    outra = _manifesto(nova)
+    ok, msg, _ = reconstruir_por_delta(caminho_delta, outra, instalada, str(tmp_path / "m"))
+    assert not ok and "base" in msg
+
+    # Manifesto confere, mas o arquivo instalado foi alterado depois
+    manifesto = _manifesto(instalada)
+    _criar(instalada, {os.path.join("dll", "a.dll"): b"b" * 300})
+    ok, msg, _ = reconstruir_por_delta(caminho_delta, manifesto, instalada, str(tmp_path / "m2"))
+    assert not ok and "alterado" in msg
+
+
+def test_tarefa_usa_delta_e_volta_para_completo(tmp_path, monkeypatch):
+    instalada, nova = str(tmp_path / "AC"), str(tmp_path / "v2")
+    _criar(instalada, V1)
+    _criar(nova, V2)
+    caminho_delta = str(tmp_path / "v2.cigsdelta")
+    gerar_delta(instalada, nova, caminho_delta)
+
+    monkeypatch.setattr(instalacao, "PASTA_MANIFESTOS", str(tmp_path / "Manifestos"))
+    monkeypatch.setattr(tasks, "PASTA_DOWNLOAD", str(tmp_path / "Downloads"))
+    os.makedirs(str(tmp_path / "Downloads"))
+
+    def baixar_falso(url, destino, **kwargs):
+        with open(caminho_delta, 'rb') as f, open(destino, 'wb') as d:
+            d.write(f.read())
+        return True, "ok", {}
+    monkeypatch.setattr(tasks, "baixar_arquivo", baixar_falso)
+    progresso = lambda *a, **k: None
+    temp = str(tmp_path / "Temp_Install")
+
+    # Sem manifesto da versão instalada: usa o pacote completo
+    assert tasks._preparar_por_delta("http://h/v2.cigsdelta", None, "AC", instalada, temp, progresso, progresso) is None
+
+    instalacao.salvar_manifesto_pacote("AC", "v1.rar", _manifesto(instalada))
+    manifesto = tasks._preparar_por_delta("http://h/v2.cigsdelta", None, "AC", instalada, temp, progresso, progresso)
+    assert manifesto is not None
+    assert impressao_manifesto(manifesto) == impressao_manifesto(_manifesto(nova))
+    assert not os.path.exists(os.path.join(str(tmp_path / "Downloads"), "v2.cigsdelta"))
+
+
+def test_caminho_fora_do_destino_recusa(tmp_path):
+    instalada, nova = str(tmp_path / "AC"), str(tmp_path / "v2")
+    _criar(instalada, V1)
+    _criar(nova, V1)
+    caminho_delta = str(tmp_path / "v2.cigsdelta")
+    gerar_delta(instalada, nova, caminho_delta)
+
+    # delta.json adulterado: arquivo novo apontando para fora da pasta montada
+    with zipfile.ZipFile(caminho_delta) as z:
+        info = json.loads(z.read("delta.json"))
+    for rel in ("../fora.txt", "/tmp/fora.txt", "C:/fora.txt", "dll/../../fora.txt"):
+        adulterado = str(tmp_path / "adulterado.cigsdelta")
+        with zipfile.ZipFile(adulterado, 'w') as z:
+            z.writestr("delta.json", json.dumps({**info, "manifesto": info["manifesto"] + [[rel, 3, "0" * 64]],
+                                                 "operacoes": {rel: {"tipo": "ARQUIVO"}}}))
+            z.writestr(f"arquivos/{rel}", b"mal")
+        ok, msg, _ = reconstruir_por_delta(adulterado, _manifesto(instalada), instalada, str(tmp_path / "m" / "x"))
+        assert not ok and "Caminho inválido" in msg
+        assert not os.path.exists(tmp_path / "fora.txt") and not os.path.exists(tmp_path / "m" / "fora.txt")
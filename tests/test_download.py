@@ -0,0 +1,109 @@
+import os
+import json
+import time
+import hashlib
+
+import pytest
+
+from cigs_core import download
+from cigs_core.download import baixar_arquivo, url_sem_assinatura
+
+from conftest import ETAG
+
+
+@pytest.fixture
+def destino(tmp_path):
+    return str(tmp_path / "pacote.rar")
+
+
+def _sha(dados):
+    return hashlib.sha256(dados).hexdigest()
+
+
+def _ler(caminho):
+    with open(caminho, 'rb') as f:
+        return f.read()
+
+
+def test_download_simples(servidor, destino):
+    ok, msg, estat = baixar_arquivo(servidor.url, destino, sha256=_sha(servidor.dados), segmentos=1)
+    assert ok, msg
+    assert _ler(destino) == servidor.dados
+    assert not os.path.exists(destino + ".part")
+    assert not os.path.exists(destino + ".part.json")
+    assert estat["sha256"] == _sha(servidor.dados)
+
+
+def test_download_segmentado(servidor, destino, monkeypatch):
+    monkeypatch.setattr(download, "DOWNLOAD_SEGMENTAR_MIN", 1)
+    ok, msg, estat = baixar_arquivo(servidor.url, destino, sha256=_sha(servidor.dados), segmentos=4)
+    assert ok, msg
+    assert estat["segmentos"] == 4
+    assert _ler(destino) == servidor.dados
+
+
+def test_sha_divergente_descarta_part(servidor, destino):
+    ok, msg, _ = baixar_arquivo(servidor.url, destino, sha256="0" * 64, segmentos=1)
+    assert not ok and "SHA-256" in msg
+    assert not os.path.exists(destino + ".part")
+
+
+def test_retomada_apos_queda(servidor, destino, monkeypatch):
+    # Primeira tentativa cai no meio e desiste (sem novas tentativas)
+    monkeypatch.setattr(download, "DOWNLOAD_TENTATIVAS", 0)
+    servidor.cortar_apos = 128 * 1024
+    ok, _, _ = baixar_arquivo(servidor.url, destino, segmentos=1, chunk=16384)
+    assert not ok
+    parcial = os.path.getsize(destino + ".part")
+    assert 0 < parcial < len(servidor.dados)
+
+    # Segunda chamada (com outra assinatura no link) retoma de onde parou
+    servidor.cortar_apos = None
+    url_nova = servidor.url.replace("abc", "xyz")
+    ok, msg, estat = baixar_arquivo(url_nova, destino, sha256=_sha(servidor.dados), segmentos=1)
+    assert ok, msg
+    assert estat["retomado_de"] == parcial
+    assert estat["bytes"] == len(servidor.dados) - parcial
+    assert _ler(destino) == servidor.dados
+
+
+def _gravar_checkpoint(servidor, destino, conteudo, segmentos):
+    with open(destino + ".part", 'wb') as f:
+        f.write(conteudo)
+    with open(destino + ".part.json", 'w', encoding='utf-8') as f:
+        json.dump({"url": url_sem_assinatura(servidor.url), "etag": ETAG,
+                   "total": len(servidor.dados), "segmentos": segmentos}, f)
+
+
+def test_part_completo_nao_baixa_de_novo(servidor, destino):
+    total = len(servidor.dados)
+    _gravar_checkpoint(servidor, destino, servidor.dados, [[0, None, total]])
+
+    ok, msg, estat = baixar_arquivo(servidor.url, destino, sha256=_sha(servidor.dados), segmentos=1)
+    assert ok, msg
+    assert estat["bytes"] == 0
+    # Só a sonda Range 0-0; nenhum pedido "bytes=total-" (que daria 416)
+    assert servidor.requisicoes == ["bytes=0-0"]
+    assert _ler(destino) == servidor.dados
+
+
+def test_416_na_retomada_recomeca_do_zero(servidor, destino):
+    servidor.recusar_retomada = True
+    _gravar_checkpoint(servidor, destino, servidor.dados[:1000], [[0, None, 1000]])
+
+    ok, msg, estat = baixar_arquivo(servidor.url, destino, sha256=_sha(servidor.dados), segmentos=1)
+    assert ok, msg
+    assert estat["retomado_de"] == 0
+    assert _ler(destino) == servidor.dados
+
+
+def test_falha_em_um_segmento_cancela_os_outros(servidor, destino, monkeypatch):
+    monkeypatch.setattr(download, "DOWNLOAD_SEGMENTAR_MIN", 1)
+    servidor.dados = os.urandom(2 * 1024 * 1024)
+    servidor.atraso = 0.05  # ~3s por segmento de 512KB
+    servidor.falhar_em = {len(servidor.dados) // 4}
+
+    inicio = time.monotonic()
+    ok, msg, _ = baixar_arquivo(servidor.url, destino, segmentos=4, chunk=16384)
+    assert not ok and "404" in msg
+    assert time.monotonic() - inicio < 2.0
@@ -0,0 +1,114 @@
+import io
+import os
+import hashlib
+import tarfile
+import zipfile
+
+import pytest
+
+from cigs_core import extracao
+from cigs_core.extracao import formato_pacote, extrair_pacote, baixar_e_extrair
+
+
+ARQUIVOS = {"AC.exe": os.urandom(300 * 1024), "dll/a.dll": b"a" * 5000, "leia.txt": b"ok"}
+
+
+def _tar_gz(arquivos, extra=None):
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w:gz") as tar:
+        for nome, dados in list(arquivos.items()) + list((extra or {}).items()):
+            info = tarfile.TarInfo(nome)
+            info.size = len(dados)
+            tar.addfile(info, io.BytesIO(dados))
+    return buf.getvalue()
+
+
+def _conferir(pasta):
+    for nome, dados in ARQUIVOS.items():
+        with open(os.path.join(pasta, *nome.split("/")), 'rb') as f:
+            assert f.read() == dados
+
+
+def test_formato_pelo_nome():
+    assert formato_pacote("AC.zip") == "ZIP"
+    assert formato_pacote("AC.TAR.GZ") == "TAR_GZ"
+    assert formato_pacote("AC.tar.zst") == "TAR_ZST"
+    assert formato_pacote("AC.7z") == "7Z"
+    assert formato_pacote("up.rar") == "RAR"
+
+
+def test_extrai_zip_e_tar_no_processo(tmp_path):
+    caminho_zip = str(tmp_path / "p.zip")
+    with zipfile.ZipFile(caminho_zip, 'w') as z:
+        for nome, dados in ARQUIVOS.items():
+            z.writestr(nome, dados)
+    ok, msg = extrair_pacote(caminho_zip, str(tmp_path / "zip"))
+    assert ok, msg
+    _conferir(str(tmp_path / "zip"))
+
+    caminho_tar = str(tmp_path / "p.tar.gz")
+    with open(caminho_tar, 'wb') as f:
+        f.write(_tar_gz(ARQUIVOS))
+    ok, msg = extrair_pacote(caminho_tar, str(tmp_path / "tar"))
+    assert ok, msg
+    _conferir(str(tmp_path / "tar"))
+
+
+def test_tar_com_caminho_para_fora_e_recusado(tmp_path):
+    caminho = str(tmp_path / "mal.tar.gz")
+    with open(caminho, 'wb') as f:
+        f.write(_tar_gz({}, {"../fora.txt": b"x"}))
+    ok, _ = extrair_pacote(caminho, str(tmp_path / "destino"))
+    assert not ok
+    assert not os.path.exists(tmp_path / "fora.txt")
+
+
+def test_formato_opcional_ausente(tmp_path, monkeypatch):
+    monkeypatch.setattr(extracao, "HAS_7Z", False)
+    ok, msg = extrair_pacote(str(tmp_path / "p.7z"), str(tmp_path / "d"))
+    assert not ok and "py7zr" in msg
+
+
+def test_extrai_durante_o_download(tmp_path, servidor):
+    servidor.dados = _tar_gz(ARQUIVOS)
+    sha = hashlib.sha256(servidor.dados).hexdigest()
+    destino = str(tmp_path / "p.tar.gz")
+    pasta = str(tmp_path / "extraido")
+    os.makedirs(pasta)
+
+    ok, msg, estat = baixar_e_extrair(servidor.url, destino, pasta, "TAR_GZ", sha256=sha)
+    assert ok, msg
+    _conferir(pasta)
+    # O pacote inteiro também fica em disco (para o cache)
+    with open(destino, 'rb') as f:
+        assert f.read() == servidor.dados
+    assert estat["sha256"] == sha and estat["streaming"]
+
+
+def test_download_cortado_falha_para_o_fallback(tmp_path, servidor):
+    servidor.dados = _tar_gz(ARQUIVOS)
+    servidor.cortar_apos = 64 * 1024
+    destino = str(tmp_path / "p.tar.gz")
+    pasta = str(tmp_path / "extraido")
+    os.makedirs(pasta)
+
+    ok, _, _ = baixar_e_extrair(servidor.url, destino, pasta, "TAR_GZ")
+    assert not ok
+    assert not os.path.exists(destino) and not os.path.exists(destino + ".part")
+
+
+@pytest.mark.skipif(not extracao.HAS_ZSTD, reason="zstandard ausente")
+def test_tar_zst(tmp_path):
+    import zstandard
+    caminho = str(tmp_path / "p.tar.zst")
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w") as tar:
+        for nome, dados in ARQUIVOS.items():
+            info = tarfile.TarInfo(nome)
+            info.size = len(dados)
+            tar.addfile(info, io.BytesIO(dados))
+    with open(caminho, 'wb') as f:
+        f.write(zstandard.ZstdCompressor().compress(buf.getvalue()))
+    ok, msg = extrair_pacote(caminho, str(tmp_path / "d"))
+    assert ok, msg
+    _conferir(str(tmp_path / "d"))
@@ -0,0 +1,59 @@
+import os
+
+import pytest
+
+from cigs_core import ini_cache
+
+
+@pytest.fixture
+def ini(tmp_path, monkeypatch):
+    monkeypatch.setitem(ini_cache.MAPA_RAIZ, "AC", str(tmp_path))
+    monkeypatch.setattr(ini_cache, "_cache", {})
+    parseados = []
+    original = ini_cache._parsear_config_ini
+
+    def contar(caminho):
+        parseados.append(caminho)
+        return original(caminho)
+
+    monkeypatch.setattr(ini_cache, "_parsear_config_ini", contar)
+    caminho = tmp_path / "config.ini"
+    caminho.write_text("Customer=CLIENTE_A,1\n;Customer=ANTIGO,2\nDatabaseName=srv:C:\\Dados\\AC.FDB\n",
+                       encoding="latin-1")
+    return caminho, parseados
+
+
+def test_cache_reaproveitado_enquanto_arquivo_nao_muda(ini):
+    _, parseados = ini
+    dados = ini_cache.ler_config_sistema("ac")
+    assert dados["clientes"] == ["CLIENTE_A"] and dados["comentados"] == 1
+    assert dados["database_name"].endswith("AC.FDB")
+    assert ini_cache.ler_config_sistema("AC") == dados
+    assert len(parseados) == 1
+
+
+def test_mudanca_de_tamanho_ou_mtime_invalida(ini):
+    caminho, parseados = ini
+    ini_cache.ler_config_sistema("AC")
+
+    # Mesmo tamanho, só o mtime muda (ex.: cliente trocado por outro de nome igual em tamanho)
+    st = caminho.stat()
+    caminho.write_text(caminho.read_text(encoding="latin-1").replace("CLIENTE_A", "CLIENTE_B"), encoding="latin-1")
+    os.utime(caminho, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert ini_cache.ler_config_sistema("AC")["ref"] == "CLIENTE_B"
+
+    # Tamanho muda com o mtime preservado
+    st = caminho.stat()
+    with open(caminho, "a", encoding="latin-1") as f:
+        f.write("Customer=CLIENTE_C,3\n")
+    os.utime(caminho, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert ini_cache.ler_config_sistema("AC")["clientes"] == ["CLIENTE_B", "CLIENTE_C"]
+    assert len(parseados) == 3
+
+
+def test_resultado_e_copia_do_cache(ini):
+    dados = ini_cache.ler_config_sistema("AC")
+    dados["clientes"].append("INTRUSO")
+    dados["ref"] = "ALTERADO"
+    novo = ini_cache.ler_config_sistema("AC")
+    assert novo["clientes"] == ["CLIENTE_A"] and novo["ref"] == "CLIENTE_A"
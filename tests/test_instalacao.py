@@ -0,0 +1,136 @@
+import os
+import stat
+
+import hashlib
+
+import pytest
+
+from cigs_core import instalacao
+from cigs_core.instalacao import listar_arquivos, instalar_em_alvos, montar_manifesto_pacote, verificar_alvo
+
+
+@pytest.fixture(autouse=True)
+def estado_isolado(tmp_path, monkeypatch):
+    monkeypatch.setattr(instalacao, "PASTA_ESTADO_ALVOS", str(tmp_path / "Estado_Alvos"))
+
+
+def _criar(pasta, arquivos):
+    for rel, conteudo in arquivos.items():
+        caminho = os.path.join(pasta, rel)
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        with open(caminho, 'wb') as f:
+            f.write(conteudo)
+
+
+PACOTE = {
+    "AC.exe": b"x" * 5000,
+    os.path.join("dll", "a.dll"): b"a" * 300,
+    os.path.join("dll", "sub", "b.dll"): b"b" * 10,
+}
+
+
+def test_lista_unica_com_tamanhos(tmp_path):
+    _criar(str(tmp_path / "pkg"), PACOTE)
+    arquivos = dict(listar_arquivos(str(tmp_path / "pkg")))
+    assert arquivos == {rel: len(c) for rel, c in PACOTE.items()}
+
+
+def test_instala_em_todos_os_alvos(tmp_path):
+    origem = str(tmp_path / "pkg")
+    _criar(origem, PACOTE)
+    alvos = [str(tmp_path / n) for n in ("AC", "AC1", "AC2")]
+
+    # Alvo já tem um arquivo extra e uma versão antiga somente leitura
+    _criar(alvos[1], {"extra.txt": b"fica", "AC.exe": b"velho"})
+    os.chmod(os.path.join(alvos[1], "AC.exe"), stat.S_IREAD)
+
+    arquivos = listar_arquivos(origem)
+    manifesto = montar_manifesto_pacote(origem, arquivos)
+    concluidos = []
+    resultados = instalar_em_alvos(origem, manifesto, alvos, progresso=lambda c, t, r: concluidos.append((c, t)))
+
+    assert sorted(r["alvo"] for r in resultados) == sorted(alvos)
+    assert concluidos[-1] == (3, 3)
+    # O alvo principal é o último e recebe os arquivos movidos
+    assert resultados[-1]["alvo"] == alvos[0] and resultados[-1]["modo"] == "MOVER"
+    for r in resultados:
+        assert r["arquivos"] == 3 and r["bytes"] == 5310 and not r["falhas"]
+        assert "mb_s" in r and "arquivos_s" in r
+        assert verificar_alvo(r["alvo"], manifesto)["ok"]
+    assert os.path.exists(os.path.join(alvos[1], "extra.txt"))
+
+
+def test_manifesto_e_verificacao_por_alvo(tmp_path):
+    origem = str(tmp_path / "pkg")
+    _criar(origem, PACOTE)
+    manifesto = montar_manifesto_pacote(origem, listar_arquivos(origem))
+    assert {rel: sha for rel, _, sha in manifesto} == {rel: hashlib.sha256(c).hexdigest() for rel, c in PACOTE.items()}
+
+    alvo = str(tmp_path / "AC")
+    _criar(alvo, {
+        "AC.exe": b"y" * 5000,                          # mesmo tamanho, conteúdo diferente
+        os.path.join("dll", "a.dll"): b"curto",         # tamanho diferente (sem hash)
+        "extra.txt": b"arquivo extra no destino",
+    })
+    r = verificar_alvo(alvo, manifesto)
+    assert not r["ok"]
+    assert r["ausentes"] == [os.path.join("dll", "sub", "b.dll")]
+    assert sorted(r["corrompidos"]) == sorted(["AC.exe", os.path.join("dll", "a.dll")])
+    assert r["total_ausentes"] == 1 and r["total_corrompidos"] == 2
+
+
+def test_copia_so_o_que_mudou(tmp_path):
+    alvo = str(tmp_path / "AC1")
+
+    def instalar(conteudo):
+        origem = str(tmp_path / "pkg")
+        _criar(origem, conteudo)
+        manifesto = montar_manifesto_pacote(origem, listar_arquivos(origem))
+        extra = str(tmp_path / "AC")   # alvo principal (mover)
+        resultado = [r for r in instalar_em_alvos(origem, manifesto, [extra, alvo]) if r["alvo"] == alvo][0]
+        return resultado, manifesto
+
+    # Primeira instalação: tudo copiado
+    r, _ = instalar(PACOTE)
+    assert r["arquivos"] == 3 and r["ignorados"] == 0
+
+    # Mesmo pacote de novo: nada copiado e nenhum hash recalculado (estado do alvo)
+    r, _ = instalar(PACOTE)
+    assert r["arquivos"] == 0 and r["ignorados"] == 3
+    assert r["bytes_ignorados"] == 5310 and r["hashes_calculados"] == 0
+
+    # Um arquivo mudou (mesmo tamanho): só ele é copiado
+    novo = dict(PACOTE)
+    novo["AC.exe"] = b"z" * 5000
+    r, manifesto = instalar(novo)
+    assert r["arquivos"] == 1 and r["ignorados"] == 2
+    assert verificar_alvo(alvo, manifesto)["ok"]
+
+
+def test_sem_estado_compara_por_hash(tmp_path):
+    origem = str(tmp_path / "pkg")
+    _criar(origem, PACOTE)
+    alvo = str(tmp_path / "AC1")
+    _criar(alvo, PACOTE)   # destino já igual, mas sem arquivo de estado
+    manifesto = montar_manifesto_pacote(origem, listar_arquivos(origem))
+    r = [r for r in instalar_em_alvos(origem, manifesto, [str(tmp_path / "AC"), alvo]) if r["alvo"] == alvo][0]
+    assert r["arquivos"] == 0 and r["hashes_calculados"] == 3
+    assert sorted(r["iguais"]) == sorted(PACOTE)
+
+
+def test_arquivo_corrompido_sai_do_estado(tmp_path):
+    origem = str(tmp_path / "pkg")
+    _criar(origem, PACOTE)
+    alvo = str(tmp_path / "AC1")
+    manifesto = montar_manifesto_pacote(origem, listar_arquivos(origem))
+    instalar_em_alvos(origem, manifesto, [str(tmp_path / "AC"), alvo])
+
+    # Corrompe mantendo tamanho e mtime: só a verificação por hash percebe
+    caminho = os.path.join(alvo, "AC.exe")
+    st = os.stat(caminho)
+    with open(caminho, 'r+b') as f:
+        f.write(b"Q")
+    os.utime(caminho, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+    assert verificar_alvo(alvo, manifesto)["corrompidos"] == ["AC.exe"]
+    assert "AC.exe" not in instalacao.carregar_estado_alvo(alvo)
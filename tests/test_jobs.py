@@ -0,0 +1,39 @@
+import time
+
+from cigs_core import jobs
+from cigs_core.utils import log_debug
+from cigs_core.relatorio import analisar_relatorio_deploy
+
+
+def _aguardar(job_id, timeout=5):
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        job = jobs.obter_job(job_id)
+        if job["estado"] in jobs.ESTADOS_FINAIS:
+            return job
+        time.sleep(0.05)
+    raise AssertionError("job não terminou")
+
+
+def test_job_executa_e_reporta_progresso():
+    def missao(progresso):
+        progresso("DOWNLOAD", 50, "baixando")
+        return True, "Agendamento realizado com SUCESSO"
+
+    job = _aguardar(jobs.criar_job("MISSAO", "TSTA", missao))
+    assert job["estado"] == jobs.SUCESSO
+    assert job["etapa"] == "DOWNLOAD"
+    assert job["progresso"] == 100
+
+
+def test_falha_do_job_conta_uma_vez_no_relatorio():
+    def missao(progresso):
+        # A missão loga a própria falha com a TAG do sistema (como tasks.py)
+        log_debug("Falha no download: HTTP Download 403", "TSTB")
+        return False, "Falha no download: HTTP Download 403"
+
+    job = _aguardar(jobs.criar_job("MISSAO", "TSTB", missao))
+    assert job["estado"] == jobs.ERRO
+
+    rel = analisar_relatorio_deploy("TSTB")
+    assert rel["falhas"] == 1
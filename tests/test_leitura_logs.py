@@ -0,0 +1,112 @@
+import gzip
+import io
+import os
+
+import pytest
+
+from cigs_core import leitura_logs, api
+
+
+@pytest.fixture
+def logs(tmp_path, monkeypatch):
+    debug = tmp_path / "CIGS_debug.log"
+    execucao = tmp_path / "execucao.log"
+    monkeypatch.setitem(leitura_logs.ARQUIVOS_LOG, "debug", str(debug))
+    monkeypatch.setitem(leitura_logs.ARQUIVOS_LOG, "execucao", str(execucao))
+    return debug, execucao
+
+
+def _linha(data, sistema, msg):
+    return f"[{data} 10:00:00] [{sistema}] {msg}\n"
+
+
+def test_leitura_incremental_por_offset(logs):
+    debug, _ = logs
+    debug.write_text(_linha("2026-10-18", "AC", "um") + _linha("2026-10-18", "AG", "dois"), encoding="utf-8")
+
+    primeiro = leitura_logs.ler_trecho("debug", offset=0)
+    assert len(primeiro["linhas"]) == 2
+    assert not primeiro["mais"]
+
+    # Linha incompleta fica para a próxima leitura
+    with open(debug, "a", encoding="utf-8") as f:
+        f.write(_linha("2026-10-18", "AC", "tres") + "[2026-10-18 10:00:01] [AC] meia")
+    segundo = leitura_logs.ler_trecho("debug", offset=primeiro["offset"], assinatura=primeiro["assinatura"])
+    assert segundo["linhas"] == [_linha("2026-10-18", "AC", "tres").rstrip("\n")]
+    assert not segundo["reiniciado"]
+
+
+def test_max_bytes_e_filtro_de_sistema(logs):
+    debug, _ = logs
+    linhas = [_linha("2026-10-18", "AC" if i % 2 else "AG", f"msg {i:03d}") for i in range(100)]
+    debug.write_text("".join(linhas), encoding="utf-8")
+
+    trecho = leitura_logs.ler_trecho("debug", offset=0, max_bytes=len(linhas[0]) * 10 + 5)
+    assert len(trecho["linhas"]) == 10
+    assert trecho["mais"]
+
+    vistos = []
+    offset = 0
+    while True:
+        trecho = leitura_logs.ler_trecho("debug", offset=offset, max_bytes=1000, sistema="ac")
+        vistos += trecho["linhas"]
+        offset = trecho["offset"]
+        if not trecho["mais"]:
+            break
+    assert len(vistos) == 50
+    assert all("[AC]" in linha for linha in vistos)
+
+
+def test_cauda_e_rotacao(logs):
+    debug, _ = logs
+    debug.write_text("".join(_linha("2026-10-18", "AC", f"antigo {i:03d}") for i in range(50)), encoding="utf-8")
+    cauda = leitura_logs.ler_trecho("debug", max_bytes=200)
+    assert cauda["linhas"][-1].endswith("antigo 049")
+    assert cauda["linhas"][0].startswith("[2026-10-18")
+
+    # Arquivo recriado (rotação): offset antigo não vale mais
+    debug.write_text("".join(_linha("2026-10-19", "AC", f"novo {i:03d}") for i in range(3)), encoding="utf-8")
+    depois = leitura_logs.ler_trecho("debug", offset=cauda["offset"], assinatura=cauda["assinatura"])
+    assert depois["reiniciado"]
+    assert depois["linhas"][0].endswith("novo 000")
+
+
+def _baixar(cliente, query):
+    r = cliente.get(f"/cigs/logs/lote?{query}")
+    assert r.status_code == 200
+    assert r.mimetype == "application/gzip"
+    return gzip.GzipFile(fileobj=io.BytesIO(r.data)).read().decode("utf-8")
+
+
+def test_lote_gzip_por_periodo(logs):
+    debug, execucao = logs
+    debug.write_text(_linha("2026-10-16", "AC", "fora") + _linha("2026-10-17", "AC", "dentro") + "  continuação\n"
+                     + _linha("2026-10-17", "AG", "outro sistema") + _linha("2026-10-19", "AC", "depois"),
+                     encoding="utf-8")
+    rotacionado = debug.parent / "CIGS_debug.log.1"
+    rotacionado.write_text(_linha("2026-10-17", "AC", "rotacionado"), encoding="utf-8")
+    os.utime(rotacionado, (debug.stat().st_mtime - 60,) * 2)
+    execucao.write_text("[17/10/2026 10:00:00,00] Iniciando Script\nsaida do script\nSucesso\n"
+                        "[Sat 10/18/2026 03:00:00.00] Iniciando Script\n", encoding="utf-8")
+
+    cliente = api.app.test_client()
+    texto = _baixar(cliente, "de=2026-10-17&ate=2026-10-17&sistema=AC")
+    assert "dentro" in texto and "continuação" in texto and "rotacionado" in texto
+    assert "fora" not in texto and "depois" not in texto and "outro sistema" not in texto
+    assert "saida do script" in texto
+    assert "10/18/2026" not in texto
+    assert texto.index("rotacionado") < texto.index("dentro")
+
+    assert cliente.get("/cigs/logs/lote?de=2026-10-17&ate=2026-12-31").status_code == 400
+    assert cliente.get("/cigs/logs/lote?de=17/10/2026").status_code == 400
+
+
+def test_rota_logs(logs):
+    debug, _ = logs
+    cliente = api.app.test_client()
+    assert cliente.get("/cigs/logs?arquivo=debug").get_json()["existe"] is False
+    debug.write_text(_linha("2026-10-18", "AC", "oi"), encoding="utf-8")
+    dados = cliente.get("/cigs/logs?arquivo=debug&offset=0").get_json()
+    assert dados["linhas"] == [_linha("2026-10-18", "AC", "oi").rstrip("\n")]
+    assert cliente.get("/cigs/logs?arquivo=outro").status_code == 400
+    assert cliente.get("/cigs/logs?offset=abc").status_code == 400
@@ -0,0 +1,53 @@
+import os
+from datetime import date
+
+from cigs_core import logger
+
+
+def _escritor(tmp_path, monkeypatch, **config):
+    for nome, valor in config.items():
+        monkeypatch.setattr(logger, nome, valor)
+    return logger.EscritorLog(caminho=str(tmp_path / "CIGS_debug.log"))
+
+
+def test_rotacao_por_tamanho_mantem_so_a_retencao(tmp_path, monkeypatch):
+    escritor = _escritor(tmp_path, monkeypatch, LOG_ROTACAO="TAMANHO", LOG_MAX_BYTES=100, LOG_RETENCAO=2)
+    for i in range(5):
+        escritor._gravar([f"linha {i:02d} " + "x" * 100])
+
+    caminho = escritor.caminho
+    assert escritor.rotacoes == 4
+    assert open(caminho, encoding="utf-8").read().startswith("linha 04")
+    assert open(caminho + ".1", encoding="utf-8").read().startswith("linha 03")
+    assert open(caminho + ".2", encoding="utf-8").read().startswith("linha 02")
+    assert not os.path.exists(caminho + ".3")
+
+
+def test_rotacao_diaria_e_poda_dos_antigos(tmp_path, monkeypatch):
+    escritor = _escritor(tmp_path, monkeypatch, LOG_ROTACAO="DIARIA", LOG_RETENCAO=2)
+    caminho = escritor.caminho
+    for dia in ("2026-10-01", "2026-10-02", "2026-10-03"):
+        open(f"{caminho}.{dia}", "w").close()
+
+    escritor._gravar(["de ontem"])
+    escritor._data_abertura = date(2026, 10, 17)
+    escritor._gravar(["de hoje"])
+
+    assert escritor.rotacoes == 1
+    assert open(f"{caminho}.2026-10-17", encoding="utf-8").read() == "de ontem\n"
+    assert open(caminho, encoding="utf-8").read() == "de hoje\n"
+    restantes = sorted(p.name for p in tmp_path.iterdir() if p.name != "CIGS_debug.log")
+    assert restantes == ["CIGS_debug.log.2026-10-03", "CIGS_debug.log.2026-10-17"]
+
+
+def test_fila_cheia_descarta_sem_bloquear(tmp_path, monkeypatch):
+    escritor = _escritor(tmp_path, monkeypatch, LOG_FILA_MAX=3)
+    for i in range(5):
+        escritor.enfileirar(f"linha {i}")
+    assert escritor.descartadas == 2
+    assert escritor.fila.qsize() == 3
+
+    # Com a thread rodando, as linhas aceitas chegam ao disco
+    escritor.start()
+    assert escritor.flush()
+    assert open(escritor.caminho, encoding="utf-8").read().splitlines() == ["linha 0", "linha 1", "linha 2"]
@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+from cigs_core import manifest
+from core.network_ops import CIGSCore
+
+
+@pytest.fixture
+def build(tmp_path, monkeypatch):
+    base = tmp_path / "CIGS_Agent.dist"
+    base.mkdir()
+    for nome, conteudo in (("CIGS_Agent.exe", b"exe v1"), ("python311.dll", b"dll")):
+        (base / nome).write_bytes(conteudo)
+    monkeypatch.setattr(manifest, "_listar_arquivos_build",
+                        lambda: (str(base), [str(p) for p in base.iterdir()]))
+    monkeypatch.setattr(manifest, "ARQUIVO_MANIFESTO", str(tmp_path / "manifesto.json"))
+    monkeypatch.setattr(manifest, "_manifesto", None)
+
+    hasheados = []
+    original = manifest._sha256_arquivo
+
+    def contar(caminho):
+        hasheados.append(caminho)
+        return original(caminho)
+
+    monkeypatch.setattr(manifest, "_sha256_arquivo", contar)
+    return base, hasheados
+
+
+def test_cache_em_disco_reaproveitado_no_reinicio(build):
+    base, hasheados = build
+    primeiro = manifest.carregar_manifesto()
+    assert len(hasheados) == 2
+    with open(manifest.ARQUIVO_MANIFESTO, encoding="utf-8") as f:
+        assert json.load(f)["fingerprint"] == primeiro["fingerprint"]
+
+    # Sem revalidar, a memória responde sem tocar os arquivos
+    assert manifest.carregar_manifesto() is primeiro
+
+    # Reinício do agente: memória vazia, hashes vêm do disco
+    manifest._manifesto = None
+    segundo = manifest.carregar_manifesto()
+    assert len(hasheados) == 2
+    assert segundo["fingerprint"] == primeiro["fingerprint"]
+
+
+def test_revalidar_rehasheia_so_o_que_mudou(build):
+    base, hasheados = build
+    antes = manifest.carregar_manifesto()
+    hasheados.clear()
+
+    (base / "CIGS_Agent.exe").write_bytes(b"exe v2 maior")
+    depois = manifest.carregar_manifesto(revalidar=True)
+    assert [p.replace("\\", "/").rsplit("/", 1)[-1] for p in hasheados] == ["CIGS_Agent.exe"]
+    assert depois["fingerprint"] != antes["fingerprint"]
+    with open(manifest.ARQUIVO_MANIFESTO, encoding="utf-8") as f:
+        assert json.load(f)["fingerprint"] == depois["fingerprint"]
+
+    # Nada mudou desde a última revalidação: nenhum hash novo
+    hasheados.clear()
+    assert manifest.carregar_manifesto(revalidar=True)["fingerprint"] == depois["fingerprint"]
+    assert hasheados == []
+
+
+def test_comparar_manifestos(build):
+    ref = manifest.carregar_manifesto()
+    outro = json.loads(json.dumps(ref))
+    outro["arquivos"][0]["sha256"] = "0" * 64
+    outro["arquivos"].append({"arquivo": "extra.pyd", "sha256": "1" * 64})
+    del outro["arquivos"][1]
+
+    dif = CIGSCore().comparar_manifestos(ref, outro)
+    assert dif == {"diferentes": [ref["arquivos"][0]["arquivo"]], "faltando": [ref["arquivos"][1]["arquivo"]],
+                   "extras": ["extra.pyd"]}
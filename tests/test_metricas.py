@@ -0,0 +1,73 @@
+import os
+import re
+
+import pytest
+
+from cigs_core import metricas, api, extracao
+from cigs_core.download import baixar_arquivo
+from cigs_core.instalacao import listar_arquivos, montar_manifesto_pacote, instalar_em_alvos
+
+
+@pytest.fixture(autouse=True)
+def metricas_zeradas():
+    metricas.limpar()
+
+
+def _valor(texto, serie):
+    achado = re.search(r"^" + re.escape(serie) + r" (\S+)$", texto, re.M)
+    assert achado, f"série ausente: {serie}"
+    return float(achado.group(1))
+
+
+def test_histograma_acumulado_e_escape():
+    for valor in (0.004, 0.3, 20):
+        metricas.observar("cigs_http_duracao_segundos", valor, rota='/a"b')
+    texto = metricas.texto_prometheus()
+    assert _valor(texto, 'cigs_http_duracao_segundos_bucket{rota="/a\\"b",le="0.005"}') == 1
+    assert _valor(texto, 'cigs_http_duracao_segundos_bucket{rota="/a\\"b",le="0.5"}') == 2
+    assert _valor(texto, 'cigs_http_duracao_segundos_bucket{rota="/a\\"b",le="10"}') == 2
+    assert _valor(texto, 'cigs_http_duracao_segundos_bucket{rota="/a\\"b",le="+Inf"}') == 3
+    assert _valor(texto, 'cigs_http_duracao_segundos_count{rota="/a\\"b"}') == 3
+    assert _valor(texto, 'cigs_http_duracao_segundos_sum{rota="/a\\"b"}') == pytest.approx(20.304)
+
+
+def test_rotas_instrumentadas_pelo_padrao():
+    cliente = api.app.test_client()
+    cliente.get('/cigs/jobs/abc')
+    cliente.get('/cigs/jobs/def')
+    cliente.get('/nao/existe')
+    r = cliente.get('/cigs/metrics')
+    assert r.status_code == 200
+    assert r.content_type.startswith("text/plain; version=0.0.4")
+    texto = r.get_data(as_text=True)
+    assert _valor(texto, 'cigs_http_requisicoes_total{codigo="404",metodo="GET",rota="/cigs/jobs/<job_id>"}') == 2
+    assert _valor(texto, 'cigs_http_requisicoes_total{codigo="404",metodo="GET",rota="desconhecida"}') == 1
+    assert _valor(texto, 'cigs_jobs_fila{fila="MISSOES"}') >= 0
+    assert "cigs_log_fila " in texto
+    assert "cigs_log_descartadas_total " in texto
+
+
+def test_download_conta_bytes_e_vazao(servidor, tmp_path):
+    ok, _, estat = baixar_arquivo(servidor.url, str(tmp_path / "p.rar"), segmentos=1)
+    assert ok
+    texto = metricas.texto_prometheus()
+    assert _valor(texto, 'cigs_download_bytes_total{modo="arquivo"}') == len(servidor.dados)
+    assert _valor(texto, 'cigs_download_total{modo="arquivo",resultado="ok"}') == 1
+    assert _valor(texto, 'cigs_download_vazao_mb_s_count{modo="arquivo"}') == 1
+
+
+def test_extracao_e_copia_medidas(tmp_path):
+    import zipfile
+    pacote = tmp_path / "p.zip"
+    with zipfile.ZipFile(pacote, "w") as z:
+        z.writestr("a.txt", "conteudo")
+    origem = tmp_path / "extraido"
+    assert extracao.extrair_pacote(str(pacote), str(origem))[0]
+    manifesto = montar_manifesto_pacote(str(origem), listar_arquivos(str(origem)))
+    instalar_em_alvos(str(origem), manifesto, [str(tmp_path / "alvo1"), str(tmp_path / "alvo2")])
+
+    texto = metricas.texto_prometheus()
+    assert _valor(texto, 'cigs_extracao_duracao_segundos_count{formato="ZIP",resultado="ok"}') == 1
+    assert _valor(texto, 'cigs_copia_duracao_segundos_count{modo="COPIA"}') == 1
+    assert _valor(texto, 'cigs_copia_duracao_segundos_count{modo="MOVER"}') == 1
+    assert _valor(texto, 'cigs_copia_bytes_total{modo="COPIA"}') == len("conteudo")
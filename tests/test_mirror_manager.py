@@ -0,0 +1,77 @@
+import os
+import hashlib
+import threading
+
+import pytest
+import requests
+
+from core.mirror_manager import CIGSMirror
+from cigs_core.download import baixar_arquivo
+
+
+@pytest.fixture
+def espelho(tmp_path):
+    esp = CIGSMirror(pasta=str(tmp_path / "espelho"), porta=0)
+    yield esp
+    esp.parar()
+
+
+def _url(espelho, nome):
+    return espelho.url_para("127.0.0.1", nome)
+
+
+def test_baixa_uma_vez_e_serve_com_range(servidor, espelho):
+    ok, msg, pacote = espelho.preparar_pacote(servidor.url, "pacote.rar")
+    assert ok, msg
+    assert pacote["sha256"] == hashlib.sha256(servidor.dados).hexdigest()
+    assert espelho.iniciar()[0]
+
+    # Segunda preparação do mesmo objeto (outro link assinado) não baixa de novo
+    antes = len(servidor.requisicoes)
+    ok, msg, _ = espelho.preparar_pacote(servidor.url.replace("abc", "def"), "pacote.rar")
+    assert ok and "já está" in msg
+    assert servidor.requisicoes[antes:] == ["bytes=0-0"]
+
+    url = _url(espelho, "pacote.rar")
+    r = requests.get(url, headers={"Range": "bytes=100-199"})
+    assert r.status_code == 206
+    assert r.content == servidor.dados[100:200]
+    assert r.headers["Content-Range"] == f"bytes 100-199/{len(servidor.dados)}"
+
+    r = requests.get(url, headers={"Range": f"bytes={len(servidor.dados)}-"})
+    assert r.status_code == 416
+
+    assert requests.get(_url(espelho, "outro.rar")).status_code == 404
+
+
+def test_clientes_simultaneos(servidor, espelho):
+    espelho.preparar_pacote(servidor.url, "pacote.rar")
+    espelho.iniciar()
+    url = _url(espelho, "pacote.rar")
+
+    resultados = []
+
+    def cliente():
+        resultados.append(requests.get(url).content == servidor.dados)
+
+    threads = [threading.Thread(target=cliente) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(10)
+    assert resultados == [True] * 8
+
+
+def test_agente_baixa_do_espelho_segmentado(servidor, espelho, tmp_path, monkeypatch):
+    from cigs_core import download
+    monkeypatch.setattr(download, "DOWNLOAD_SEGMENTAR_MIN", 1)
+    _, _, pacote = espelho.preparar_pacote(servidor.url, "pacote.rar")
+    espelho.iniciar()
+
+    destino = str(tmp_path / "agente.rar")
+    ok, msg, estat = baixar_arquivo(_url(espelho, "pacote.rar"), destino,
+                                    sha256=pacote["sha256"], tamanho=pacote["tamanho"], segmentos=4)
+    assert ok, msg
+    assert estat["segmentos"] == 4
+    with open(destino, 'rb') as f:
+        assert f.read() == servidor.dados
@@ -0,0 +1,52 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from cigs_core import permissoes
+from cigs_core.utils import ajustar_permissoes
+
+
+@pytest.fixture
+def base(tmp_path, monkeypatch):
+    pasta = tmp_path / "CIGS"
+    pasta.mkdir()
+    (pasta / "Downloads").mkdir()
+    monkeypatch.setattr(permissoes, "PASTA_BASE", str(pasta))
+    monkeypatch.setattr(permissoes, "ARQUIVO_ESTADO_PERMISSOES", str(tmp_path / "permissoes.json"))
+    chamadas = []
+    monkeypatch.setattr(permissoes, "_icacls", lambda alvo, recursivo: chamadas.append((alvo, recursivo)))
+    acl = {"saida": f"{pasta} Todos:(OI)(CI)(F)\n         BUILTIN\\Administradores:(I)(F)\n"}
+    monkeypatch.setattr(permissoes, "_consultar_acl", lambda alvo: acl["saida"])
+    return SimpleNamespace(pasta=pasta, chamadas=chamadas, acl=acl)
+
+
+def test_recursivo_so_na_primeira_vez(base):
+    assert ajustar_permissoes() == permissoes.COMPLETO
+    assert base.chamadas == [(str(base.pasta), True)]
+
+    base.chamadas.clear()
+    assert ajustar_permissoes() == permissoes.OK
+    assert base.chamadas == []
+
+
+def test_pasta_nova_recebe_permissao_sozinha(base):
+    ajustar_permissoes()
+    base.chamadas.clear()
+    (base.pasta / "Cache").mkdir()
+    assert ajustar_permissoes() == permissoes.NOVAS
+    assert base.chamadas == [(os.path.join(str(base.pasta), "Cache"), True)]
+
+
+def test_divergencia_na_raiz_reaplica_tudo(base):
+    ajustar_permissoes()
+    base.chamadas.clear()
+    base.acl["saida"] = f"{base.pasta} BUILTIN\\Administradores:(OI)(CI)(F)\n"
+    assert ajustar_permissoes() == permissoes.COMPLETO
+    assert base.chamadas == [(str(base.pasta), True)]
+
+
+def test_forcar(base):
+    ajustar_permissoes()
+    base.chamadas.clear()
+    assert ajustar_permissoes(forcar=True) == permissoes.COMPLETO
@@ -0,0 +1,82 @@
+import os
+import time
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from flask import Flask, jsonify
+
+from cigs_core import politica
+from cigs_core.download import baixar_arquivo
+from cigs_core.servidor import rota_pesada
+from cigs_core.utils import prioridade_baixa, em_prioridade_baixa, inicializador_pool
+
+
+def test_limite_por_faixa_de_horario(monkeypatch):
+    monkeypatch.setattr(politica, "POLITICA_DOWNLOAD_HORARIOS", [("07:00-19:00", 2048), ("22:00-02:00", 512)])
+    monkeypatch.setattr(politica, "POLITICA_DOWNLOAD_PADRAO_KBS", 0)
+    assert politica.limite_download_kbs(datetime(2026, 1, 5, 10, 30)) == 2048
+    assert politica.limite_download_kbs(datetime(2026, 1, 5, 19, 0)) == 0
+    assert politica.limite_download_kbs(datetime(2026, 1, 5, 23, 15)) == 512
+    assert politica.limite_download_kbs(datetime(2026, 1, 6, 1, 59)) == 512
+
+
+def test_override_da_ordem(monkeypatch):
+    monkeypatch.setattr(politica, "POLITICA_INSTALACAO_BAIXA_PRIORIDADE", True)
+    assert politica.limitador_download({"download_kbs": 100}).taxa() == 100 * 1024
+    assert politica.limitador_download({"download_kbs": 0}).taxa() == 0
+    assert politica.limitador_download(None) is politica.limitador_download({})
+    assert politica.instalar_com_baixa_prioridade(None)
+    assert not politica.instalar_com_baixa_prioridade({"baixa_prioridade": False})
+
+
+def test_download_respeita_o_limite_da_ordem(tmp_path, servidor):
+    inicio = time.monotonic()
+    ok, msg, _ = baixar_arquivo(servidor.url, str(tmp_path / "p.rar"), politica={"download_kbs": 1024})
+    assert ok, msg
+    # 512 KB a 1 MB/s
+    assert time.monotonic() - inicio >= 0.4
+
+
+def test_limite_global_de_operacoes_pesadas(monkeypatch):
+    monkeypatch.setattr(politica, "_pesadas", threading.BoundedSemaphore(1))
+    app = Flask(__name__)
+
+    @app.route('/pesada')
+    @rota_pesada
+    def pesada():
+        return jsonify({"resultado": "OK"})
+
+    esperou = threading.Event()
+    executou = threading.Event()
+
+    def outro_job():
+        with politica.operacao_pesada("Pré-preparo", aguardando=esperou.set):
+            executou.set()
+
+    with politica.operacao_pesada("Instalação"):
+        # Instalação em curso: rota pesada recusa na hora e outro job espera a vaga
+        assert app.test_client().get('/pesada').status_code == 503
+        t = threading.Thread(target=outro_job)
+        t.start()
+        assert esperou.wait(5)
+        assert not executou.is_set()
+    t.join(5)
+    assert executou.is_set()
+    assert app.test_client().get('/pesada').status_code == 200
+
+
+@pytest.mark.skipif(os.name == 'nt' or os.geteuid() != 0, reason="nice por thread do Linux (root para restaurar)")
+def test_prioridade_baixa_vale_para_as_threads_do_pool():
+    def nice_atual():
+        return os.getpriority(os.PRIO_PROCESS, threading.get_native_id())
+
+    antes = nice_atual()
+    with prioridade_baixa():
+        assert em_prioridade_baixa() and nice_atual() == 19
+        with ThreadPoolExecutor(max_workers=1, initializer=inicializador_pool()) as executor:
+            assert executor.submit(nice_atual).result() == 19
+    assert not em_prioridade_baixa() and nice_atual() == antes
+    with ThreadPoolExecutor(max_workers=1, initializer=inicializador_pool()) as executor:
+        assert executor.submit(nice_atual).result() == antes
@@ -0,0 +1,122 @@
+import os
+import time
+import hashlib
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from cigs_core import cache_pacotes, preparo, jobs
+from cigs_core.cache_pacotes import guardar_pacote
+
+
+@pytest.fixture(autouse=True)
+def preparo_isolado(tmp_path, monkeypatch):
+    pasta = str(tmp_path / "Cache")
+    monkeypatch.setattr(cache_pacotes, "PASTA_CACHE", pasta)
+    monkeypatch.setattr(cache_pacotes, "ARQUIVO_INDICE_CACHE", os.path.join(pasta, "indice.json"))
+    monkeypatch.setattr(cache_pacotes, "_indice", None)
+    monkeypatch.setattr(preparo, "PASTA_PREPARO", str(tmp_path / "Preparo"))
+    monkeypatch.setattr(preparo, "ARQUIVO_PREPARO", str(tmp_path / "preparo.json"))
+    monkeypatch.setattr(preparo, "_estado", None)
+
+
+def _aguardar(job_id, timeout=10):
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        job = jobs.obter_job(job_id)
+        if job["estado"] in jobs.ESTADOS_FINAIS:
+            return job
+        time.sleep(0.05)
+    raise AssertionError("job não terminou")
+
+
+def test_pacote_preparado_fica_pronto_para_a_missao(servidor):
+    sha = hashlib.sha256(servidor.dados).hexdigest()
+    prazo = (datetime.now() + timedelta(hours=2)).strftime("%d/%m/%Y %H:%M")
+
+    job = _aguardar(preparo.enfileirar_preparo(servidor.url, "pacote.rar", "AC", prazo, sha256=sha))
+    assert job["estado"] == jobs.SUCESSO and job["fila"] == jobs.FILA_PREPARO
+
+    status = preparo.estado_preparo("AC")
+    assert status["estado"] == preparo.PRONTO and not status["atrasado"]
+    assert "url" not in status
+
+    # O disparo chega com outro link assinado do mesmo objeto
+    caminho, no_cache = preparo.pacote_preparado("AC", servidor.url.replace("abc", "xyz"))
+    assert no_cache
+    with open(caminho, 'rb') as f:
+        assert f.read() == servidor.dados
+
+    preparo.marcar_instalado("AC", servidor.url)
+    assert preparo.estado_preparo("AC")["estado"] == preparo.INSTALADO
+    assert preparo.pacote_preparado("AC", servidor.url) == (None, False)
+
+
+def test_preparado_sem_hash_confere_hash_e_etag_da_missao(servidor):
+    sha = hashlib.sha256(servidor.dados).hexdigest()
+    # Ordem de preparo sem hash: o agente calcula e registra o do conteúdo baixado
+    assert _aguardar(preparo.enfileirar_preparo(servidor.url, "pacote.rar", "AC"))["estado"] == jobs.SUCESSO
+
+    # Missão com o hash do conteúdo (espelho) reconhece o pacote mesmo por outro link
+    caminho, _ = preparo.pacote_preparado("AC", "http://10.0.0.1:5581/pacotes/pacote.rar", sha256=sha.upper())
+    assert caminho
+
+    # Mesmo link com outro hash: pacote republicado, o preparado não serve
+    assert preparo.pacote_preparado("AC", servidor.url, sha256="0" * 64) == (None, False)
+
+    # Só pelo link: o ETag do servidor decide
+    assert preparo.pacote_preparado("AC", servidor.url)[0] == caminho
+    servidor.etag = '"pacote-v2"'
+    assert preparo.pacote_preparado("AC", servidor.url) == (None, False)
+
+    preparo.marcar_instalado("AC", "http://10.0.0.1:5581/pacotes/pacote.rar", sha)
+    assert preparo.estado_preparo("AC")["estado"] == preparo.INSTALADO
+
+
+def test_prazo_invalido_e_recusado():
+    with pytest.raises(ValueError):
+        preparo.enfileirar_preparo("http://127.0.0.1:1/p.rar", "p.rar", "AC", "2026-01-01 10:00")
+
+
+def test_prazo_vencido_sem_pacote_aparece_atrasado():
+    preparo._atualizar("AG", estado=preparo.BAIXANDO, arquivo="p.rar",
+                       prazo_ts=time.time() - 60, preparar_ate="01/01/2026 10:00")
+    assert preparo.estado_preparo("AG")["atrasado"]
+
+
+def test_pacote_fixado_nao_sai_na_limpeza_do_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_pacotes, "CACHE_LIMITE_BYTES", 1500)
+    caminhos = []
+    for i, fixar in enumerate((time.time() + 3600, None, None)):
+        origem = str(tmp_path / f"p{i}.rar")
+        with open(origem, 'wb') as f:
+            f.write(os.urandom(1000))
+        caminho, _, _ = guardar_pacote(f"http://h/p{i}.rar", origem, f"p{i}.rar", fixar_ate=fixar)
+        caminhos.append(caminho)
+        time.sleep(0.01)
+    # O mais antigo estava fixado: quem saiu foi o seguinte
+    assert os.path.exists(caminhos[0]) and not os.path.exists(caminhos[1]) and os.path.exists(caminhos[2])
+
+
+def test_fila_de_preparo_respeita_o_prazo():
+    liberar = threading.Event()
+    ordem = []
+
+    def bloqueio(progresso):
+        liberar.wait(5)
+        return True, "ok"
+
+    def registrar(nome):
+        def tarefa(progresso):
+            ordem.append(nome)
+            return True, "ok"
+        return tarefa
+
+    jobs.criar_job("PREPARO", "TSTP", bloqueio, fila=jobs.FILA_PREPARO, ordem=0)
+    tarde = jobs.criar_job("PREPARO", "TSTP", registrar("tarde"), fila=jobs.FILA_PREPARO, ordem=200)
+    cedo = jobs.criar_job("PREPARO", "TSTP", registrar("cedo"), fila=jobs.FILA_PREPARO, ordem=100)
+    liberar.set()
+    _aguardar(tarde)
+    _aguardar(cedo)
+    assert ordem == ["cedo", "tarde"]
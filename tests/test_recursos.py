@@ -0,0 +1,92 @@
+import time
+from types import SimpleNamespace
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from cigs_core import recursos, api
+from core import network_ops
+
+
+@pytest.fixture(autouse=True)
+def buffer_isolado(monkeypatch):
+    monkeypatch.setattr(recursos, "_amostras", deque(maxlen=4))
+    monkeypatch.setattr(recursos, "_io_anterior", None)
+
+
+def _amostra(ts, cpu, ram=50.0, livre=100.0):
+    return {"ts": ts, "cpu": cpu, "ram": ram, "volumes": {recursos.VOLUME_SISTEMA: livre},
+            "disco_leitura_mb_s": 1.0, "disco_escrita_mb_s": 2.0}
+
+
+def test_coleta_real_do_sistema():
+    amostra = recursos.coletar_amostra()
+    assert 0 <= amostra["ram"] <= 100
+    assert recursos.VOLUME_SISTEMA in amostra["volumes"]
+    # Primeira leitura de I/O não tem referência: taxa zero
+    assert amostra["disco_leitura_mb_s"] in (0.0, None)
+
+
+def test_buffer_circular_e_historico_incremental():
+    for ts in range(1, 7):
+        recursos.registrar_amostra(_amostra(float(ts), cpu=ts * 10))
+    serie = recursos.historico()
+    assert [a["ts"] for a in serie] == [3.0, 4.0, 5.0, 6.0]
+    assert [a["ts"] for a in recursos.historico(desde=4.0)] == [5.0, 6.0]
+    assert recursos.ultima_amostra()["cpu"] == 60
+
+
+def test_medias_por_janela():
+    for ts, cpu in ((100.0, 10), (150.0, 20), (190.0, 30), (200.0, 40)):
+        recursos.registrar_amostra(_amostra(ts, cpu))
+    assert recursos.medias(60)["cpu"] == 30.0
+    assert recursos.medias(60)["amostras"] == 3
+    assert recursos.medias(300)["cpu"] == 25.0
+
+
+def test_status_full_nao_le_o_sistema(monkeypatch):
+    def proibido(*a, **k):
+        raise AssertionError("leitura do SO na requisição")
+
+    monkeypatch.setattr(recursos.psutil, "disk_usage", proibido)
+    monkeypatch.setattr(recursos.psutil, "virtual_memory", proibido)
+    recursos.registrar_amostra(_amostra(1000.0, cpu=12.5, ram=61.0, livre=42.5))
+
+    assert api.ler_recursos() == (42.5, 61.0)
+    dados = api.app.test_client().get('/cigs/status?sistema=AC&full=1').get_json()
+    assert (dados["disk"], dados["ram"]) == (42.5, 61.0)
+    assert dados["recursos"]["amostra"]["cpu"] == 12.5
+    assert dados["recursos"]["medias"]["60s"]["cpu"] == 12.5
+
+
+def test_rota_historico():
+    recursos.registrar_amostra(_amostra(1.0, cpu=5))
+    recursos.registrar_amostra(_amostra(2.0, cpu=6))
+    cliente = api.app.test_client()
+    assert len(cliente.get('/cigs/metrics/history').get_json()["amostras"]) == 2
+    assert [a["cpu"] for a in cliente.get('/cigs/metrics/history?desde=1.0').get_json()["amostras"]] == [6]
+    assert cliente.get('/cigs/metrics/history?desde=x').status_code == 400
+
+
+def test_sem_amostra_responde_zero():
+    assert api.ler_recursos() == (0, 0)
+
+
+def test_central_consulta_historico_em_paralelo(monkeypatch):
+    # Mesmo IP duas vezes: consultas simultâneas não duplicam amostras na série
+    def get(url, params=None, timeout=None):
+        time.sleep(0.3)
+        desde = (params or {}).get('desde', 0)
+        amostras = [_amostra(float(ts), cpu=ts) for ts in (1, 2, 3) if ts > desde]
+        return SimpleNamespace(status_code=200, json=lambda: {"amostras": amostras})
+
+    monkeypatch.setattr(network_ops.requests, "get", get)
+    core = network_ops.CIGSCore()
+    ips = [f"10.0.0.{i}" for i in range(6)] + ["10.0.0.0"] * 2
+
+    inicio = time.monotonic()
+    with ThreadPoolExecutor(8) as pool:
+        series = list(pool.map(core.historico_recursos, ips))
+    assert time.monotonic() - inicio < 1.0
+    assert all([a["ts"] for a in s] == [1.0, 2.0, 3.0] for s in series)
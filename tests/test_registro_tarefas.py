@@ -0,0 +1,93 @@
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from cigs_core import agendador, registro_tarefas, tasks, jobs
+
+
+@pytest.fixture(autouse=True)
+def registro_isolado(tmp_path, monkeypatch):
+    monkeypatch.setattr(registro_tarefas, "ARQUIVO_REGISTRO_TAREFAS", str(tmp_path / "tarefas.json"))
+    monkeypatch.setattr(registro_tarefas, "_registro", None)
+    monkeypatch.setattr(agendador, "ARQUIVO_AGENDA", str(tmp_path / "agenda.json"))
+    monkeypatch.setattr(agendador, "_agenda", None)
+    monkeypatch.setattr(agendador, "_executar_launcher", lambda bat: 0)
+    monkeypatch.setattr(tasks, "PASTA_BASE", str(tmp_path))
+    monkeypatch.setattr(tasks, "ajustar_permissoes", lambda: None)
+
+
+@pytest.fixture
+def schtasks(monkeypatch):
+    """Substitui o schtasks: registra os comandos e simula sucesso."""
+    comandos = []
+
+    def executar(cmd, **kwargs):
+        comandos.append(cmd)
+        return SimpleNamespace(returncode=0, stdout="", stderr="")
+
+    monkeypatch.setattr(tasks.subprocess, "run", executar)
+    return comandos
+
+
+def _agendar(sistema, tmp_path):
+    return tasks.agendar_tarefa_universal(None, None, "25/12/2030 22:15", None, None, str(tmp_path / sistema),
+                                          sistema, "SO_AGENDAR")
+
+
+def test_agendamento_registra_tarefa_e_launcher(tmp_path, schtasks):
+    assert _agendar("AC", tmp_path) == (True, "Agendado")
+    [tarefa] = registro_tarefas.listar_tarefas()
+    assert tarefa["nome"] == "CIGS_Update_AC"
+    assert tarefa["sistema"] == "AC"
+    assert tarefa["data_hora"] == "25/12/2030 22:15"
+    assert tarefa["agendador"] == "SCHTASKS"
+    assert os.path.exists(tarefa["bat"])
+
+
+def test_registro_guarda_o_job(tmp_path, schtasks):
+    job_id = jobs.criar_job("MISSAO", "AG", lambda progresso: _agendar("AG", tmp_path))
+    limite = time.monotonic() + 5
+    while (jobs.obter_job(job_id) or {}).get("estado") not in jobs.ESTADOS_FINAIS and time.monotonic() < limite:
+        time.sleep(0.02)
+    assert registro_tarefas.listar_tarefas(job_id=job_id)[0]["sistema"] == "AG"
+
+
+def test_abortar_filtra_por_sistema_sem_varrer_o_agendador(tmp_path, schtasks):
+    _agendar("AC", tmp_path)
+    _agendar("AG", tmp_path)
+    bat_ag = registro_tarefas.listar_tarefas("AG")[0]["bat"]
+    schtasks.clear()
+
+    assert tasks.cancelar_missao(sistema="ag") == "Abatidas 1 tarefas CIGS."
+    assert schtasks == ['schtasks /delete /tn "CIGS_Update_AG" /f']
+    assert not os.path.exists(bat_ag)
+    assert [t["sistema"] for t in registro_tarefas.listar_tarefas()] == ["AC"]
+    assert tasks.cancelar_missao(job_id="outro") == "Nenhuma tarefa encontrada."
+
+
+def test_falha_no_delete_mantem_registro(tmp_path, schtasks, monkeypatch):
+    _agendar("AC", tmp_path)
+    monkeypatch.setattr(tasks.subprocess, "run",
+                        lambda cmd, **k: SimpleNamespace(returncode=1, stdout="", stderr="ERRO: Acesso negado."))
+    assert "Falharam: CIGS_Update_AC" in tasks.cancelar_missao()
+    assert len(registro_tarefas.listar_tarefas()) == 1
+
+    # Tarefa já removida por fora do agente: sai do registro
+    monkeypatch.setattr(tasks.subprocess, "run",
+                        lambda cmd, **k: SimpleNamespace(returncode=1, stdout="", stderr="ERROR: The system cannot find the file specified."))
+    assert tasks.cancelar_missao() == "Abatidas 1 tarefas CIGS."
+    assert registro_tarefas.listar_tarefas() == []
+
+
+def test_modo_interno_lista_estado_da_agenda(tmp_path, monkeypatch):
+    monkeypatch.setattr(tasks, "AGENDADOR_MODO", "INTERNO")
+    monkeypatch.setattr(tasks.subprocess, "run", lambda *a, **k: pytest.fail("schtasks chamado"))
+    assert _agendar("PONTO", tmp_path) == (True, "Agendado")
+    [tarefa] = registro_tarefas.listar_tarefas()
+    assert tarefa["agendador"] == "INTERNO"
+    assert tarefa["estado"] == agendador.AGENDADA
+
+    assert tasks.cancelar_missao(sistema="PONTO") == "Abatidas 1 tarefas CIGS."
+    assert agendador.listar_agenda()[0]["estado"] == agendador.CANCELADA
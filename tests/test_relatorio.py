@@ -0,0 +1,91 @@
+import os
+
+import pytest
+
+from cigs_core import relatorio
+
+
+@pytest.fixture
+def log(tmp_path, monkeypatch):
+    caminho = tmp_path / "CIGS_debug.log"
+    monkeypatch.setattr(relatorio, "ARQUIVO_LOG_DEBUG", str(caminho))
+    monkeypatch.setattr(relatorio, "ARQUIVO_INDICE_RELATORIO", str(tmp_path / "indice.json"))
+    monkeypatch.setattr(relatorio, "flush_log", lambda: True)
+    monkeypatch.setattr(relatorio, "_indice", None)
+    return caminho
+
+
+# Cada linha com o próprio horário: a assinatura (64 bytes iniciais) distingue os arquivos como no log real
+_segundos = iter(range(36000, 86400))
+
+
+def _hora():
+    s = next(_segundos)
+    return f"2026-10-18 {s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}"
+
+
+def _sucesso(marca, sistema="AC"):
+    return f"[{_hora()}] [{sistema}] Agendamento realizado com SUCESSO - pacote {marca}.zip\n"
+
+
+def _falha(marca, sistema="AC"):
+    return f"[{_hora()}] [{sistema}] Falha no download do pacote {marca}.zip: HTTP 403\n"
+
+
+def _anexar(caminho, *linhas):
+    with open(caminho, "a", encoding="utf-8") as f:
+        f.write("".join(linhas))
+
+
+def _contagem(sistema="AC"):
+    rel = relatorio.analisar_relatorio_deploy(sistema, "20261018")
+    return rel["sucessos"], rel["falhas"]
+
+
+def test_acrescimos_contados_uma_vez(log):
+    _anexar(log, _sucesso("a"), _sucesso("b"), "[2026-10-18 10:00:00] [AC] Agendamento realizado com SUC")
+    assert _contagem() == (2, 0)
+
+    # A linha incompleta só conta quando termina
+    _anexar(log, "ESSO - pacote c.zip\n", _falha("d"), _sucesso("e", "AG"))
+    assert _contagem() == (3, 1)
+    assert _contagem() == (3, 1)
+    assert _contagem("AG") == (1, 0)
+
+    # Reinício do agente: o índice vem do disco e continua do offset gravado
+    relatorio._indice = None
+    assert _contagem() == (3, 1)
+    _anexar(log, _sucesso("f"))
+    assert _contagem() == (4, 1)
+
+
+def test_rotacao_termina_o_arquivo_antigo(log):
+    _anexar(log, _sucesso("antigo"))
+    assert _contagem() == (1, 0)
+
+    # Linhas gravadas depois da última leitura, e duas rotações antes da próxima
+    _anexar(log, _falha("nao lida"))
+    os.replace(log, f"{log}.2")
+    _anexar(log, _sucesso("intermediario"), _sucesso("intermediario 2"))
+    os.replace(log, f"{log}.1")
+    _anexar(log, _sucesso("novo"))
+    agora = os.path.getmtime(f"{log}.1")
+    os.utime(f"{log}.2", (agora - 60, agora - 60))
+
+    assert _contagem() == (4, 1)
+    assert _contagem() == (4, 1)
+
+
+def test_log_recriado_sem_copia_recomeca_do_zero(log):
+    _anexar(log, _sucesso("primeiro"), _sucesso("segundo"), _falha("terceiro"))
+    assert _contagem() == (2, 1)
+
+    # Apagado e recriado maior que o offset antigo: só a assinatura denuncia a troca
+    os.remove(log)
+    _anexar(log, *(_sucesso(f"recriado {i}") for i in range(5)))
+    assert _contagem() == (7, 1)
+
+    # Truncado para um tamanho menor que o offset
+    with open(log, "w", encoding="utf-8") as f:
+        f.write(_falha("truncado"))
+    assert _contagem() == (7, 2)
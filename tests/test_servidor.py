@@ -0,0 +1,51 @@
+import time
+import threading
+
+import pytest
+from flask import Flask, jsonify
+
+from cigs_core import servidor
+from cigs_core.servidor import rota_pesada, configurar_vagas_pesadas
+
+
+@pytest.fixture
+def app():
+    configurar_vagas_pesadas(1)
+    app = Flask(__name__)
+    app.liberar = threading.Event()
+    app.entrou = threading.Event()
+
+    @app.route('/pesada')
+    @rota_pesada
+    def pesada():
+        app.entrou.set()
+        app.liberar.wait(10)
+        return jsonify({"resultado": "OK"})
+
+    @app.route('/leve')
+    def leve():
+        return jsonify({"resultado": "OK"})
+
+    yield app
+    app.liberar.set()
+    configurar_vagas_pesadas(servidor.SERVIDOR_THREADS_PESADAS)
+
+
+def test_rota_pesada_ocupada_responde_503_na_hora(app):
+    ocupante = threading.Thread(target=lambda: app.test_client().get('/pesada'))
+    ocupante.start()
+    assert app.entrou.wait(5)
+
+    inicio = time.monotonic()
+    r = app.test_client().get('/pesada')
+    assert r.status_code == 503
+    assert r.get_json()["status"] == "OCUPADO"
+    assert time.monotonic() - inicio < 1.0
+
+    # Rotas leves continuam atendidas enquanto a vaga pesada está ocupada
+    assert app.test_client().get('/leve').status_code == 200
+
+    app.liberar.set()
+    ocupante.join(5)
+    # Vaga devolvida: a próxima chamada pesada é atendida
+    assert app.test_client().get('/pesada').status_code == 200
@@ -0,0 +1,91 @@
+from types import SimpleNamespace
+from urllib.parse import urlparse
+
+import pytest
+
+from cigs_core import api
+from core import network_ops
+
+
+@pytest.fixture(autouse=True)
+def cache_isolado(monkeypatch):
+    monkeypatch.setattr(api, "_cache_status", {})
+    leituras = []
+
+    def contar(sis):
+        leituras.append(sis)
+        return 3, "CLIENTE_A"
+
+    monkeypatch.setattr(api, "contar_clientes", contar)
+    return leituras
+
+
+def test_ping_nao_toca_disco(monkeypatch):
+    monkeypatch.setattr(api, "contar_clientes", lambda sis: pytest.fail("config.ini lido no ping"))
+    monkeypatch.setattr(api, "get_self_hash", lambda: pytest.fail("hash lido no ping"))
+    monkeypatch.setattr(api, "log_debug", lambda *a, **k: pytest.fail("log gravado no ping"))
+    dados = api.app.test_client().get('/cigs/ping').get_json()
+    assert dados["status"] == "ONLINE"
+    assert dados["version"] == api.VERSAO_AGENTE
+    assert dados["uptime"] >= 0
+
+
+def test_status_em_cache_por_ttl(cache_isolado, monkeypatch):
+    cliente = api.app.test_client()
+    for _ in range(3):
+        assert cliente.get('/cigs/status?sistema=AC').get_json()["clientes"] == 3
+    cliente.get('/cigs/status_all')
+    assert cache_isolado.count("AC") == 1
+
+    monkeypatch.setattr(api, "STATUS_CACHE_SEGUNDOS", 0)
+    cliente.get('/cigs/status?sistema=AC')
+    assert cache_isolado.count("AC") == 2
+
+
+def test_status_sem_mudanca_responde_304():
+    cliente = api.app.test_client()
+    primeira = cliente.get('/cigs/status?sistema=AC')
+    etag = primeira.headers["ETag"]
+    segunda = cliente.get('/cigs/status?sistema=AC', headers={"If-None-Match": etag})
+    assert segunda.status_code == 304
+    assert segunda.data == b""
+    outro = cliente.get('/cigs/status?sistema=AG', headers={"If-None-Match": etag})
+    assert outro.status_code == 200
+
+
+def test_full_so_quando_pedido():
+    cliente = api.app.test_client()
+    assert cliente.get('/cigs/status?sistema=AC').get_json()["recursos"] is None
+    assert cliente.get('/cigs/status?sistema=AC&full=1').get_json()["recursos"] is not None
+
+
+@pytest.fixture
+def central(monkeypatch):
+    """CIGSCore falando com o app Flask em memória no lugar da rede."""
+    cliente = api.app.test_client()
+    respostas = []
+
+    def get(url, params=None, headers=None, timeout=None):
+        r = cliente.get(urlparse(url).path, query_string=params or {}, headers=headers or {})
+        respostas.append(r.status_code)
+        return SimpleNamespace(status_code=r.status_code, headers=r.headers, json=r.get_json)
+
+    monkeypatch.setattr(network_ops.requests, "get", get)
+    return network_ops.CIGSCore(), respostas
+
+
+def test_central_reaproveita_resposta_no_304(central):
+    core, respostas = central
+    primeira = core.checar_status_agente("10.0.0.1", "AC")
+    segunda = core.checar_status_agente("10.0.0.1", "AC")
+    assert respostas == [200, 304]
+    assert segunda["clientes"] == primeira["clientes"] == 3
+    assert segunda["status"] == "ONLINE"
+
+
+def test_central_ping_mede_latencia(central):
+    core, respostas = central
+    res = core.ping_agente("10.0.0.1")
+    assert res["status"] == "ONLINE"
+    assert res["latencia_ms"] is not None
+    assert respostas == [200]